@@ -4,6 +4,9 @@ import type {
   CreateTripPayload,
   SessionResponse,
   Trip,
+  TripActivity,
+  TripCommentsPage,
+  TripLodging,
   UserProfileResponse,
 } from "@/lib/api-types";
 
@@ -98,9 +101,26 @@ export async function createProfileSetup(payload: {
   });
 }
 
+const TRIPS_PAGE_SIZE = 500;
+
 export async function getTrips(): Promise<Trip[]> {
-  const data = await requestJson<{ trips: Trip[] }>("/trips", { method: "GET" });
-  return data.trips;
+  const trips: Trip[] = [];
+  let cursor: string | null = null;
+
+  do {
+    const params = new URLSearchParams({ limit: String(TRIPS_PAGE_SIZE) });
+    if (cursor) {
+      params.set("cursor", cursor);
+    }
+
+    const data: { trips: Trip[]; next_cursor?: string | null } = await requestJson(`/trips?${params.toString()}`, {
+      method: "GET",
+    });
+    trips.push(...data.trips);
+    cursor = data.next_cursor ?? null;
+  } while (cursor);
+
+  return trips;
 }
 
 export async function getTrip(tripId: number): Promise<Trip> {
@@ -108,11 +128,31 @@ export async function getTrip(tripId: number): Promise<Trip> {
   return data.trip;
 }
 
+export async function getTripComments(tripId: number, cursor?: string | null): Promise<TripCommentsPage> {
+  const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+  return requestJson<TripCommentsPage>(`/trips/${tripId}/comments${query}`, { method: "GET" });
+}
+
+export async function getTripsByIds(tripIds: number[]): Promise<Trip[]> {
+  if (tripIds.length === 0) {
+    return [];
+  }
+  const data = await requestJson<{ trips: Trip[] }>(`/trips/batch?ids=${tripIds.join(",")}`, { method: "GET" });
+  return data.trips;
+}
+
 export async function getMyTrips(): Promise<Trip[]> {
   const data = await requestJson<{ trips: Trip[] }>("/users/me/trips", { method: "GET" });
   return data.trips;
 }
 
+export type TripExportFormat = "ndjson" | "geojson" | "csv";
+
+// Streamed as a file download; use as a link href so the browser sends the session cookie.
+export function getMyTripsExportUrl(format: TripExportFormat = "ndjson"): string {
+  return `${API_BASE_URL}/users/me/trips/export?format=${format}`;
+}
+
 export async function createTrip(payload: CreateTripPayload): Promise<Trip> {
   const data = await requestJson<{ trip: Trip }>("/trips", {
     method: "POST",
@@ -150,6 +190,49 @@ export async function uploadImage(file: File, folder = "trips"): Promise<string>
   return payload.url;
 }
 
+export interface ImageVariant {
+  width: number;
+  height: number;
+  url: string;
+  content_type: string;
+  bytes: number;
+}
+
+export interface UploadedImage {
+  image_id: number;
+  status: "pending" | "processing" | "completed" | "failed";
+  // A short-lived presigned link to the original until processing completes, then the largest variant.
+  url: string;
+  original_url: string;
+  final_url: string | null;
+  // Smallest first; null until processing completes.
+  variants: ImageVariant[] | null;
+  manifest_url: string | null;
+  attempts: number;
+  last_error: string | null;
+  created_at: string | null;
+  updated_at: string | null;
+}
+
+// Smallest variant covering the rendered box at the device pixel ratio, else the largest.
+export function pickImageVariant(image: UploadedImage, cssWidth: number, cssHeight = 0): string {
+  const variants = image.variants ?? [];
+  if (variants.length === 0) {
+    return image.url;
+  }
+
+  const pixelRatio = typeof window === "undefined" ? 1 : window.devicePixelRatio || 1;
+  const match = variants.find(
+    (variant) => variant.width >= cssWidth * pixelRatio && variant.height >= cssHeight * pixelRatio,
+  );
+  return (match ?? variants[variants.length - 1]).url;
+}
+
+export async function getUploadedImage(imageId: number): Promise<UploadedImage> {
+  const data = await requestJson<{ image: UploadedImage }>(`/uploads/images/${imageId}`, { method: "GET" });
+  return data.image;
+}
+
 export async function addTripLodging(tripId: number, payload: AddLodgingPayload) {
   return requestJson<{ message: string }>(`/trips/${tripId}/lodgings`, {
     method: "POST",
@@ -179,10 +262,23 @@ export interface SavedPlans {
   saved_lodging_ids: number[];
 }
 
+export interface ExpandedSavedPlans extends SavedPlans {
+  activities: TripActivity[];
+  lodgings: TripLodging[];
+  // Parent trips with tags only; the saved children are in activities/lodgings.
+  trips: Omit<Trip, "lodgings" | "activities" | "comments">[];
+  // Only the first 100 saved items are expanded.
+  truncated: boolean;
+}
+
 export async function getSavedPlans(): Promise<SavedPlans> {
   return requestJson<SavedPlans>("/users/me/plans", { method: "GET" });
 }
 
+export async function getExpandedSavedPlans(): Promise<ExpandedSavedPlans> {
+  return requestJson<ExpandedSavedPlans>("/users/me/plans?expand=true", { method: "GET" });
+}
+
 export async function toggleSavedActivity(activityId: number): Promise<SavedPlans> {
   return requestJson<SavedPlans>(`/users/me/plans/activities/${activityId}`, { method: "POST" });
 }
@@ -191,4 +287,17 @@ export async function toggleSavedLodging(lodgeId: number): Promise<SavedPlans> {
   return requestJson<SavedPlans>(`/users/me/plans/lodgings/${lodgeId}`, { method: "POST" });
 }
 
+export interface PlanOperation {
+  type: "activity" | "lodging";
+  id: number;
+  action: "save" | "unsave";
+}
+
+export async function updateSavedPlans(operations: PlanOperation[]): Promise<SavedPlans> {
+  return requestJson<SavedPlans>("/users/me/plans/batch", {
+    method: "POST",
+    body: JSON.stringify({ operations }),
+  });
+}
+
 export { ApiError };
@@ -72,12 +72,20 @@ export interface Trip {
   visibility: TripVisibility;
   owner_user_id: number;
   owner: TripOwner;
+  comment_count: number;
   tags: string[];
   lodgings: TripLodging[];
   activities: TripActivity[];
+  // Listings embed the newest few (page the rest with getTripComments); getTrip embeds all.
   comments: TripComment[];
 }
 
+export interface TripCommentsPage {
+  comments: TripComment[];
+  comment_count: number;
+  next_cursor: string | null;
+}
+
 export interface UserTripEntry {
   trip_id: number;
   title: string;
@@ -1,22 +1,37 @@
 from flask import Flask, jsonify
 
-from config import CLIENT_APP_URL, SECRET_KEY
+from compression import compress_response
+from config import CLIENT_APP_URL, COMPRESSION_ENABLED, JSON_PROVIDER, SECRET_KEY
+from db import get_pool_stats, release_request_connection
+from json_provider import select_json_provider
+from routes.admin import admin_bp
 from routes.auth import auth_bp
 from routes.plans import plans_bp
 from routes.profile import profile_bp
+from routes.search import search_bp
 from routes.trips import trips_bp
 from routes.uploads import uploads_bp
+from services.auth_service import get_user_cache_stats
+from services.cluster_service import get_cluster_cache_stats
+from services.image_job_service import get_image_job_stats
+from services.password_service import get_password_hash_stats
+from services.trip_service import get_feed_cache_stats
+from session_store import get_session_stats, init_session_store
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     app.secret_key = SECRET_KEY
+    app.json = select_json_provider(JSON_PROVIDER)(app)
 
     app.config.update(
         SESSION_COOKIE_HTTPONLY=True,
         SESSION_COOKIE_SAMESITE="None",
         SESSION_COOKIE_SECURE=True,
     )
+    init_session_store(app)
+
+    app.teardown_appcontext(release_request_connection)
 
     @app.after_request
     def add_cors_headers(response):
@@ -26,13 +41,35 @@ def create_app() -> Flask:
         response.headers["Access-Control-Allow-Methods"] = "GET, POST, DELETE, OPTIONS"
         return response
 
+    if COMPRESSION_ENABLED:
+        app.after_request(compress_response)
+
     @app.route("/", methods=["GET"])
     def health():
         return jsonify({"status": "ok"}), 200
 
+    @app.route("/health/stats", methods=["GET"])
+    def health_stats():
+        return (
+            jsonify(
+                {
+                    "db_pool": get_pool_stats(),
+                    "cluster_cache": get_cluster_cache_stats(),
+                    "feed_cache": get_feed_cache_stats(),
+                    "auth_user_cache": get_user_cache_stats(),
+                    "password_hashing": get_password_hash_stats(),
+                    "sessions": get_session_stats(app),
+                    "image_jobs": get_image_job_stats(),
+                }
+            ),
+            200,
+        )
+
+    app.register_blueprint(admin_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(plans_bp)
     app.register_blueprint(profile_bp)
+    app.register_blueprint(search_bp)
     app.register_blueprint(trips_bp)
     app.register_blueprint(uploads_bp)
 
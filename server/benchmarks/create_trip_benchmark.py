@@ -0,0 +1,82 @@
+"""Measure create_trip latency as the number of child rows grows.
+
+Run from server/ against a development database:
+
+    python benchmarks/create_trip_benchmark.py --children 0 10 55 200 --repeat 10
+
+Each size creates trips with a 3:1 split of activities to lodgings plus three
+tags. Trips belong to a throwaway traveler that is deleted (with cascade) when
+the run finishes.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_cursor  # noqa: E402
+from services.trip_service import create_trip  # noqa: E402
+
+
+def _payload(child_count: int) -> dict:
+    lodging_count = child_count // 4
+    activity_count = child_count - lodging_count
+    return {
+        "title": "Benchmark trip",
+        "description": "Created by create_trip_benchmark.py",
+        "latitude": "40.7128",
+        "longitude": "-74.0060",
+        "cost": "$1,250.00",
+        "duration": "multiday trip",
+        "date": "2024-05",
+        "visibility": "private",
+        "tags": ["city", "foodie", "nightlife"],
+        "lodgings": [
+            {"title": f"Lodging {i}", "address": "1 Main St", "latitude": "40.71", "longitude": "-74.0", "cost": "99.99"}
+            for i in range(lodging_count)
+        ],
+        "activities": [
+            {"title": f"Activity {i}", "location": "Downtown", "latitude": "40.72", "longitude": "-74.01", "cost": "15"}
+            for i in range(activity_count)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--children", type=int, nargs="+", default=[0, 10, 55, 200])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            "INSERT INTO travelers (name, email, password_hash) VALUES ('Benchmark', %s, 'x') RETURNING user_id",
+            (f"bench-{uuid.uuid4().hex}@example.invalid",),
+        )
+        user_id = int(cur.fetchone()["user_id"])
+
+    try:
+        print(f"{'children':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for child_count in args.children:
+            payload = _payload(child_count)
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                create_trip(owner_user_id=user_id, payload=payload)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{child_count:>8} {statistics.median(timings):>8.1f} {p95:>8.1f} {timings[-1]:>8.1f}")
+    finally:
+        with get_cursor(commit=True) as cur:
+            cur.execute("DELETE FROM travelers WHERE user_id = %s", (user_id,))
+
+
+if __name__ == "__main__":
+    main()
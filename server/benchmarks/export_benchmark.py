@@ -0,0 +1,51 @@
+"""Measure trip export throughput for each format.
+
+Run from server/ against a development database:
+
+    python benchmarks/export_benchmark.py --formats ndjson geojson csv
+
+"cursor" is the streamed HTTP path (server-side cursor, one rendered line per
+trip); "copy" is the export_trips.py path (COPY TO STDOUT). Output is
+discarded, so the numbers reflect database rendering and transfer only.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.export_service import EXPORT_FORMATS, _iter_export, export_trips_to_file  # noqa: E402
+
+
+class _Discard:
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data: bytes):
+        self.bytes += len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--formats", nargs="+", choices=EXPORT_FORMATS, default=list(EXPORT_FORMATS))
+    args = parser.parse_args()
+
+    print(f"{'format':>8} {'path':>7} {'trips':>8} {'MB':>8} {'seconds':>8}")
+    for fmt in args.formats:
+        started = time.perf_counter()
+        size = 0
+        for part in _iter_export(fmt, "t.visibility = 'public'", tuple()):
+            size += len(part.encode("utf-8"))
+        print(f"{fmt:>8} {'cursor':>7} {'-':>8} {size / 1e6:>8.1f} {time.perf_counter() - started:>8.2f}")
+
+        sink = _Discard()
+        started = time.perf_counter()
+        count = export_trips_to_file(sink, fmt=fmt)
+        print(f"{fmt:>8} {'copy':>7} {count:>8} {sink.bytes / 1e6:>8.1f} {time.perf_counter() - started:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
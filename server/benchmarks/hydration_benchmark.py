@@ -0,0 +1,157 @@
+"""Compare the python and sql trip hydration engines.
+
+Run from server/ against a development database:
+
+    python benchmarks/hydration_benchmark.py --sizes 100 1000 10000
+
+Trips are seeded under a throwaway traveler that is deleted (with cascade)
+when the run finishes.
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import execute_values  # noqa: E402
+
+from db import get_cursor  # noqa: E402
+from services.trip_service import (  # noqa: E402
+    TRIP_CHILD_COLLECTIONS,
+    _fetch_trip_documents_json,
+    _load_trips,
+)
+
+TAGS = ("beach", "city", "foodie", "nature")
+COMMENTS_START = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def _seed(trip_count: int) -> int:
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            """
+            INSERT INTO travelers (name, email, password_hash)
+            VALUES ('Benchmark', %s, 'x')
+            RETURNING user_id
+            """,
+            (f"bench-{uuid.uuid4().hex}@example.invalid",),
+        )
+        user_id = int(cur.fetchone()["user_id"])
+
+        trip_ids = [
+            int(row["trip_id"])
+            for row in execute_values(
+                cur,
+                """
+                INSERT INTO trips (title, description, latitude, longitude, cost, duration, date, visibility, owner_user_id)
+                VALUES %s
+                RETURNING trip_id
+                """,
+                [
+                    (f"Trip {i}", "A long description " * 8, 40 + i % 10 / 10, -70 - i % 7 / 10, 125.5, "day trip", "2024-05", "public", user_id)
+                    for i in range(trip_count)
+                ],
+                page_size=1000,
+                fetch=True,
+            )
+        ]
+
+        execute_values(
+            cur,
+            "INSERT INTO trip_tags (trip_id, tag) VALUES %s",
+            [(trip_id, tag) for trip_id in trip_ids for tag in TAGS[:3]],
+            page_size=1000,
+        )
+        execute_values(
+            cur,
+            "INSERT INTO lodgings (trip_id, title, address, latitude, longitude, cost) VALUES %s",
+            [(trip_id, f"Lodging {n}", "1 Main St", 40.1, -70.1, 99.99) for trip_id in trip_ids for n in range(2)],
+            page_size=1000,
+        )
+        execute_values(
+            cur,
+            "INSERT INTO activities (trip_id, title, location, latitude, longitude, cost) VALUES %s",
+            [(trip_id, f"Activity {n}", "Downtown", 40.2, -70.2, 15) for trip_id in trip_ids for n in range(3)],
+            page_size=1000,
+        )
+        # Distinct timestamps, including whole seconds and trailing fractional
+        # zeros, so the engines are compared on how they render created_at.
+        execute_values(
+            cur,
+            "INSERT INTO comments (user_id, trip_id, body, created_at) VALUES %s",
+            [
+                (
+                    user_id,
+                    trip_id,
+                    f"Comment {n}",
+                    COMMENTS_START + timedelta(seconds=index, microseconds=index * 1230 % 1_000_000),
+                )
+                for index, (trip_id, n) in enumerate((trip_id, n) for trip_id in trip_ids for n in range(2))
+            ],
+            page_size=1000,
+        )
+
+    return user_id
+
+
+def _cleanup(user_id: int):
+    with get_cursor(commit=True) as cur:
+        cur.execute("DELETE FROM travelers WHERE user_id = %s", (user_id,))
+
+
+def _best_of(repeat: int, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    user_id = _seed(max(args.sizes))
+    where_sql, params = "t.owner_user_id = %s", (user_id,)
+
+    try:
+        print(f"{'trips':>8} {'python':>12} {'sql':>12} {'sql (raw)':>12}  identical")
+        for size in args.sizes:
+            python_time, python_trips = _best_of(
+                args.repeat,
+                lambda: json.dumps(
+                    _load_trips(where_sql, params, include=TRIP_CHILD_COLLECTIONS, limit=size, engine="python")
+                ),
+            )
+            sql_time, sql_trips = _best_of(
+                args.repeat,
+                lambda: json.dumps(
+                    _load_trips(where_sql, params, include=TRIP_CHILD_COLLECTIONS, limit=size, engine="sql")
+                ),
+            )
+            raw_time, raw_trips = _best_of(
+                args.repeat,
+                lambda: _fetch_trip_documents_json(where_sql, params, include=TRIP_CHILD_COLLECTIONS, page_size=size)[0],
+            )
+
+            identical = json.loads(python_trips) == json.loads(sql_trips) == json.loads(raw_trips)
+            print(
+                f"{size:>8} {python_time * 1000:>10.1f}ms {sql_time * 1000:>10.1f}ms "
+                f"{raw_time * 1000:>10.1f}ms  {identical}"
+            )
+    finally:
+        _cleanup(user_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure variant generation against decoding the upload once per variant.
+
+Run from server/ (no database or S3 needed):
+
+    python benchmarks/image_variants_benchmark.py photo.jpg --repeat 5
+    python benchmarks/image_variants_benchmark.py --synthetic 4032x3024
+
+"per-variant" decodes the full image and LANCZOS-resizes it for every rung,
+as calling the old single-size optimizer once per size would; "ladder" is
+generate_image_variants (draft decode, then each rung cut from the one above).
+Both encode the same WebP settings, so the gap is decode and resampling work.
+"""
+from __future__ import annotations
+
+import argparse
+from io import BytesIO
+import os
+import sys
+import time
+
+from PIL import Image, ImageOps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.storage_service import (  # noqa: E402
+    IMAGE_VARIANT_LONG_EDGES,
+    _encode_for_web,
+    _fit_long_edge,
+    generate_image_variants,
+)
+
+
+def _synthetic_jpeg(size: str) -> bytes:
+    width, height = (int(value) for value in size.lower().split("x"))
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    output = BytesIO()
+    image.save(output, format="JPEG", quality=92)
+    return output.getvalue()
+
+
+def _per_variant(data: bytes) -> int:
+    total = 0
+    for long_edge in IMAGE_VARIANT_LONG_EDGES:
+        with Image.open(BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source).convert("RGB")
+            if max(image.size) > long_edge:
+                image = image.resize(_fit_long_edge(image.size, long_edge), Image.Resampling.LANCZOS)
+            stream, _, _ = _encode_for_web(image)
+            total += len(stream.getvalue())
+    return total
+
+
+def _ladder(data: bytes) -> int:
+    return sum(len(variant["stream"].getvalue()) for variant in generate_image_variants(data, "image/jpeg"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--synthetic", default="4032x3024", help="WIDTHxHEIGHT JPEG used when no path is given")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, "rb") as file:
+            data = file.read()
+    else:
+        data = _synthetic_jpeg(args.synthetic)
+
+    print(f"{'method':>11} {'ms/image':>9} {'output KB':>10}")
+    for name, run in (("per-variant", _per_variant), ("ladder", _ladder)):
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            size = run(data)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / args.repeat
+        print(f"{name:>11} {elapsed_ms:>9.1f} {size / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure bulk import throughput for generated NDJSON trips.
+
+Run from server/ against a development database:
+
+    python benchmarks/import_benchmark.py --trips 100000 --children 10 --batch-size 1000
+
+Trips are private, carry three tags and a 3:1 split of activities to
+lodgings, and belong to a throwaway traveler that is deleted (with cascade)
+when the run finishes.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_cursor  # noqa: E402
+from services.import_service import create_import, run_import  # noqa: E402
+
+
+def _record(index: int, child_count: int) -> dict:
+    lodging_count = child_count // 4
+    return {
+        "title": f"Imported trip {index}",
+        "description": "Generated by import_benchmark.py",
+        "latitude": f"{(index % 1700) / 10 - 85:.4f}",
+        "longitude": f"{(index % 3500) / 10 - 175:.4f}",
+        "cost": "1250",
+        "date": "2024-05",
+        "visibility": "private",
+        "tags": ["city", "foodie", "nightlife"],
+        "lodgings": [{"title": f"Lodging {i}", "latitude": "40.71", "longitude": "-74.0"} for i in range(lodging_count)],
+        "activities": [
+            {"title": f"Activity {i}", "latitude": "40.72", "longitude": "-74.01", "cost": "15"}
+            for i in range(child_count - lodging_count)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trips", type=int, default=100_000)
+    parser.add_argument("--children", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".ndjson", encoding="utf-8", delete=False) as handle:
+        for index in range(args.trips):
+            handle.write(json.dumps(_record(index, args.children)))
+            handle.write("\n")
+        path = handle.name
+
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            "INSERT INTO travelers (name, email, password_hash) VALUES ('Benchmark', %s, 'x') RETURNING user_id",
+            (f"bench-{uuid.uuid4().hex}@example.invalid",),
+        )
+        user_id = int(cur.fetchone()["user_id"])
+
+    try:
+        job = create_import(owner_user_id=user_id, fmt="ndjson", source=path)
+        started = time.perf_counter()
+        with open(path, encoding="utf-8") as stream:
+            job = run_import(job["import_id"], stream, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - started
+
+        print(f"{job['trips_imported']} trips, {job['error_count']} errors in {elapsed:.1f}s")
+        print(f"{job['trips_imported'] / elapsed:.0f} trips/s")
+    finally:
+        os.unlink(path)
+        with get_cursor(commit=True) as cur:
+            cur.execute("DELETE FROM travelers WHERE user_id = %s", (user_id,))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compare JSON providers and response compression on a synthetic trip feed.
+
+Run from server/ (no database needed):
+
+    python benchmarks/json_benchmark.py --trips 5000
+
+Trips are shaped like a full /trips listing, with Decimal and datetime values
+left unconverted so the providers' native handling is part of the timing.
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta
+from decimal import Decimal
+import gzip
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from config import COMPRESSION_BROTLI_QUALITY, COMPRESSION_GZIP_LEVEL  # noqa: E402
+from json_provider import OrjsonProvider, orjson  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _feed(trip_count: int) -> dict:
+    created_at = datetime(2024, 5, 1, 12, 0, 0)
+    owner = {
+        "user_id": 1,
+        "name": "Benchmark Traveler",
+        "bio": "Weekend hikes, cheap flights and too many photos. " * 2,
+        "verified": True,
+        "college": "Northeastern University",
+        "profile_image_url": "https://example.invalid/profile/1.jpg",
+    }
+    trips = []
+    for i in range(trip_count):
+        trips.append(
+            {
+                "trip_id": trip_count - i,
+                "thumbnail_url": f"https://example.invalid/trips/{i}.jpg",
+                "title": f"Trip {i}",
+                "description": "A long description of the trip and everything we did. " * 6,
+                "latitude": Decimal("40.712800") + Decimal(i % 10) / 10,
+                "longitude": Decimal("-74.006000") - Decimal(i % 7) / 10,
+                "cost": Decimal("125.50"),
+                "duration": "multiday trip",
+                "date": "2024-05",
+                "visibility": "public",
+                "owner_user_id": 1,
+                "owner": owner,
+                "tags": ["beach", "foodie"],
+                "lodgings": [
+                    {"lodge_id": i * 2, "title": "Hostel", "cost": Decimal("40.00"), "description": "Near the station."}
+                ],
+                "activities": [
+                    {"activity_id": i * 3 + n, "title": f"Activity {n}", "cost": Decimal("12.00"), "location": "Downtown"}
+                    for n in range(3)
+                ],
+                "comments": [
+                    {"comment_id": i, "user_id": 2, "body": "Looks great!", "created_at": created_at + timedelta(minutes=i)}
+                ],
+            }
+        )
+    return {"trips": trips, "next_cursor": None}
+
+
+def _best_ms(fn, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trips", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask("json_benchmark")
+    providers = {"stdlib": DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = OrjsonProvider(app)
+    else:
+        print("orjson is not installed; only the stdlib provider is measured")
+
+    feed = _feed(args.trips)
+    print(f"{args.trips} trips, best of {args.repeat}")
+    print(f"{'provider':<8} {'encode ms':>10} {'raw KB':>9} {'gzip KB':>9} {'gzip ms':>8} {'br KB':>8} {'br ms':>7}")
+
+    for name, provider in providers.items():
+        encode_ms, text = _best_ms(lambda: provider.dumps(feed), args.repeat)
+        data = text.encode("utf-8")
+        gzip_ms, gzipped = _best_ms(lambda: gzip.compress(data, compresslevel=COMPRESSION_GZIP_LEVEL), args.repeat)
+
+        br_kb = br_ms = "-"
+        if brotli is not None:
+            br_time, compressed = _best_ms(lambda: brotli.compress(data, quality=COMPRESSION_BROTLI_QUALITY), args.repeat)
+            br_kb, br_ms = f"{len(compressed) / 1024:.1f}", f"{br_time:.1f}"
+
+        print(
+            f"{name:<8} {encode_ms:>10.1f} {len(data) / 1024:>9.1f} {len(gzipped) / 1024:>9.1f}"
+            f" {gzip_ms:>8.1f} {br_kb:>8} {br_ms:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
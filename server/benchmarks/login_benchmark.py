@@ -0,0 +1,100 @@
+"""Measure password verification throughput against hashing worker count.
+
+Run from server/ (no database needed):
+
+    python benchmarks/login_benchmark.py --workers 1 2 4 8 --clients 16 --seconds 10
+
+Each client thread calls verify_password back to back, as /login would, for
+the given duration. Rejected calls are the ones the max-pending limit turned
+into 503s; raise --max-pending to measure pure throughput instead.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BCRYPT_COST  # noqa: E402
+from services.password_service import (  # noqa: E402
+    PASSWORD_HASH_EXECUTORS,
+    PasswordHashBusyError,
+    PasswordHasher,
+)
+
+PASSWORD = "correct horse battery staple"
+
+
+def _run(hasher: PasswordHasher, password_hash: str, *, clients: int, seconds: float) -> dict:
+    deadline = time.perf_counter() + seconds
+    timings: list[float] = []
+    rejected = 0
+    lock = threading.Lock()
+
+    def client():
+        nonlocal rejected
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                hasher.verify_password(PASSWORD, password_hash)
+            except PasswordHashBusyError:
+                with lock:
+                    rejected += 1
+                time.sleep(0.01)
+                continue
+            with lock:
+                timings.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    timings.sort()
+    return {
+        "logins_per_second": len(timings) / seconds,
+        "p50_ms": statistics.median(timings) if timings else 0.0,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] if timings else 0.0,
+        "rejected": rejected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executor", choices=PASSWORD_HASH_EXECUTORS, default="process")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--cost", type=int, default=BCRYPT_COST)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'rejected':>9}")
+    for workers in args.workers:
+        hasher = PasswordHasher(
+            executor=args.executor,
+            workers=workers,
+            max_pending=args.max_pending,
+            cost=args.cost,
+            timeout=60.0,
+        )
+        try:
+            # Warms the pool so process start-up is not counted.
+            password_hash = hasher.hash_password(PASSWORD)
+            result = _run(hasher, password_hash, clients=args.clients, seconds=args.seconds)
+        finally:
+            hasher.shutdown()
+
+        print(
+            f"{workers:>7} {result['logins_per_second']:>9.1f} {result['p50_ms']:>8.1f} "
+            f"{result['p95_ms']:>8.1f} {result['rejected']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
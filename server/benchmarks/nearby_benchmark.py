@@ -0,0 +1,152 @@
+"""Compare GET /trips/nearby against a brute-force haversine scan.
+
+Run from server/ against a development database (seeding the default 1M points
+takes a few minutes):
+
+    python benchmarks/nearby_benchmark.py --queries 200 --radius-km 500
+
+Points are seeded as public trips under a throwaway traveler that is deleted
+(with cascade) when the run finishes.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import execute_values  # noqa: E402
+
+from db import get_cursor  # noqa: E402
+from services.geo import haversine_km_sql  # noqa: E402
+from services.nearby_service import NEARBY_DEFAULT_RADIUS_KM, list_nearby  # noqa: E402
+
+# Seeded points cluster around a few cities so both dense and sparse queries occur.
+CITIES = ((40.71, -74.0), (51.5, -0.12), (35.68, 139.69), (-33.87, 151.21), (64.14, -21.94), (-17.71, 178.06))
+
+
+def _random_point(rng: random.Random) -> tuple[float, float]:
+    lat, lng = rng.choice(CITIES)
+    lng = lng + rng.gauss(0, 2)
+    lng = ((lng + 180.0) % 360.0) - 180.0
+    return max(-89.9, min(89.9, lat + rng.gauss(0, 2))), lng
+
+
+def _seed(point_count: int, rng: random.Random) -> int:
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            """
+            INSERT INTO travelers (name, email, password_hash)
+            VALUES ('Benchmark', %s, 'x')
+            RETURNING user_id
+            """,
+            (f"bench-{uuid.uuid4().hex}@example.invalid",),
+        )
+        user_id = int(cur.fetchone()["user_id"])
+
+        batch = 50000
+        for start in range(0, point_count, batch):
+            rows = []
+            for i in range(start, min(point_count, start + batch)):
+                lat, lng = _random_point(rng)
+                rows.append((f"Point {i}", round(lat, 6), round(lng, 6), "public", user_id))
+            execute_values(
+                cur,
+                "INSERT INTO trips (title, latitude, longitude, visibility, owner_user_id) VALUES %s",
+                rows,
+                page_size=5000,
+            )
+        cur.execute("ANALYZE trips")
+
+    return user_id
+
+
+def _cleanup(user_id: int):
+    with get_cursor(commit=True) as cur:
+        cur.execute("DELETE FROM travelers WHERE user_id = %s", (user_id,))
+
+
+def _brute_force(latitude: float, longitude: float, k: int, radius_km: float) -> list[tuple[str, int]]:
+    selects = []
+    params: list = []
+    for kind, alias, id_sql, table_sql in (
+        ("trip", "t", "t.trip_id", "trips t"),
+        ("activity", "a", "a.activity_id", "activities a JOIN trips t ON t.trip_id = a.trip_id"),
+        ("lodging", "l", "l.lodge_id", "lodgings l JOIN trips t ON t.trip_id = l.trip_id"),
+    ):
+        selects.append(
+            f"""
+            SELECT '{kind}' AS kind, {id_sql} AS item_id, {haversine_km_sql(alias)} AS distance_km
+            FROM {table_sql}
+            WHERE t.visibility = 'public' AND {alias}.latitude IS NOT NULL AND {alias}.longitude IS NOT NULL
+            """
+        )
+        params.extend((latitude, latitude, longitude))
+
+    with get_cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT kind, item_id
+            FROM ({" UNION ALL ".join(selects)}) candidates
+            WHERE distance_km <= %s
+            ORDER BY distance_km ASC, kind ASC, item_id ASC
+            LIMIT %s
+            """,
+            tuple(params) + (radius_km, k),
+        )
+        return [(row["kind"], int(row["item_id"])) for row in cur.fetchall()]
+
+
+def _percentiles(timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50 {statistics.median(ordered) * 1000:7.2f}ms  p95 {p95 * 1000:7.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--brute-force-queries", type=int, default=10)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=NEARBY_DEFAULT_RADIUS_KM)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    user_id = _seed(args.points, rng)
+
+    try:
+        origins = [_random_point(rng) for _ in range(args.queries)]
+
+        indexed_timings = []
+        indexed_results = []
+        for latitude, longitude in origins:
+            started = time.perf_counter()
+            results = list_nearby(viewer_user_id=None, latitude=latitude, longitude=longitude, k=args.k, radius_km=args.radius_km)
+            indexed_timings.append(time.perf_counter() - started)
+            indexed_results.append([(item["kind"], item["item_id"]) for item in results])
+
+        brute_timings = []
+        mismatches = 0
+        for (latitude, longitude), expected in zip(origins[: args.brute_force_queries], indexed_results):
+            started = time.perf_counter()
+            actual = _brute_force(latitude, longitude, args.k, args.radius_km)
+            brute_timings.append(time.perf_counter() - started)
+            mismatches += actual != expected
+
+        print(f"{args.points} points, k={args.k}, radius={args.radius_km}km")
+        print(f"indexed     ({len(indexed_timings):>4} queries)  {_percentiles(indexed_timings)}")
+        print(f"brute force ({len(brute_timings):>4} queries)  {_percentiles(brute_timings)}")
+        print(f"result mismatches: {mismatches}")
+    finally:
+        _cleanup(user_id)
+
+
+if __name__ == "__main__":
+    main()
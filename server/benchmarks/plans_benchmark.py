@@ -0,0 +1,126 @@
+"""Toggle throughput for saved plans under concurrent users.
+
+Run from server/ against a development database with migration 007 applied:
+
+    DB_POOL_MAX_SIZE=16 python benchmarks/plans_benchmark.py --users 16 --seconds 10
+
+Each worker thread plays one user toggling random activities. The join-table
+implementation is compared with the legacy travelers.saved_activity_ids array
+rewrite. Seeded rows belong to throwaway travelers that are deleted (with
+cascade) when the run finishes.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import execute_values  # noqa: E402
+
+from db import get_cursor  # noqa: E402
+from services.plans_service import toggle_saved_activity  # noqa: E402
+
+
+def _legacy_toggle(user_id: int, activity_id: int):
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            """
+            UPDATE travelers
+            SET saved_activity_ids =
+                CASE WHEN %s = ANY(saved_activity_ids)
+                     THEN array_remove(saved_activity_ids, %s)
+                     ELSE array_append(saved_activity_ids, %s)
+                END
+            WHERE user_id = %s
+            RETURNING saved_activity_ids, saved_lodging_ids
+            """,
+            (activity_id, activity_id, activity_id, user_id),
+        )
+        cur.fetchone()
+
+
+def _seed(user_count: int, activity_count: int) -> tuple[list[int], list[int]]:
+    run = uuid.uuid4().hex
+    with get_cursor(commit=True) as cur:
+        user_ids = [
+            int(row["user_id"])
+            for row in execute_values(
+                cur,
+                "INSERT INTO travelers (name, email, password_hash) VALUES %s RETURNING user_id",
+                [("Benchmark", f"bench-{run}-{i}@example.invalid", "x") for i in range(user_count)],
+                fetch=True,
+            )
+        ]
+        cur.execute(
+            "INSERT INTO trips (title, visibility, owner_user_id) VALUES ('Plans benchmark', 'public', %s) RETURNING trip_id",
+            (user_ids[0],),
+        )
+        trip_id = int(cur.fetchone()["trip_id"])
+        activity_ids = [
+            int(row["activity_id"])
+            for row in execute_values(
+                cur,
+                "INSERT INTO activities (trip_id, title) VALUES %s RETURNING activity_id",
+                [(trip_id, f"Activity {i}") for i in range(activity_count)],
+                page_size=1000,
+                fetch=True,
+            )
+        ]
+    return user_ids, activity_ids
+
+
+def _cleanup(user_ids: list[int]):
+    with get_cursor(commit=True) as cur:
+        cur.execute("DELETE FROM travelers WHERE user_id = ANY(%s)", (user_ids,))
+
+
+def _run(toggle, user_ids: list[int], activity_ids: list[int], seconds: float) -> tuple[int, list[float]]:
+    deadline = time.perf_counter() + seconds
+    counts = [0] * len(user_ids)
+    latencies: list[list[float]] = [[] for _ in user_ids]
+
+    def worker(index: int):
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            toggle(user_ids[index], rng.choice(activity_ids))
+            latencies[index].append(time.perf_counter() - started)
+            counts[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(len(user_ids))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return sum(counts), sorted(latency for per_user in latencies for latency in per_user)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--activities", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    user_ids, activity_ids = _seed(args.users, args.activities)
+    try:
+        print(f"{args.users} concurrent users, {args.activities} activities, {args.seconds:g}s per run")
+        print(f"{'implementation':<14} {'toggles/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, toggle in (("join tables", toggle_saved_activity), ("legacy arrays", _legacy_toggle)):
+            total, latencies = _run(toggle, user_ids, activity_ids, args.seconds)
+            p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0.0
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else 0.0
+            print(f"{name:<14} {total / args.seconds:>10.0f} {p50:>8.2f} {p95:>8.2f}")
+    finally:
+        _cleanup(user_ids)
+
+
+if __name__ == "__main__":
+    main()
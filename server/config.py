@@ -15,8 +15,95 @@ DB_CONFIG = {
     "user": os.getenv("POSTGRES_USER"),
     "password": os.getenv("POSTGRES_PASSWORD"),
     "sslmode": os.getenv("POSTGRES_SSLMODE", "require"),
+    "connect_timeout": int(os.getenv("POSTGRES_CONNECT_TIMEOUT", "10")),
 }
 
+# Authenticated users are cached per process for this long; a profile change
+# made in another process (or a deleted account) is seen within the TTL.
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000"))
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+
+# bcrypt work factor for new hashes; logins rehash passwords stored at a lower cost.
+BCRYPT_COST = int(os.getenv("BCRYPT_COST", "12"))
+# "process" (default), "thread" (hosts without multiprocessing, e.g. Lambda) or "inline".
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash/verify calls beyond this many in flight get a 503 instead of queueing.
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "5"))
+
+# Connections are pooled per process, so on Lambda they survive warm invocations.
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "5"))
+DB_POOL_MAX_LIFETIME_SECONDS = float(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", "1800"))
+DB_POOL_HEALTHCHECK_IDLE_SECONDS = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE_SECONDS", "30"))
+
+TRIP_HYDRATION_ENGINE = os.getenv("TRIP_HYDRATION_ENGINE", "python")
+# Rows fetched (and hydrated) per round trip when a trip listing is streamed.
+TRIP_STREAM_CHUNK_SIZE = int(os.getenv("TRIP_STREAM_CHUNK_SIZE", "200"))
+# Pre-rendered export rows fetched per round trip (no hydration happens in Python).
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+
+CLUSTER_CACHE_MAX_TILES = int(os.getenv("CLUSTER_CACHE_MAX_TILES", "4096"))
+CLUSTER_CACHE_TTL_SECONDS = float(os.getenv("CLUSTER_CACHE_TTL_SECONDS", "300"))
+
+# "memory" caches per process; "redis" shares entries and the content version across workers.
+FEED_CACHE_BACKEND = os.getenv("FEED_CACHE_BACKEND", "memory")
+FEED_CACHE_MAX_ENTRIES = int(os.getenv("FEED_CACHE_MAX_ENTRIES", "512"))
+# Memory backend only: total size of the cached JSON per process.
+FEED_CACHE_MAX_BYTES = int(os.getenv("FEED_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+FEED_CACHE_TTL_SECONDS = float(os.getenv("FEED_CACHE_TTL_SECONDS", "60"))
+FEED_CACHE_REDIS_URL = os.getenv("FEED_CACHE_REDIS_URL")
+
+# "orjson" falls back to Flask's stdlib provider when the package is missing.
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+
+# Responses smaller than this are sent uncompressed; brotli is used when installed
+# and preferred by the client, gzip otherwise.
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in {"1", "true", "yes"}
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# max-age for anonymous GETs that carry an ETag; clients and CDNs revalidate after it.
+PUBLIC_CACHE_MAX_AGE_SECONDS = int(os.getenv("PUBLIC_CACHE_MAX_AGE_SECONDS", "0"))
+
+# "postgres" (UNLOGGED sessions table), "sqlite" (local file, for tests and single-host
+# development), "redis", or "cookie" for Flask's signed cookies, which logout cannot revoke.
+# "postgres" needs migrations/009_sessions.sql applied first, and switching away from
+# "cookie" logs out existing sessions. Schedule sweep_sessions.py where responses do
+# not outlive the request (e.g. Lambda), since the after-response sweep may never run.
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "cookie")
+# Sliding: an unchanged session is rewritten with a fresh expiry at most once per refresh interval.
+SESSION_LIFETIME_SECONDS = int(os.getenv("SESSION_LIFETIME_SECONDS", str(14 * 24 * 3600)))
+SESSION_REFRESH_SECONDS = int(os.getenv("SESSION_REFRESH_SECONDS", "3600"))
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "300"))
+SESSION_SWEEP_BATCH_SIZE = int(os.getenv("SESSION_SWEEP_BATCH_SIZE", "1000"))
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "sessions.sqlite3")
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL")
+
+# Comma-separated traveler ids allowed to use the /admin endpoints.
+ADMIN_USER_IDS = frozenset(int(value) for value in os.getenv("ADMIN_USER_IDS", "").split(",") if value.strip())
+
+# Records validated, COPYed and committed per bulk import transaction; the
+# import resumes from the last committed batch.
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 S3_PUBLIC_BASE_URL = os.getenv("S3_PUBLIC_BASE_URL")
+# Uploaded originals still carry EXIF (GPS) data. Point this at a private bucket; when
+# unset they go to S3_BUCKET_NAME under originals/, which its public-read policy must exclude.
+S3_ORIGINALS_BUCKET_NAME = os.getenv("S3_ORIGINALS_BUCKET_NAME")
+# Lifetime of the presigned original URL that stands in until the optimized copy exists.
+IMAGE_ORIGINAL_URL_TTL_SECONDS = int(os.getenv("IMAGE_ORIGINAL_URL_TTL_SECONDS", "3600"))
+
+# Uploads store the original and return at once; optimization runs as an image job.
+# "local" runs jobs on a thread pool in the web process (also the stand-in for tests);
+# "sqs" sends them to IMAGE_JOB_QUEUE_URL for the Lambda worker in lambda_handler.py.
+IMAGE_JOB_QUEUE = os.getenv("IMAGE_JOB_QUEUE", "local")
+IMAGE_JOB_QUEUE_URL = os.getenv("IMAGE_JOB_QUEUE_URL")
+IMAGE_JOB_WORKERS = int(os.getenv("IMAGE_JOB_WORKERS", "2"))
+IMAGE_JOB_MAX_ATTEMPTS = int(os.getenv("IMAGE_JOB_MAX_ATTEMPTS", "3"))
+# Unfinished jobs untouched this long count as abandoned; process_image_jobs.py picks them up.
+IMAGE_JOB_STALE_SECONDS = int(os.getenv("IMAGE_JOB_STALE_SECONDS", "600"))
@@ -1,23 +1,293 @@
+from __future__ import annotations
+
 from contextlib import contextmanager
+import threading
+import time
+from typing import Any
 
+from flask import g, has_app_context
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 
-from config import DB_CONFIG
+from config import (
+    DB_CONFIG,
+    DB_POOL_HEALTHCHECK_IDLE_SECONDS,
+    DB_POOL_MAX_LIFETIME_SECONDS,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+)
+
+
+class PoolTimeoutError(RuntimeError):
+    pass
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used_at", "broken")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+        self.broken = False
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        timeout: float,
+        max_lifetime: float,
+        healthcheck_idle: float,
+    ):
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.healthcheck_idle = healthcheck_idle
+
+        self._idle: list[_PooledConnection] = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "timeouts": 0,
+            "connects": 0,
+            "recycled": 0,
+            "healthcheck_failures": 0,
+            "discarded": 0,
+        }
+
+    def _connect(self) -> _PooledConnection:
+        conn = psycopg2.connect(**DB_CONFIG)
+        with self._cond:
+            self._stats["connects"] += 1
+        return _PooledConnection(conn)
+
+    def _is_expired(self, entry: _PooledConnection, now: float) -> bool:
+        return self.max_lifetime > 0 and now - entry.created_at >= self.max_lifetime
+
+    def _is_healthy(self, entry: _PooledConnection) -> bool:
+        try:
+            with entry.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            entry.conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close(self, entry: _PooledConnection):
+        try:
+            entry.conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _validate(self, entry: _PooledConnection) -> _PooledConnection:
+        now = time.monotonic()
+
+        if entry.conn.closed or self._is_expired(entry, now):
+            reason = "recycled"
+        elif self.healthcheck_idle >= 0 and now - entry.last_used_at >= self.healthcheck_idle and not self._is_healthy(entry):
+            reason = "healthcheck_failures"
+        else:
+            return entry
+
+        self._close(entry)
+        with self._cond:
+            self._stats[reason] += 1
+
+        try:
+            return self._connect()
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def acquire(self) -> _PooledConnection:
+        deadline = time.monotonic() + self.timeout
+        wait_started: float | None = None
+        entry: _PooledConnection | None = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    # LIFO keeps the most recently used (warmest) connections busy.
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                now = time.monotonic()
+                if wait_started is None:
+                    wait_started = now
+                    self._stats["waits"] += 1
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError("timed out waiting for a database connection")
+                self._cond.wait(remaining)
+
+            if wait_started is not None:
+                self._stats["wait_ms_total"] += (time.monotonic() - wait_started) * 1000
+            self._stats["checkouts"] += 1
+
+        if entry is None:
+            try:
+                return self._connect()
+            except Exception:
+                self._release_slot()
+                raise
+
+        return self._validate(entry)
+
+    def release(self, entry: _PooledConnection):
+        conn = entry.conn
+        discard = entry.broken or bool(conn.closed) or self._is_expired(entry, time.monotonic())
+
+        if not discard and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        if discard:
+            self._close(entry)
+            with self._cond:
+                self._stats["discarded"] += 1
+            self._release_slot()
+            return
+
+        entry.last_used_at = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close(entry)
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._size - len(self._idle)
+            stats["max_size"] = self.max_size
+        stats["wait_ms_total"] = round(stats["wait_ms_total"], 3)
+        return stats
+
+
+_pool = ConnectionPool(
+    max_size=DB_POOL_MAX_SIZE,
+    timeout=DB_POOL_TIMEOUT_SECONDS,
+    max_lifetime=DB_POOL_MAX_LIFETIME_SECONDS,
+    healthcheck_idle=DB_POOL_HEALTHCHECK_IDLE_SECONDS,
+)
+
+
+class _ConnectionScope:
+    __slots__ = ("entry", "depth", "commit", "request_scoped")
+
+    def __init__(self, *, request_scoped: bool):
+        self.entry: _PooledConnection | None = None
+        self.depth = 0
+        self.commit = False
+        self.request_scoped = request_scoped
+
+
+_thread_scope = threading.local()
+
+
+def _current_scope() -> _ConnectionScope:
+    # Inside Flask, one connection is pinned to the app context and returned to
+    # the pool on teardown. Elsewhere (scripts), it is held for the outermost cursor.
+    if has_app_context():
+        scope = g.get("_db_scope")
+        if scope is None:
+            scope = _ConnectionScope(request_scoped=True)
+            g._db_scope = scope
+        return scope
+
+    scope = getattr(_thread_scope, "scope", None)
+    if scope is None:
+        scope = _ConnectionScope(request_scoped=False)
+        _thread_scope.scope = scope
+    return scope
+
+
+def _release_scope(scope: _ConnectionScope):
+    entry, scope.entry = scope.entry, None
+    scope.commit = False
+    if entry is not None:
+        _pool.release(entry)
+
+
+def _finish_transaction(scope: _ConnectionScope, *, commit: bool):
+    entry = scope.entry
+    scope.commit = False
+    if entry is None or entry.broken:
+        return
+
+    try:
+        if commit:
+            entry.conn.commit()
+        elif entry.conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            entry.conn.rollback()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        entry.broken = True
+        if commit:
+            raise
 
 
 @contextmanager
-def get_cursor(*, commit: bool = False):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor(cursor_factory=RealDictCursor)
+def get_cursor(*, commit: bool = False, name: str | None = None):
+    scope = _current_scope()
+    if scope.entry is None:
+        scope.entry = _pool.acquire()
+
+    scope.depth += 1
+    # A name makes this a server-side cursor; it lives until the transaction ends.
+    cur = scope.entry.conn.cursor(name=name, cursor_factory=RealDictCursor)
+    outermost = scope.depth == 1
 
     try:
         yield cur
-        if commit:
-            conn.commit()
-    except Exception:
-        conn.rollback()
+        scope.commit = scope.commit or commit
+        if outermost:
+            _finish_transaction(scope, commit=scope.commit)
+    except Exception as error:
+        if scope.entry is not None and isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            scope.entry.broken = True
+        if outermost:
+            _finish_transaction(scope, commit=False)
         raise
     finally:
-        cur.close()
-        conn.close()
+        if not cur.closed:
+            cur.close()
+        scope.depth -= 1
+        if scope.depth == 0 and (not scope.request_scoped or (scope.entry is not None and scope.entry.broken)):
+            _release_scope(scope)
+
+
+def release_request_connection(exception: BaseException | None = None):
+    scope = g.pop("_db_scope", None)
+    if scope is not None:
+        _release_scope(scope)
+
+
+def get_pool_stats() -> dict[str, Any]:
+    return _pool.stats()
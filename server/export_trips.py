@@ -0,0 +1,52 @@
+"""Dump trips to NDJSON, a GeoJSON FeatureCollection or CSV using COPY.
+
+    python export_trips.py trips.ndjson
+    python export_trips.py catalogue.geojson
+    python export_trips.py - --format csv --all > trips.csv
+
+Only public trips are exported unless --all is given. Each trip nests its
+tags, lodgings and activities; rows are rendered by Postgres and written
+straight to the file, so memory stays flat however large the catalogue is.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+from services.export_service import EXPORT_FORMATS, export_trips_to_file
+
+
+def _guess_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in {".geojson", ".json"}:
+        return "geojson"
+    if extension == ".csv":
+        return "csv"
+    return "ndjson"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=EXPORT_FORMATS)
+    parser.add_argument("--all", action="store_true", help="include private and friends-only trips")
+    args = parser.parse_args()
+
+    fmt = args.format or _guess_format(args.path)
+    started = time.perf_counter()
+
+    if args.path == "-":
+        count = export_trips_to_file(sys.stdout.buffer, fmt=fmt, include_private=args.all)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.path, "wb") as file:
+            count = export_trips_to_file(file, fmt=fmt, include_private=args.all)
+
+    print(f"exported {count} trips in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
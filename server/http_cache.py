@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any
+
+from flask import current_app, request
+
+from config import PUBLIC_CACHE_MAX_AGE_SECONDS
+
+
+def not_modified_response(validators: dict[str, Any], *, public: bool):
+    if not request.if_none_match.contains_weak(validators["etag"]):
+        return None
+
+    response = current_app.response_class(status=304)
+    return apply_cache_headers(response, validators, public=public)
+
+
+def apply_cache_headers(response, validators: dict[str, Any], *, public: bool):
+    response.set_etag(validators["etag"])
+    if validators.get("last_modified") is not None:
+        response.last_modified = validators["last_modified"]
+
+    # Anonymous responses may be shared by a CDN but must be revalidated once
+    # stale; anything tied to a session stays in the browser.
+    if public:
+        response.headers["Cache-Control"] = f"public, max-age={PUBLIC_CACHE_MAX_AGE_SECONDS}, must-revalidate"
+    else:
+        response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Cookie")
+    return response
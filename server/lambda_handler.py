@@ -3,9 +3,19 @@ from __future__ import annotations
 import awsgi
 
 from app import create_app
+from services.image_job_service import handle_image_job_messages
 
 flask_app = create_app()
 
+# Compressed bodies are binary and must reach API Gateway base64-encoded.
+BASE64_CONTENT_TYPES = {"application/json", "application/x-ndjson", "application/geo+json", "text/csv"}
+
 
 def handler(event, context):
-    return awsgi.response(flask_app, event, context)
+    # The same image also consumes the image job queue (IMAGE_JOB_QUEUE=sqs);
+    # enable ReportBatchItemFailures on the event source mapping.
+    records = event.get("Records") or []
+    if records and records[0].get("eventSource") == "aws:sqs":
+        return handle_image_job_messages(records)
+
+    return awsgi.response(flask_app, event, context, base64_content_types=BASE64_CONTENT_TYPES)
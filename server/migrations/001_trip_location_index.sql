@@ -0,0 +1,5 @@
+-- Viewport queries on /trips?bbox=... filter with
+--   point(longitude::float8, latitude::float8) <@ box(...)
+-- which the built-in GiST point opclass can serve without PostGIS.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS trips_location_gist
+    ON trips USING gist (point(longitude::float8, latitude::float8));
@@ -0,0 +1,7 @@
+-- /trips/clusters aggregates activity and lodging points with the same
+-- point <@ box filter used for trips.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS activities_location_gist
+    ON activities USING gist (point(longitude::float8, latitude::float8));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS lodgings_location_gist
+    ON lodgings USING gist (point(longitude::float8, latitude::float8));
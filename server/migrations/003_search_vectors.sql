@@ -0,0 +1,29 @@
+-- Full-text search for GET /search. Generated columns keep the vectors in
+-- sync with every write path without application changes (PostgreSQL 12+).
+ALTER TABLE trips
+    ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED;
+
+ALTER TABLE activities
+    ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(location, '') || ' ' || coalesce(address, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED;
+
+ALTER TABLE lodgings
+    ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(address, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS trips_search_gin ON trips USING gin (search_vector);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS activities_search_gin ON activities USING gin (search_vector);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS lodgings_search_gin ON lodgings USING gin (search_vector);
+
+-- Child matches are resolved per page of trip ids.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS activities_trip_id_idx ON activities (trip_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS lodgings_trip_id_idx ON lodgings (trip_id);
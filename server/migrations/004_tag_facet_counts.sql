@@ -0,0 +1,17 @@
+-- Per-tag counts of public trips for GET /tags/facets, maintained by
+-- create_trip (_insert_tags) and delete_trip.
+CREATE TABLE IF NOT EXISTS tag_facet_counts (
+    tag VARCHAR(50) PRIMARY KEY,
+    public_trip_count INT NOT NULL DEFAULT 0
+);
+
+INSERT INTO tag_facet_counts (tag, public_trip_count)
+SELECT tt.tag, count(*)
+FROM trip_tags tt
+JOIN trips t ON t.trip_id = tt.trip_id
+WHERE t.visibility = 'public'
+GROUP BY tt.tag
+ON CONFLICT (tag) DO UPDATE SET public_trip_count = EXCLUDED.public_trip_count;
+
+-- Narrowed facets (selected tags) look trips up by tag.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS trip_tags_tag_idx ON trip_tags (tag, trip_id);
@@ -0,0 +1,103 @@
+-- Content versions behind the ETag / Last-Modified validators. Triggers keep
+-- them current for every write path, including ones that bypass trip_service.
+ALTER TABLE trips
+    ADD COLUMN IF NOT EXISTS revision BIGINT NOT NULL DEFAULT 1,
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+ALTER TABLE travelers
+    ADD COLUMN IF NOT EXISTS profile_version BIGINT NOT NULL DEFAULT 1,
+    ADD COLUMN IF NOT EXISTS profile_updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+-- One row per cached collection; 'trips' versions the whole /trips feed.
+CREATE TABLE IF NOT EXISTS content_revisions (
+    scope VARCHAR(50) PRIMARY KEY,
+    revision BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO content_revisions (scope) VALUES ('trips') ON CONFLICT (scope) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_content_revision() RETURNS trigger AS $$
+BEGIN
+    UPDATE content_revisions
+    SET revision = revision + 1, updated_at = now()
+    WHERE scope = TG_ARGV[0];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Direct edits to a trip row bump its revision; child triggers below bump it explicitly.
+CREATE OR REPLACE FUNCTION touch_trip_revision() RETURNS trigger AS $$
+BEGIN
+    IF NEW.revision = OLD.revision THEN
+        NEW.revision := OLD.revision + 1;
+    END IF;
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_parent_trip_revision() RETURNS trigger AS $$
+BEGIN
+    UPDATE trips
+    SET revision = revision + 1
+    WHERE trip_id = CASE WHEN TG_OP = 'DELETE' THEN OLD.trip_id ELSE NEW.trip_id END;
+    IF TG_OP = 'UPDATE' AND NEW.trip_id <> OLD.trip_id THEN
+        UPDATE trips SET revision = revision + 1 WHERE trip_id = OLD.trip_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trips embed the owner's public profile, so those columns version the feed too.
+CREATE OR REPLACE FUNCTION touch_profile_version() RETURNS trigger AS $$
+BEGIN
+    IF (NEW.name, NEW.bio, NEW.verified, NEW.college, NEW.profile_image_url)
+        IS DISTINCT FROM (OLD.name, OLD.bio, OLD.verified, OLD.college, OLD.profile_image_url) THEN
+        NEW.profile_version := OLD.profile_version + 1;
+        NEW.profile_updated_at := now();
+        UPDATE content_revisions
+        SET revision = revision + 1, updated_at = now()
+        WHERE scope = 'trips';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trips_touch_revision ON trips;
+CREATE TRIGGER trips_touch_revision
+    BEFORE UPDATE ON trips
+    FOR EACH ROW EXECUTE FUNCTION touch_trip_revision();
+
+DROP TRIGGER IF EXISTS trips_bump_feed_revision ON trips;
+CREATE TRIGGER trips_bump_feed_revision
+    AFTER INSERT OR UPDATE OR DELETE ON trips
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_content_revision('trips');
+
+DROP TRIGGER IF EXISTS lodgings_bump_trip_revision ON lodgings;
+CREATE TRIGGER lodgings_bump_trip_revision
+    AFTER INSERT OR UPDATE OR DELETE ON lodgings
+    FOR EACH ROW EXECUTE FUNCTION bump_parent_trip_revision();
+
+DROP TRIGGER IF EXISTS activities_bump_trip_revision ON activities;
+CREATE TRIGGER activities_bump_trip_revision
+    AFTER INSERT OR UPDATE OR DELETE ON activities
+    FOR EACH ROW EXECUTE FUNCTION bump_parent_trip_revision();
+
+DROP TRIGGER IF EXISTS comments_bump_trip_revision ON comments;
+CREATE TRIGGER comments_bump_trip_revision
+    AFTER INSERT OR UPDATE OR DELETE ON comments
+    FOR EACH ROW EXECUTE FUNCTION bump_parent_trip_revision();
+
+DROP TRIGGER IF EXISTS trip_tags_bump_trip_revision ON trip_tags;
+CREATE TRIGGER trip_tags_bump_trip_revision
+    AFTER INSERT OR UPDATE OR DELETE ON trip_tags
+    FOR EACH ROW EXECUTE FUNCTION bump_parent_trip_revision();
+
+DROP TRIGGER IF EXISTS travelers_touch_profile_version ON travelers;
+CREATE TRIGGER travelers_touch_profile_version
+    BEFORE UPDATE ON travelers
+    FOR EACH ROW EXECUTE FUNCTION touch_profile_version();
+
+-- Profile validators aggregate the owner's trips.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS trips_owner_user_id_idx ON trips (owner_user_id);
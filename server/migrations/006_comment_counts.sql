@@ -0,0 +1,35 @@
+-- Denormalized comment totals for trip listings, which only embed the newest
+-- comments. The trigger keeps the count in the same transaction as the write and
+-- replaces the plain revision bump on comments from 005_content_revisions.sql.
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS comment_count INT NOT NULL DEFAULT 0;
+
+UPDATE trips t
+SET comment_count = c.total
+FROM (SELECT trip_id, count(*) AS total FROM comments GROUP BY trip_id) c
+WHERE c.trip_id = t.trip_id;
+
+CREATE OR REPLACE FUNCTION maintain_trip_comment_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE trips
+        SET comment_count = GREATEST(comment_count - 1, 0), revision = revision + 1
+        WHERE trip_id = OLD.trip_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE trips
+        SET comment_count = comment_count + 1, revision = revision + 1
+        WHERE trip_id = NEW.trip_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS comments_bump_trip_revision ON comments;
+DROP TRIGGER IF EXISTS comments_maintain_trip_comment_count ON comments;
+CREATE TRIGGER comments_maintain_trip_comment_count
+    AFTER INSERT OR DELETE OR UPDATE OF trip_id, body ON comments
+    FOR EACH ROW EXECUTE FUNCTION maintain_trip_comment_count();
+
+-- Newest-first keyset paging for GET /trips/<id>/comments and the listing preview.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_trip_created_idx
+    ON comments (trip_id, created_at DESC, comment_id DESC);
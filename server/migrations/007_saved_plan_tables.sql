@@ -0,0 +1,38 @@
+-- Saved activities/lodgings move from travelers.saved_*_ids arrays to join
+-- tables: toggles touch one narrow row instead of rewriting the traveler, rows
+-- disappear with the item they point at, and "how many saved this" is an index scan.
+CREATE TABLE IF NOT EXISTS saved_activities (
+    user_id INT NOT NULL REFERENCES travelers(user_id) ON DELETE CASCADE,
+    activity_id INT NOT NULL REFERENCES activities(activity_id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, activity_id)
+);
+
+CREATE TABLE IF NOT EXISTS saved_lodgings (
+    user_id INT NOT NULL REFERENCES travelers(user_id) ON DELETE CASCADE,
+    lodge_id INT NOT NULL REFERENCES lodgings(lodge_id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, lodge_id)
+);
+
+-- Array order is kept through created_at; ids of items that no longer exist are dropped.
+INSERT INTO saved_activities (user_id, activity_id, created_at)
+SELECT u.user_id, s.activity_id, now() + s.position * interval '1 microsecond'
+FROM travelers u
+CROSS JOIN LATERAL unnest(u.saved_activity_ids) WITH ORDINALITY AS s(activity_id, position)
+JOIN activities a ON a.activity_id = s.activity_id
+ON CONFLICT DO NOTHING;
+
+INSERT INTO saved_lodgings (user_id, lodge_id, created_at)
+SELECT u.user_id, s.lodge_id, now() + s.position * interval '1 microsecond'
+FROM travelers u
+CROSS JOIN LATERAL unnest(u.saved_lodging_ids) WITH ORDINALITY AS s(lodge_id, position)
+JOIN lodgings l ON l.lodge_id = s.lodge_id
+ON CONFLICT DO NOTHING;
+
+-- Reverse lookups (saves per item).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS saved_activities_activity_id_idx ON saved_activities (activity_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS saved_lodgings_lodge_id_idx ON saved_lodgings (lodge_id);
+
+-- travelers.saved_activity_ids / saved_lodging_ids are no longer read or written.
+-- They are left in place for rollback and can be dropped in a later migration.
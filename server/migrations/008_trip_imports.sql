@@ -0,0 +1,24 @@
+-- Bulk trip imports (services/import_service.py). records_processed is the
+-- checkpoint: it moves in the same transaction as each loaded batch, so a
+-- failed or interrupted import resumes after the last committed record.
+CREATE TABLE IF NOT EXISTS trip_imports (
+    import_id SERIAL PRIMARY KEY,
+    owner_user_id INT NOT NULL REFERENCES travelers(user_id) ON DELETE CASCADE,
+    format VARCHAR(20) NOT NULL,
+    source TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    records_processed INT NOT NULL DEFAULT 0,
+    trips_imported INT NOT NULL DEFAULT 0,
+    error_count INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Records rejected by validation (or by the database when loaded one at a time).
+CREATE TABLE IF NOT EXISTS trip_import_errors (
+    import_id INT NOT NULL REFERENCES trip_imports(import_id) ON DELETE CASCADE,
+    record_number INT NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (import_id, record_number)
+);
@@ -0,0 +1,10 @@
+-- Server-side sessions (session_store.py). UNLOGGED skips the WAL for this
+-- write-heavy, disposable data; a crash empties the table and logs everyone out.
+CREATE UNLOGGED TABLE IF NOT EXISTS sessions (
+    session_id VARCHAR(64) PRIMARY KEY,
+    data TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Expired rows are swept in batches, oldest first.
+CREATE INDEX IF NOT EXISTS sessions_expires_at_idx ON sessions (expires_at);
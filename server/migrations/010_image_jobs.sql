@@ -0,0 +1,74 @@
+-- Background image optimization (services/image_job_service.py). Uploads store
+-- the original and insert a job; the worker writes the optimized copy and swaps
+-- original_url for final_url on the owner's rows.
+CREATE TABLE IF NOT EXISTS image_jobs (
+    image_id SERIAL PRIMARY KEY,
+    owner_user_id INT NOT NULL REFERENCES travelers(user_id) ON DELETE CASCADE,
+    content_type VARCHAR(50) NOT NULL,
+    original_key TEXT NOT NULL,
+    original_url TEXT NOT NULL,
+    final_key TEXT,
+    final_url TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS image_jobs_original_url_idx ON image_jobs (original_url);
+
+-- Abandoned-job scan (process_image_jobs.py).
+CREATE INDEX IF NOT EXISTS image_jobs_unfinished_idx
+    ON image_jobs (updated_at)
+    WHERE status IN ('pending', 'processing');
+
+-- A row saved with a placeholder after its job completed gets the final URL.
+-- A row whose trigger ran before the job committed but which committed after
+-- the swap's snapshot still keeps the placeholder; process_image_jobs.py
+-- repeats the swap for recently completed jobs to catch it.
+CREATE OR REPLACE FUNCTION resolve_thumbnail_url() RETURNS trigger AS $$
+BEGIN
+    IF NEW.thumbnail_url IS NOT NULL THEN
+        NEW.thumbnail_url := COALESCE(
+            (SELECT final_url FROM image_jobs WHERE original_url = NEW.thumbnail_url AND status = 'completed'),
+            NEW.thumbnail_url
+        );
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resolve_profile_image_url() RETURNS trigger AS $$
+BEGIN
+    IF NEW.profile_image_url IS NOT NULL THEN
+        NEW.profile_image_url := COALESCE(
+            (SELECT final_url FROM image_jobs WHERE original_url = NEW.profile_image_url AND status = 'completed'),
+            NEW.profile_image_url
+        );
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trips_resolve_thumbnail_url ON trips;
+CREATE TRIGGER trips_resolve_thumbnail_url
+    BEFORE INSERT OR UPDATE OF thumbnail_url ON trips
+    FOR EACH ROW EXECUTE FUNCTION resolve_thumbnail_url();
+
+DROP TRIGGER IF EXISTS lodgings_resolve_thumbnail_url ON lodgings;
+CREATE TRIGGER lodgings_resolve_thumbnail_url
+    BEFORE INSERT OR UPDATE OF thumbnail_url ON lodgings
+    FOR EACH ROW EXECUTE FUNCTION resolve_thumbnail_url();
+
+DROP TRIGGER IF EXISTS activities_resolve_thumbnail_url ON activities;
+CREATE TRIGGER activities_resolve_thumbnail_url
+    BEFORE INSERT OR UPDATE OF thumbnail_url ON activities
+    FOR EACH ROW EXECUTE FUNCTION resolve_thumbnail_url();
+
+-- Fires before travelers_touch_profile_version (triggers run in name order),
+-- so the version bump sees the resolved URL.
+DROP TRIGGER IF EXISTS travelers_resolve_profile_image_url ON travelers;
+CREATE TRIGGER travelers_resolve_profile_image_url
+    BEFORE INSERT OR UPDATE OF profile_image_url ON travelers
+    FOR EACH ROW EXECUTE FUNCTION resolve_profile_image_url();
@@ -0,0 +1,6 @@
+-- Resolution ladder per processed upload (storage_service.generate_image_variants).
+-- variants mirrors the manifest stored next to the images at manifest_url:
+-- [{width, height, url, content_type, bytes}, ...], smallest first.
+ALTER TABLE image_jobs
+    ADD COLUMN IF NOT EXISTS variants JSONB,
+    ADD COLUMN IF NOT EXISTS manifest_url TEXT;
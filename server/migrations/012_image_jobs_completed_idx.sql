@@ -0,0 +1,4 @@
+-- Recently completed jobs, whose URL swap process_image_jobs.py repeats.
+CREATE INDEX IF NOT EXISTS image_jobs_completed_idx
+    ON image_jobs (updated_at)
+    WHERE status = 'completed';
@@ -0,0 +1,175 @@
+-- Replaces the per-row revision triggers from 005_content_revisions.sql and
+-- 006_comment_counts.sql. Each child statement now updates every affected trip
+-- once, and the feed revision is bumped once per transaction at commit instead
+-- of once per trips statement, so concurrent trip writes no longer queue on the
+-- content_revisions row for the length of each other's transactions.
+
+-- The transaction-local setting makes every later call in the same transaction
+-- a no-op; it is rolled back with the transaction (or savepoint) that set it.
+CREATE OR REPLACE FUNCTION bump_content_revision() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('travel_map.bumped_' || TG_ARGV[0], true) IS DISTINCT FROM 'on' THEN
+        PERFORM set_config('travel_map.bumped_' || TG_ARGV[0], 'on', true);
+        UPDATE content_revisions
+        SET revision = revision + 1, updated_at = now()
+        WHERE scope = TG_ARGV[0];
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement level with transition tables (one trigger per event, which
+-- transition tables require). Children cascaded from a deleted trip match no
+-- trips row, so a trip delete no longer updates anything per child.
+CREATE OR REPLACE FUNCTION bump_parent_trip_revisions() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE trips SET revision = revision + 1
+        WHERE trip_id IN (SELECT trip_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE trips SET revision = revision + 1
+        WHERE trip_id IN (SELECT trip_id FROM old_rows);
+    ELSE
+        UPDATE trips SET revision = revision + 1
+        WHERE trip_id IN (SELECT trip_id FROM new_rows UNION SELECT trip_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_trip_comment_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE trips t
+        SET comment_count = t.comment_count + c.delta, revision = t.revision + 1
+        FROM (SELECT trip_id, count(*) AS delta FROM new_rows GROUP BY trip_id) c
+        WHERE t.trip_id = c.trip_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE trips t
+        SET comment_count = GREATEST(t.comment_count - c.delta, 0), revision = t.revision + 1
+        FROM (SELECT trip_id, count(*) AS delta FROM old_rows GROUP BY trip_id) c
+        WHERE t.trip_id = c.trip_id;
+    ELSE
+        UPDATE trips t
+        SET comment_count = GREATEST(t.comment_count + c.delta, 0), revision = t.revision + 1
+        FROM (
+            SELECT trip_id, sum(delta) AS delta
+            FROM (
+                SELECT trip_id, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT trip_id, -1 FROM old_rows
+            ) moved
+            GROUP BY trip_id
+        ) c
+        WHERE t.trip_id = c.trip_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The feed bump moves to a deferred trigger on travelers below.
+CREATE OR REPLACE FUNCTION touch_profile_version() RETURNS trigger AS $$
+BEGIN
+    IF (NEW.name, NEW.bio, NEW.verified, NEW.college, NEW.profile_image_url)
+        IS DISTINCT FROM (OLD.name, OLD.bio, OLD.verified, OLD.college, OLD.profile_image_url) THEN
+        NEW.profile_version := OLD.profile_version + 1;
+        NEW.profile_updated_at := now();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Embedded comments carry the commenter's name, so a rename versions the
+-- trips they commented on.
+CREATE OR REPLACE FUNCTION bump_commented_trip_revisions() RETURNS trigger AS $$
+BEGIN
+    UPDATE trips SET revision = revision + 1
+    WHERE trip_id IN (SELECT trip_id FROM comments WHERE user_id = NEW.user_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trips_bump_feed_revision ON trips;
+CREATE CONSTRAINT TRIGGER trips_bump_feed_revision
+    AFTER INSERT OR UPDATE OR DELETE ON trips
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION bump_content_revision('trips');
+
+DROP TRIGGER IF EXISTS travelers_bump_feed_revision ON travelers;
+CREATE CONSTRAINT TRIGGER travelers_bump_feed_revision
+    AFTER UPDATE ON travelers
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    WHEN (NEW.profile_version IS DISTINCT FROM OLD.profile_version)
+    EXECUTE FUNCTION bump_content_revision('trips');
+
+DROP TRIGGER IF EXISTS travelers_bump_commented_trip_revisions ON travelers;
+CREATE TRIGGER travelers_bump_commented_trip_revisions
+    AFTER UPDATE OF name ON travelers
+    FOR EACH ROW
+    WHEN (NEW.name IS DISTINCT FROM OLD.name)
+    EXECUTE FUNCTION bump_commented_trip_revisions();
+
+DROP TRIGGER IF EXISTS lodgings_bump_trip_revision ON lodgings;
+DROP TRIGGER IF EXISTS lodgings_bump_trip_revision_insert ON lodgings;
+DROP TRIGGER IF EXISTS lodgings_bump_trip_revision_update ON lodgings;
+DROP TRIGGER IF EXISTS lodgings_bump_trip_revision_delete ON lodgings;
+CREATE TRIGGER lodgings_bump_trip_revision_insert
+    AFTER INSERT ON lodgings REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_parent_trip_revisions();
+CREATE TRIGGER lodgings_bump_trip_revision_update
+    AFTER UPDATE ON lodgings REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_parent_trip_revisions();
+CREATE TRIGGER lodgings_bump_trip_revision_delete
+    AFTER DELETE ON lodgings REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_parent_trip_revisions();
+
+DROP TRIGGER IF EXISTS activities_bump_trip_revision ON activities;
+DROP TRIGGER IF EXISTS activities_bump_trip_revision_insert ON activities;
+DROP TRIGGER IF EXISTS activities_bump_trip_revision_update ON activities;
+DROP TRIGGER IF EXISTS activities_bump_trip_revision_delete ON activities;
+CREATE TRIGGER activities_bump_trip_revision_insert
+    AFTER INSERT ON activities REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_parent_trip_revisions();
+CREATE TRIGGER activities_bump_trip_revision_update
+    AFTER UPDATE ON activities REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_parent_trip_revisions();
+CREATE TRIGGER activities_bump_trip_revision_delete
+    AFTER DELETE ON activities REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_parent_trip_revisions();
+
+DROP TRIGGER IF EXISTS trip_tags_bump_trip_revision ON trip_tags;
+DROP TRIGGER IF EXISTS trip_tags_bump_trip_revision_insert ON trip_tags;
+DROP TRIGGER IF EXISTS trip_tags_bump_trip_revision_update ON trip_tags;
+DROP TRIGGER IF EXISTS trip_tags_bump_trip_revision_delete ON trip_tags;
+CREATE TRIGGER trip_tags_bump_trip_revision_insert
+    AFTER INSERT ON trip_tags REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_parent_trip_revisions();
+CREATE TRIGGER trip_tags_bump_trip_revision_update
+    AFTER UPDATE ON trip_tags REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_parent_trip_revisions();
+CREATE TRIGGER trip_tags_bump_trip_revision_delete
+    AFTER DELETE ON trip_tags REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_parent_trip_revisions();
+
+-- Transition tables cannot be combined with a column list, so any comment
+-- update now bumps the trip (previously only trip_id or body changes did).
+DROP TRIGGER IF EXISTS comments_maintain_trip_comment_count ON comments;
+DROP TRIGGER IF EXISTS comments_maintain_trip_comment_count_insert ON comments;
+DROP TRIGGER IF EXISTS comments_maintain_trip_comment_count_update ON comments;
+DROP TRIGGER IF EXISTS comments_maintain_trip_comment_count_delete ON comments;
+CREATE TRIGGER comments_maintain_trip_comment_count_insert
+    AFTER INSERT ON comments REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_trip_comment_counts();
+CREATE TRIGGER comments_maintain_trip_comment_count_update
+    AFTER UPDATE ON comments REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_trip_comment_counts();
+CREATE TRIGGER comments_maintain_trip_comment_count_delete
+    AFTER DELETE ON comments REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_trip_comment_counts();
+
+DROP FUNCTION IF EXISTS bump_parent_trip_revision();
+DROP FUNCTION IF EXISTS maintain_trip_comment_count();
+
+-- Commenter renames look up the trips a traveler commented on.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_user_id_idx ON comments (user_id);
@@ -0,0 +1,25 @@
+-- Bulk imports create each trip and its children in the same batch
+-- transaction, so the child statement triggers from
+-- 013_statement_revision_triggers.sql would only re-update rows that no reader
+-- has seen yet. An import sets travel_map.importing_trips for its batch
+-- transaction (SET LOCAL) and the parent bump is skipped; the deferred feed
+-- bump still fires once per batch.
+CREATE OR REPLACE FUNCTION bump_parent_trip_revisions() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('travel_map.importing_trips', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        UPDATE trips SET revision = revision + 1
+        WHERE trip_id IN (SELECT trip_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE trips SET revision = revision + 1
+        WHERE trip_id IN (SELECT trip_id FROM old_rows);
+    ELSE
+        UPDATE trips SET revision = revision + 1
+        WHERE trip_id IN (SELECT trip_id FROM new_rows UNION SELECT trip_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,57 @@
+"""Run image jobs that were abandoned by their worker.
+
+    python process_image_jobs.py
+    python process_image_jobs.py --stale-seconds 60 --limit 200
+    python process_image_jobs.py --image-id 42
+    python process_image_jobs.py --reswap-seconds 0
+
+Jobs are normally run by the image job queue as soon as they are uploaded.
+A job still pending or processing after --stale-seconds (lost message,
+restarted worker) is claimed and run here, in this process. Suitable for cron.
+
+Each run also repeats the URL swap for jobs completed in the last
+--reswap-seconds, for rows saved while the job was completing; run the script
+at least that often. 0 skips it.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from config import IMAGE_JOB_STALE_SECONDS
+from services.image_job_service import (
+    list_abandoned_image_jobs,
+    process_image_job,
+    reswap_completed_image_jobs,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image-id", type=int, action="append", dest="image_ids")
+    parser.add_argument("--stale-seconds", type=int, default=IMAGE_JOB_STALE_SECONDS)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--reswap-seconds", type=int, default=3600)
+    args = parser.parse_args()
+
+    if args.reswap_seconds > 0:
+        swapped_rows = reswap_completed_image_jobs(within_seconds=args.reswap_seconds)
+        if swapped_rows:
+            print(f"re-swapped {swapped_rows} rows to final image URLs", file=sys.stderr)
+
+    image_ids = args.image_ids or list_abandoned_image_jobs(stale_seconds=args.stale_seconds, limit=args.limit)
+    failed = 0
+    for image_id in image_ids:
+        job = process_image_job(image_id)
+        if job is None:
+            print(f"image {image_id}: not claimable", file=sys.stderr)
+            continue
+        if job["status"] != "completed":
+            failed += 1
+        print(f"image {image_id}: {job['status']}" + (f" ({job['last_error']})" if job["last_error"] else ""), file=sys.stderr)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import codecs
+
+from flask import Blueprint, current_app, jsonify, request, session
+
+from config import ADMIN_USER_IDS
+from services.auth_service import get_authenticated_user
+from services.import_service import (
+    ImportConflictError,
+    ImportNotFoundError,
+    ImportValidationError,
+    create_import,
+    get_import,
+    parse_import_format,
+    run_import,
+)
+from streaming import NDJSON_MIMETYPE
+
+admin_bp = Blueprint("admin", __name__)
+
+
+def _require_admin():
+    user = get_authenticated_user(session)
+    if not user:
+        return None, (jsonify({"error": "authentication required"}), 401)
+    if user["user_id"] not in ADMIN_USER_IDS:
+        return None, (jsonify({"error": "admin access required"}), 403)
+    return user, None
+
+
+def _request_import_format() -> str:
+    value = request.args.get("format")
+    if not value:
+        if request.mimetype == NDJSON_MIMETYPE:
+            value = "ndjson"
+        elif request.mimetype in {"application/geo+json", "application/json"}:
+            value = "geojson"
+    return parse_import_format(value)
+
+
+def _run_import_response(import_id: int, status_code: int):
+    # The body is decoded and consumed as it arrives; large files are better
+    # sent through import_trips.py, which has no request size or time limit.
+    try:
+        run_import(import_id, codecs.getreader("utf-8")(request.stream))
+        return jsonify({"import": get_import(import_id)}), status_code
+    except ImportNotFoundError as error:
+        return jsonify({"error": str(error)}), 404
+    except ImportValidationError as error:
+        return jsonify({"error": str(error), "import": get_import(import_id)}), 400
+    except ImportConflictError as error:
+        return jsonify({"error": str(error), "import": get_import(import_id)}), 409
+    except Exception as error:
+        current_app.logger.exception("Trip import failed")
+        return jsonify({"error": f"trip import failed: {str(error)}", "import": get_import(import_id)}), 500
+
+
+@admin_bp.route("/admin/imports", methods=["POST", "OPTIONS"])
+def create_trip_import():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    user, error_response = _require_admin()
+    if error_response:
+        return error_response
+
+    try:
+        owner_user_id = int(request.args.get("owner_user_id") or user["user_id"])
+    except ValueError:
+        return jsonify({"error": "owner_user_id must be an integer"}), 400
+
+    try:
+        job = create_import(
+            owner_user_id=owner_user_id,
+            fmt=_request_import_format(),
+            source=request.args.get("source"),
+        )
+    except ImportValidationError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        current_app.logger.exception("Create trip import failed")
+        return jsonify({"error": f"create trip import failed: {str(error)}"}), 500
+
+    return _run_import_response(job["import_id"], 201)
+
+
+@admin_bp.route("/admin/imports/<int:import_id>/resume", methods=["POST", "OPTIONS"])
+def resume_trip_import(import_id: int):
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    _, error_response = _require_admin()
+    if error_response:
+        return error_response
+
+    return _run_import_response(import_id, 200)
+
+
+@admin_bp.route("/admin/imports/<int:import_id>", methods=["GET"])
+def get_trip_import(import_id: int):
+    _, error_response = _require_admin()
+    if error_response:
+        return error_response
+
+    try:
+        job = get_import(import_id)
+        if job is None:
+            return jsonify({"error": "import not found"}), 404
+        return jsonify({"import": job}), 200
+    except Exception as error:
+        current_app.logger.exception("Get trip import failed")
+        return jsonify({"error": f"get trip import failed: {str(error)}"}), 500
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
-import bcrypt
 from flask import Blueprint, current_app, jsonify, request, session
 
 from db import get_cursor
-from services.auth_service import get_authenticated_user, get_user_by_email, to_nullable_string
+from services.auth_service import get_authenticated_user, get_user_by_email, to_nullable_string, update_password_hash
+from services.password_service import PasswordHashBusyError, hash_password, verify_password
 
 auth_bp = Blueprint("auth", __name__)
 
 
+def _busy_response(error: PasswordHashBusyError):
+    response = jsonify({"error": f"{str(error)}, please retry"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @auth_bp.route("/create-user", methods=["POST", "OPTIONS"])
 def create_user():
     if request.method == "OPTIONS":
@@ -25,7 +31,7 @@ def create_user():
         if len(password) < 8:
             return jsonify({"error": "password must be at least 8 characters"}), 400
 
-        password_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        password_hash = hash_password(password)
 
         with get_cursor(commit=True) as cur:
             cur.execute("SELECT user_id FROM travelers WHERE email = %s", (email,))
@@ -46,9 +52,12 @@ def create_user():
             return jsonify({"error": "failed to create user"}), 500
 
         user_id = int(created["user_id"])
+        session.pop("profile_version", None)
         session["user_id"] = user_id
 
         return jsonify({"message": "user created", "user_id": user_id, "email": email}), 201
+    except PasswordHashBusyError as error:
+        return _busy_response(error)
     except Exception as error:
         current_app.logger.exception("Create user failed")
         return jsonify({"error": f"create user failed: {str(error)}"}), 500
@@ -71,14 +80,17 @@ def login_user():
         if not user:
             return jsonify({"error": "invalid email or password"}), 401
 
-        password_hash = user.get("password_hash") or ""
-        password_valid = bool(password_hash) and bcrypt.checkpw(
-            password.encode("utf-8"),
-            str(password_hash).encode("utf-8"),
-        )
+        password_hash = str(user.get("password_hash") or "")
+        if not password_hash:
+            return jsonify({"error": "invalid email or password"}), 401
+
+        password_valid, new_password_hash = verify_password(password, password_hash)
         if not password_valid:
             return jsonify({"error": "invalid email or password"}), 401
+        if new_password_hash is not None:
+            update_password_hash(user["user_id"], old_hash=password_hash, new_hash=new_password_hash)
 
+        session.pop("profile_version", None)
         session["user_id"] = user["user_id"]
 
         return (
@@ -98,6 +110,8 @@ def login_user():
             ),
             200,
         )
+    except PasswordHashBusyError as error:
+        return _busy_response(error)
     except Exception as error:
         current_app.logger.exception("Login failed")
         return jsonify({"error": f"login failed: {str(error)}"}), 500
@@ -1,9 +1,18 @@
 from __future__ import annotations
 
-from flask import Blueprint, current_app, jsonify, session
+from flask import Blueprint, current_app, jsonify, request, session
 
 from services.auth_service import get_authenticated_user
-from services.plans_service import get_user_plans, toggle_saved_activity, toggle_saved_lodging
+from services.plans_service import (
+    PlanValidationError,
+    apply_plan_operations,
+    expand_user_plans,
+    get_plan_counts,
+    get_user_plans,
+    parse_plan_ids,
+    toggle_saved_activity,
+    toggle_saved_lodging,
+)
 
 plans_bp = Blueprint("plans", __name__)
 
@@ -16,6 +25,8 @@ def get_plans():
 
     try:
         plans = get_user_plans(user["user_id"])
+        if (request.args.get("expand") or "").strip().lower() in {"1", "true", "yes"}:
+            plans = expand_user_plans(user["user_id"], plans)
         return jsonify(plans), 200
     except Exception as error:
         current_app.logger.exception("Get plans failed")
@@ -31,6 +42,8 @@ def toggle_activity(activity_id: int):
     try:
         plans = toggle_saved_activity(user["user_id"], activity_id)
         return jsonify(plans), 200
+    except PlanValidationError as error:
+        return jsonify({"error": str(error)}), 400
     except Exception as error:
         current_app.logger.exception("Toggle saved activity failed")
         return jsonify({"error": f"toggle activity failed: {str(error)}"}), 500
@@ -45,6 +58,46 @@ def toggle_lodging(lodge_id: int):
     try:
         plans = toggle_saved_lodging(user["user_id"], lodge_id)
         return jsonify(plans), 200
+    except PlanValidationError as error:
+        return jsonify({"error": str(error)}), 400
     except Exception as error:
         current_app.logger.exception("Toggle saved lodging failed")
         return jsonify({"error": f"toggle lodging failed: {str(error)}"}), 500
+
+
+@plans_bp.route("/users/me/plans/batch", methods=["POST", "OPTIONS"])
+def batch_update_plans():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    user = get_authenticated_user(session)
+    if not user:
+        return jsonify({"error": "authentication required"}), 401
+
+    try:
+        payload = request.get_json(silent=True) or {}
+        plans = apply_plan_operations(user["user_id"], payload.get("operations"))
+        return jsonify(plans), 200
+    except PlanValidationError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        current_app.logger.exception("Batch plan update failed")
+        return jsonify({"error": f"batch plan update failed: {str(error)}"}), 500
+
+
+@plans_bp.route("/plans/counts", methods=["GET", "OPTIONS"])
+def plan_counts():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    try:
+        counts = get_plan_counts(
+            activity_ids=parse_plan_ids(request.args.get("activity_ids"), field_name="activity_ids"),
+            lodge_ids=parse_plan_ids(request.args.get("lodge_ids"), field_name="lodge_ids"),
+        )
+        return jsonify(counts), 200
+    except PlanValidationError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        current_app.logger.exception("Plan counts failed")
+        return jsonify({"error": f"plan counts failed: {str(error)}"}), 500
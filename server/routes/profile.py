@@ -1,9 +1,21 @@
 from __future__ import annotations
 
-from flask import Blueprint, current_app, jsonify, request, session
+from flask import Blueprint, current_app, jsonify, request, session, stream_with_context
 
+from http_cache import apply_cache_headers, not_modified_response
 from services.auth_service import get_authenticated_user, to_nullable_string, update_profile
-from services.trip_service import get_user_profile, list_user_trips
+from services.export_service import EXPORT_MIMETYPES, ExportValidationError, iter_user_trip_export, parse_export_format
+from services.revision_service import get_profile_validators
+from services.trip_service import (
+    MAX_TRIP_PAGE_LIMIT,
+    TRIP_PAGE_LIMIT,
+    TripValidationError,
+    get_user_profile,
+    list_user_trips_page,
+    parse_limit,
+    parse_trip_cursor,
+    parse_trip_include,
+)
 
 profile_bp = Blueprint("profile", __name__)
 
@@ -34,6 +46,7 @@ def profile_setup():
             college=college,
             profile_image_url=profile_image_url,
             verified=verified,
+            session=session,
         )
 
         return jsonify({"message": "profile updated", "user": updated_user}), 200
@@ -51,8 +64,45 @@ def my_trips():
     if not user:
         return jsonify({"error": "authentication required"}), 401
 
-    trips = list_user_trips(target_user_id=user["user_id"], viewer_user_id=user["user_id"])
-    return jsonify({"trips": trips}), 200
+    try:
+        include = parse_trip_include(request.args.get("fields"), request.args.get("include"))
+        after_trip_id = parse_trip_cursor(request.args.get("cursor"))
+        limit = None
+        if request.args.get("limit") or after_trip_id is not None:
+            limit = parse_limit(request.args.get("limit"), default=TRIP_PAGE_LIMIT, maximum=MAX_TRIP_PAGE_LIMIT)
+    except TripValidationError as error:
+        return jsonify({"error": str(error)}), 400
+
+    page = list_user_trips_page(
+        target_user_id=user["user_id"],
+        viewer_user_id=user["user_id"],
+        limit=limit,
+        after_trip_id=after_trip_id,
+        include=include,
+    )
+    return jsonify(page), 200
+
+
+@profile_bp.route("/users/me/trips/export", methods=["GET", "OPTIONS"])
+def export_my_trips():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    user = get_authenticated_user(session)
+    if not user:
+        return jsonify({"error": "authentication required"}), 401
+
+    try:
+        fmt = parse_export_format(request.args.get("format"))
+    except ExportValidationError as error:
+        return jsonify({"error": str(error)}), 400
+
+    # Every trip the user owns, whatever its visibility, streamed from a server-side cursor.
+    body = iter_user_trip_export(user["user_id"], fmt)
+    response = current_app.response_class(stream_with_context(body), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="trips.{fmt}"'
+    response.headers["Cache-Control"] = "private, no-store"
+    return response
 
 
 @profile_bp.route("/users/<int:user_id>/profile", methods=["GET", "OPTIONS"])
@@ -64,11 +114,23 @@ def user_profile(user_id: int):
     viewer_user_id = viewer["user_id"] if viewer else None
 
     try:
-        profile = get_user_profile(user_id=user_id, viewer_user_id=viewer_user_id)
+        include = parse_trip_include(request.args.get("fields"), request.args.get("include"), default="summary")
+        validators = get_profile_validators(user_id=user_id, viewer_user_id=viewer_user_id, variant=include)
+        if validators is None:
+            return jsonify({"error": "user not found"}), 404
+
+        public = viewer_user_id is None
+        not_modified = not_modified_response(validators, public=public)
+        if not_modified is not None:
+            return not_modified
+
+        profile = get_user_profile(user_id=user_id, viewer_user_id=viewer_user_id, include=include)
         if not profile:
             return jsonify({"error": "user not found"}), 404
 
-        return jsonify(profile), 200
+        return apply_cache_headers(jsonify(profile), validators, public=public), 200
+    except TripValidationError as error:
+        return jsonify({"error": str(error)}), 400
     except Exception as error:
         current_app.logger.exception("User profile lookup failed")
         return jsonify({"error": f"user profile lookup failed: {str(error)}"}), 500
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from flask import Blueprint, current_app, jsonify, request, session
+
+from services.auth_service import get_authenticated_user
+from services.geo import GeoQueryError, parse_bbox
+from services.search_service import MAX_SEARCH_PAGE_LIMIT, SEARCH_PAGE_LIMIT, search_trips
+from services.tag_service import get_tag_facets, parse_tags
+from services.trip_service import TripValidationError, parse_limit
+
+search_bp = Blueprint("search", __name__)
+
+
+@search_bp.route("/search", methods=["GET", "OPTIONS"])
+def search():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    viewer = get_authenticated_user(session)
+    viewer_user_id = viewer["user_id"] if viewer else None
+
+    try:
+        results = search_trips(
+            viewer_user_id=viewer_user_id,
+            query=request.args.get("q"),
+            tags=request.args.get("tags"),
+            max_cost=request.args.get("max_cost"),
+            duration=request.args.get("duration"),
+            cursor=request.args.get("cursor"),
+            limit=parse_limit(request.args.get("limit"), default=SEARCH_PAGE_LIMIT, maximum=MAX_SEARCH_PAGE_LIMIT),
+        )
+        return jsonify(results), 200
+    except TripValidationError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        current_app.logger.exception("Search failed")
+        return jsonify({"error": f"search failed: {str(error)}"}), 500
+
+
+@search_bp.route("/tags/facets", methods=["GET", "OPTIONS"])
+def tag_facets():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    try:
+        facets = get_tag_facets(
+            bbox=parse_bbox(request.args.get("bbox")),
+            selected_tags=parse_tags(request.args.get("tags")),
+        )
+        return jsonify({"facets": facets}), 200
+    except GeoQueryError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        current_app.logger.exception("Tag facets failed")
+        return jsonify({"error": f"tag facets failed: {str(error)}"}), 500
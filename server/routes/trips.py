@@ -1,9 +1,21 @@
 from __future__ import annotations
 
-from flask import Blueprint, current_app, jsonify, request, session
+from typing import Any
 
+from flask import Blueprint, current_app, jsonify, request, session, stream_with_context
+
+from http_cache import apply_cache_headers, not_modified_response
 from services.auth_service import get_authenticated_user
+from services.cluster_service import list_trip_clusters
+from services.comment_service import COMMENT_PAGE_LIMIT, MAX_COMMENT_PAGE_LIMIT, list_trip_comments
+from services.geo import GeoQueryError, parse_bbox, parse_coordinate, parse_zoom
+from services.nearby_service import list_nearby, parse_k, parse_radius_km
+from services.revision_service import get_feed_validators, get_trip_validators
 from services.trip_service import (
+    MAX_TRIP_PAGE_LIMIT,
+    MAX_VIEWPORT_TRIP_LIMIT,
+    TRIP_PAGE_LIMIT,
+    VIEWPORT_TRIP_LIMIT,
     TripForbiddenError,
     TripNotFoundError,
     TripValidationError,
@@ -12,11 +24,38 @@ from services.trip_service import (
     create_trip,
     delete_trip,
     get_trip,
-    list_trips,
+    get_trips_by_ids,
+    iter_trips,
+    list_trips_page,
+    list_trips_page_json,
+    parse_limit,
+    parse_trip_cursor,
+    parse_trip_engine,
+    parse_trip_ids,
+    parse_trip_include,
 )
+from streaming import NDJSON_MIMETYPE, STREAM_FORMATS, iter_json_document, iter_ndjson
 
 trips_bp = Blueprint("trips", __name__)
 
+
+def _parse_stream_format() -> str | None:
+    value = (request.args.get("stream") or "").strip().lower()
+    if not value:
+        if NDJSON_MIMETYPE in (request.headers.get("Accept") or ""):
+            return "ndjson"
+        return None
+    if value not in STREAM_FORMATS:
+        raise TripValidationError(f"stream must be one of: {', '.join(STREAM_FORMATS)}")
+    return value
+
+
+def _trips_json_response(trips_json: str, extra: dict[str, Any]):
+    # The trips array was serialized by Postgres; splice it in instead of decoding and re-encoding it.
+    body = '{"trips":' + trips_json + "," + current_app.json.dumps(extra)[1:]
+    return current_app.response_class(body, status=200, mimetype="application/json")
+
+
 @trips_bp.route("/trips", methods=["GET", "OPTIONS"])
 def get_trips():
     if request.method == "OPTIONS":
@@ -26,13 +65,168 @@ def get_trips():
     viewer_user_id = viewer["user_id"] if viewer else None
 
     try:
-        trips = list_trips(viewer_user_id=viewer_user_id)
-        return jsonify({"trips": trips}), 200
+        bbox = parse_bbox(request.args.get("bbox"))
+        zoom = parse_zoom(request.args.get("zoom"))
+
+        after_trip_id = parse_trip_cursor(request.args.get("cursor"))
+
+        # Without bbox/limit/cursor the full feed is returned, as older clients expect.
+        limit = None
+        if bbox is not None:
+            limit = parse_limit(request.args.get("limit"), default=VIEWPORT_TRIP_LIMIT, maximum=MAX_VIEWPORT_TRIP_LIMIT)
+        elif request.args.get("limit") or after_trip_id is not None:
+            limit = parse_limit(request.args.get("limit"), default=TRIP_PAGE_LIMIT, maximum=MAX_TRIP_PAGE_LIMIT)
+
+        # Viewport (map) queries default to marker-sized summaries.
+        include = parse_trip_include(
+            request.args.get("fields"),
+            request.args.get("include"),
+            default="summary" if bbox is not None else "full",
+        )
+
+        engine = parse_trip_engine(request.args.get("engine"))
+
+        extra: dict[str, Any] = {}
+        if bbox is not None:
+            extra["bbox"] = list(bbox)
+            extra["zoom"] = zoom
+
+        validators = get_feed_validators(
+            viewer_user_id=viewer_user_id,
+            variant=sorted(request.args.items(multi=True)),
+        )
+        public = viewer_user_id is None
+        not_modified = not_modified_response(validators, public=public)
+        if not_modified is not None:
+            return not_modified
+
+        stream_format = _parse_stream_format()
+        if stream_format is not None:
+            # Streamed listings are never buffered, so the feed cache is bypassed.
+            chunks = iter_trips(
+                viewer_user_id=viewer_user_id,
+                bbox=bbox,
+                limit=limit,
+                after_trip_id=after_trip_id,
+                include=include,
+            )
+            dumps = current_app.json.dumps
+            if stream_format == "ndjson":
+                body, mimetype = iter_ndjson(chunks, dumps), NDJSON_MIMETYPE
+            else:
+                body, mimetype = iter_json_document(chunks, dumps, key="trips", extra=extra), "application/json"
+            response = current_app.response_class(stream_with_context(body), mimetype=mimetype)
+            return apply_cache_headers(response, validators, public=public)
+
+        if engine == "sql":
+            trips_json, next_cursor = list_trips_page_json(
+                viewer_user_id=viewer_user_id,
+                bbox=bbox,
+                limit=limit,
+                after_trip_id=after_trip_id,
+                include=include,
+                revision=validators["revision"],
+            )
+            response = _trips_json_response(trips_json, {"next_cursor": next_cursor, **extra})
+            return apply_cache_headers(response, validators, public=public)
+
+        page = list_trips_page(
+            viewer_user_id=viewer_user_id,
+            bbox=bbox,
+            limit=limit,
+            after_trip_id=after_trip_id,
+            include=include,
+            engine=engine,
+            revision=validators["revision"],
+        )
+        return apply_cache_headers(jsonify({**page, **extra}), validators, public=public), 200
+    except (GeoQueryError, TripValidationError) as error:
+        return jsonify({"error": str(error)}), 400
     except Exception as error:
         current_app.logger.exception("List trips failed")
         return jsonify({"error": f"list trips failed: {str(error)}"}), 500
 
 
+@trips_bp.route("/trips/clusters", methods=["GET", "OPTIONS"])
+def get_trip_clusters():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    viewer = get_authenticated_user(session)
+    viewer_user_id = viewer["user_id"] if viewer else None
+
+    try:
+        bbox = parse_bbox(request.args.get("bbox"))
+        zoom = parse_zoom(request.args.get("zoom"))
+        if bbox is None or zoom is None:
+            return jsonify({"error": "bbox and zoom are required"}), 400
+
+        clusters = list_trip_clusters(viewer_user_id=viewer_user_id, bbox=bbox, zoom=zoom)
+        return jsonify({"clusters": clusters, "bbox": list(bbox), "zoom": zoom}), 200
+    except GeoQueryError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        current_app.logger.exception("List trip clusters failed")
+        return jsonify({"error": f"list trip clusters failed: {str(error)}"}), 500
+
+
+@trips_bp.route("/trips/batch", methods=["GET", "OPTIONS"])
+def get_trips_batch():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    viewer = get_authenticated_user(session)
+    viewer_user_id = viewer["user_id"] if viewer else None
+
+    try:
+        trip_ids = parse_trip_ids(request.args.get("ids"))
+        include = parse_trip_include(request.args.get("fields"), request.args.get("include"))
+        trips = get_trips_by_ids(
+            trip_ids,
+            viewer_user_id,
+            include=include,
+            engine=parse_trip_engine(request.args.get("engine")),
+        )
+
+        # Hidden and deleted trips are indistinguishable here, as with GET /trips/<id>.
+        found = {trip["trip_id"] for trip in trips}
+        return jsonify({"trips": trips, "missing_ids": [trip_id for trip_id in trip_ids if trip_id not in found]}), 200
+    except TripValidationError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        current_app.logger.exception("Batch trip fetch failed")
+        return jsonify({"error": f"batch trip fetch failed: {str(error)}"}), 500
+
+
+@trips_bp.route("/trips/nearby", methods=["GET", "OPTIONS"])
+def get_nearby_trips():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    viewer = get_authenticated_user(session)
+    viewer_user_id = viewer["user_id"] if viewer else None
+
+    try:
+        latitude = parse_coordinate(request.args.get("lat"), field_name="lat", limit=90.0)
+        longitude = parse_coordinate(request.args.get("lng"), field_name="lng", limit=180.0)
+        k = parse_k(request.args.get("k"))
+        radius_km = parse_radius_km(request.args.get("radius_km"))
+
+        results = list_nearby(
+            viewer_user_id=viewer_user_id,
+            latitude=latitude,
+            longitude=longitude,
+            k=k,
+            radius_km=radius_km,
+        )
+        return jsonify({"results": results, "k": k, "radius_km": radius_km}), 200
+    except GeoQueryError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        current_app.logger.exception("Nearby trips failed")
+        return jsonify({"error": f"nearby trips failed: {str(error)}"}), 500
+
+
 @trips_bp.route("/trips/<int:trip_id>", methods=["GET", "OPTIONS"])
 def get_trip_by_id(trip_id: int):
     if request.method == "OPTIONS":
@@ -42,11 +236,20 @@ def get_trip_by_id(trip_id: int):
     viewer_user_id = viewer["user_id"] if viewer else None
 
     try:
+        validators = get_trip_validators(trip_id=trip_id, viewer_user_id=viewer_user_id)
+        if validators is None:
+            return jsonify({"error": "trip not found"}), 404
+
+        public = viewer_user_id is None
+        not_modified = not_modified_response(validators, public=public)
+        if not_modified is not None:
+            return not_modified
+
         trip = get_trip(trip_id=trip_id, viewer_user_id=viewer_user_id)
         if not trip:
             return jsonify({"error": "trip not found"}), 404
 
-        return jsonify({"trip": trip}), 200
+        return apply_cache_headers(jsonify({"trip": trip}), validators, public=public), 200
     except Exception as error:
         current_app.logger.exception("Get trip failed")
         return jsonify({"error": f"get trip failed: {str(error)}"}), 500
@@ -136,3 +339,29 @@ def add_activity_route(trip_id: int):
     except Exception as error:
         current_app.logger.exception("Add activity failed")
         return jsonify({"error": f"add activity failed: {str(error)}"}), 500
+
+
+@trips_bp.route("/trips/<int:trip_id>/comments", methods=["GET", "OPTIONS"])
+def get_trip_comments(trip_id: int):
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    viewer = get_authenticated_user(session)
+    viewer_user_id = viewer["user_id"] if viewer else None
+
+    try:
+        limit = parse_limit(request.args.get("limit"), default=COMMENT_PAGE_LIMIT, maximum=MAX_COMMENT_PAGE_LIMIT)
+        page = list_trip_comments(
+            trip_id=trip_id,
+            viewer_user_id=viewer_user_id,
+            limit=limit,
+            cursor=request.args.get("cursor"),
+        )
+        return jsonify(page), 200
+    except TripValidationError as error:
+        return jsonify({"error": str(error)}), 400
+    except TripNotFoundError as error:
+        return jsonify({"error": str(error)}), 404
+    except Exception as error:
+        current_app.logger.exception("List trip comments failed")
+        return jsonify({"error": f"list trip comments failed: {str(error)}"}), 500
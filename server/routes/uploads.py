@@ -3,7 +3,8 @@ from __future__ import annotations
 from flask import Blueprint, current_app, jsonify, request, session
 
 from services.auth_service import get_authenticated_user
-from services.storage_service import StorageConfigError, StorageValidationError, upload_image_file
+from services.image_job_service import ImageJobNotFoundError, get_image_job, submit_image_upload
+from services.storage_service import StorageConfigError, StorageValidationError
 
 uploads_bp = Blueprint("uploads", __name__)
 
@@ -24,8 +25,11 @@ def upload_image_route():
     folder = str(request.form.get("folder") or "trips")
 
     try:
-        image_url = upload_image_file(file=uploaded_file, folder=folder, owner_user_id=user["user_id"])
-        return jsonify({"url": image_url}), 201
+        image = submit_image_upload(file=uploaded_file, folder=folder, owner_user_id=user["user_id"])
+        # "url" shows the original until processing finishes; saved trips and
+        # profiles are switched to the optimized copy when it does.
+        status_code = 201 if image["status"] == "completed" else 202
+        return jsonify({"url": image["url"], "image": image}), status_code
     except StorageValidationError as error:
         return jsonify({"error": str(error)}), 400
     except StorageConfigError as error:
@@ -34,3 +38,21 @@ def upload_image_route():
     except Exception as error:
         current_app.logger.exception("Image upload failed")
         return jsonify({"error": f"image upload failed: {str(error)}"}), 500
+
+
+@uploads_bp.route("/uploads/images/<int:image_id>", methods=["GET", "OPTIONS"])
+def get_image_route(image_id: int):
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    user = get_authenticated_user(session)
+    if not user:
+        return jsonify({"error": "authentication required"}), 401
+
+    try:
+        return jsonify({"image": get_image_job(image_id, owner_user_id=user["user_id"])}), 200
+    except ImageJobNotFoundError as error:
+        return jsonify({"error": str(error)}), 404
+    except Exception as error:
+        current_app.logger.exception("Fetch image status failed")
+        return jsonify({"error": f"fetch image status failed: {str(error)}"}), 500
@@ -3,7 +3,15 @@ from __future__ import annotations
 from collections.abc import MutableMapping
 from typing import Any
 
+from config import AUTH_USER_CACHE_MAX_ENTRIES, AUTH_USER_CACHE_TTL_SECONDS
 from db import get_cursor
+from services.cache import LRUCache
+
+# Authenticated users by id: {"user": normalized user, "profile_version": int}.
+# The TTL bounds how long another process's profile change or a deleted
+# account can go unnoticed; the session's own profile_version forces a reload
+# as soon as it is newer than the cached entry.
+_user_cache = LRUCache(maxsize=AUTH_USER_CACHE_MAX_ENTRIES, ttl_seconds=AUTH_USER_CACHE_TTL_SECONDS)
 
 
 def to_nullable_string(value: Any) -> str | None:
@@ -53,11 +61,20 @@ def get_user_by_email(email: str) -> dict[str, Any] | None:
     }
 
 
-def get_user_by_id(user_id: int) -> dict[str, Any] | None:
+def update_password_hash(user_id: int, *, old_hash: str, new_hash: str):
+    # Skipped if the password changed since it was read.
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            "UPDATE travelers SET password_hash = %s WHERE user_id = %s AND password_hash = %s",
+            (new_hash, user_id, old_hash),
+        )
+
+
+def _load_session_user(user_id: int) -> dict[str, Any] | None:
     with get_cursor() as cur:
         cur.execute(
             """
-            SELECT user_id, name, email, bio, verified, college, profile_image_url
+            SELECT user_id, name, email, bio, verified, college, profile_image_url, profile_version
             FROM travelers
             WHERE user_id = %s
             LIMIT 1
@@ -69,7 +86,13 @@ def get_user_by_id(user_id: int) -> dict[str, Any] | None:
     if not row:
         return None
 
-    return normalize_user(row)
+    return {"user": normalize_user(row), "profile_version": int(row["profile_version"])}
+
+
+def _remember_profile_version(session: MutableMapping[str, Any], entry: dict[str, Any]):
+    # Only written when it moves, so unchanged sessions are not re-sent.
+    if session.get("profile_version") != entry["profile_version"]:
+        session["profile_version"] = entry["profile_version"]
 
 
 def get_authenticated_user(session: MutableMapping[str, Any]) -> dict[str, Any] | None:
@@ -77,16 +100,35 @@ def get_authenticated_user(session: MutableMapping[str, Any]) -> dict[str, Any]
     if not isinstance(session_user_id, int):
         return None
 
-    user = get_user_by_id(session_user_id)
-    if not user:
-        session.clear()
-        return None
-
-    return user
-
-
-def update_profile(*, user_id: int, bio: str | None, college: str | None, profile_image_url: str | None, verified: bool):
+    entry = _user_cache.get(session_user_id)
+    session_version = session.get("profile_version")
+    if entry is None or (isinstance(session_version, int) and session_version > entry["profile_version"]):
+        entry = _load_session_user(session_user_id)
+        if not entry:
+            _user_cache.delete(session_user_id)
+            session.clear()
+            return None
+        _user_cache.set(session_user_id, entry)
+
+    _remember_profile_version(session, entry)
+    return dict(entry["user"])
+
+
+def get_user_cache_stats() -> dict[str, Any]:
+    return _user_cache.stats()
+
+
+def update_profile(
+    *,
+    user_id: int,
+    bio: str | None,
+    college: str | None,
+    profile_image_url: str | None,
+    verified: bool,
+    session: MutableMapping[str, Any] | None = None,
+):
     with get_cursor(commit=True) as cur:
+        # profile_version is bumped by the travelers trigger (migrations/005_content_revisions.sql).
         cur.execute(
             """
             UPDATE travelers
@@ -95,8 +137,18 @@ def update_profile(*, user_id: int, bio: str | None, college: str | None, profil
                 profile_image_url = %s,
                 verified = %s
             WHERE user_id = %s
+            RETURNING user_id, name, email, bio, verified, college, profile_image_url, profile_version
             """,
             (bio, college, profile_image_url, verified, user_id),
         )
+        row = cur.fetchone()
+
+    if not row:
+        _user_cache.delete(user_id)
+        return None
 
-    return get_user_by_id(user_id)
+    entry = {"user": normalize_user(row), "profile_version": int(row["profile_version"])}
+    _user_cache.set(user_id, entry)
+    if session is not None:
+        _remember_profile_version(session, entry)
+    return dict(entry["user"])
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import json
+import math
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    # max_bytes bounds the sum of the sizes callers pass to set(), on top of maxsize.
+    def __init__(self, *, maxsize: int, ttl_seconds: float | None = None, max_bytes: int | None = None):
+        self.maxsize = max(1, maxsize)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._entries: OrderedDict[Hashable, tuple[float | None, Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            expires_at, value, size = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, *, size: int = 0):
+        expires_at = None
+        if self.ttl_seconds is not None:
+            expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Would evict everything else and still not fit.
+                return
+
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+class MemoryCacheBackend:
+    # Per-process store; the content version only moves when this process writes,
+    # so other workers fall back on the TTL. Values are kept as JSON, like the
+    # redis backend: the encoded length bounds memory, and every read decodes a
+    # fresh copy that callers are free to mutate.
+    def __init__(self, *, maxsize: int, ttl_seconds: float | None = None, max_bytes: int | None = None):
+        self._cache = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        raw = self._cache.get(key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any):
+        raw = json.dumps(value, separators=(",", ":"))
+        self._cache.set(key, raw, size=len(raw))
+
+    def get_version(self) -> int:
+        return self._version
+
+    def bump_version(self) -> int:
+        with self._lock:
+            self._version += 1
+            # Older versions can never be read again, so free them now.
+            self._cache.clear()
+            return self._version
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisCacheBackend:
+    # Works with any client exposing get/set(ex=)/incr, e.g. redis.Redis or a local stand-in.
+    def __init__(self, client, *, prefix: str, ttl_seconds: float | None = None):
+        self._client = client
+        self._prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}:{key}"
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(self._key(key))
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any):
+        # Rounded up: Redis rejects ex=0, which int() makes of any TTL under a second.
+        ttl = max(1, math.ceil(self.ttl_seconds)) if self.ttl_seconds else None
+        self._client.set(self._key(key), json.dumps(value, separators=(",", ":")), ex=ttl)
+
+    def get_version(self) -> int:
+        return int(self._client.get(self._key("version")) or 0)
+
+    def bump_version(self) -> int:
+        return int(self._client.incr(self._key("version")))
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "redis"}
+
+
+class VersionedCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bumps = 0
+
+    def get_or_load(self, key: tuple[Any, ...], load: Callable[[], Any]) -> Any:
+        # The version is read once, before loading, so a write that lands while
+        # the value is being built leaves it under the old version.
+        versioned_key = f"{self.backend.get_version()}:{json.dumps(key, separators=(',', ':'), default=str)}"
+        value = self.backend.get(versioned_key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        if value is None:
+            value = load()
+            self.backend.set(versioned_key, value)
+        return value
+
+    def bump_version(self):
+        self.backend.bump_version()
+        with self._lock:
+            self._bumps += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats = {
+                "version": self.backend.get_version(),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "version_bumps": self._bumps,
+            }
+        return {**self.backend.stats(), **stats}
+
+
+def create_cache_backend(
+    name: str,
+    *,
+    maxsize: int,
+    ttl_seconds: float | None,
+    redis_url: str | None,
+    prefix: str,
+    max_bytes: int | None = None,
+):
+    if name == "memory":
+        return MemoryCacheBackend(maxsize=maxsize, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+    if name == "redis":
+        if not redis_url:
+            raise RuntimeError("a redis URL is required for the redis cache backend")
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("the redis package is required for the redis cache backend")
+        return RedisCacheBackend(redis.Redis.from_url(redis_url), prefix=prefix, ttl_seconds=ttl_seconds)
+    raise RuntimeError(f"unknown cache backend: {name}")
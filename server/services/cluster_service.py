@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+import math
+from typing import Any
+
+from config import CLUSTER_CACHE_MAX_TILES, CLUSTER_CACHE_TTL_SECONDS
+from db import get_cursor
+from services.cache import LRUCache
+from services.geo import MAX_ZOOM, BBox, GeoQueryError, bbox_where_sql, split_bbox
+
+# Tiles are square in degrees (360 / 2**zoom wide, anchored at -180/-90) and
+# each one is split into CLUSTER_GRID x CLUSTER_GRID cells.
+CLUSTER_GRID = 8
+CLUSTER_SAMPLE_TRIP_IDS = 3
+MAX_CLUSTER_TILES = 64
+
+Tile = tuple[int, int, int]
+
+_tile_cache = LRUCache(maxsize=CLUSTER_CACHE_MAX_TILES, ttl_seconds=CLUSTER_CACHE_TTL_SECONDS)
+
+
+def _tile_size(zoom: int) -> float:
+    return 360.0 / (2**zoom)
+
+
+def _tile_index(value: float, origin: float, size: float, count: int) -> int:
+    return min(max(int(math.floor((value - origin) / size)), 0), count - 1)
+
+
+def _tile_counts(zoom: int) -> tuple[int, int]:
+    columns = 2**zoom
+    rows = max(1, math.ceil(180.0 / _tile_size(zoom)))
+    return columns, rows
+
+
+def _tiles_for_bbox(bbox: BBox, zoom: int) -> list[Tile]:
+    size = _tile_size(zoom)
+    columns, rows = _tile_counts(zoom)
+    tiles: list[Tile] = []
+
+    for min_lng, min_lat, max_lng, max_lat in split_bbox(bbox):
+        x_range = range(_tile_index(min_lng, -180.0, size, columns), _tile_index(max_lng, -180.0, size, columns) + 1)
+        y_range = range(_tile_index(min_lat, -90.0, size, rows), _tile_index(max_lat, -90.0, size, rows) + 1)
+        tiles.extend((zoom, x, y) for x in x_range for y in y_range)
+
+    if len(tiles) > MAX_CLUSTER_TILES:
+        raise GeoQueryError("bbox is too large for this zoom level")
+    return tiles
+
+
+def _tile_bbox(tile: Tile) -> BBox:
+    zoom, x, y = tile
+    size = _tile_size(zoom)
+    min_lng = -180.0 + x * size
+    min_lat = -90.0 + y * size
+    return (min_lng, min_lat, min(180.0, min_lng + size), min(90.0, min_lat + size))
+
+
+def _points_sql(
+    visibility_sql: str,
+    visibility_params: tuple[Any, ...],
+    boxes: list[BBox],
+) -> tuple[str, tuple[Any, ...]]:
+    selects: list[str] = []
+    params: list[Any] = []
+
+    for alias, table_sql in (
+        ("t", "trips t"),
+        ("a", "activities a JOIN trips t ON t.trip_id = a.trip_id"),
+        ("l", "lodgings l JOIN trips t ON t.trip_id = l.trip_id"),
+    ):
+        params.extend(visibility_params)
+        box_clauses: list[str] = []
+        for box in boxes:
+            box_sql, box_params = bbox_where_sql(alias, box)
+            box_clauses.append(box_sql)
+            params.extend(box_params)
+
+        selects.append(
+            f"""
+            SELECT t.trip_id, {alias}.longitude::float8 AS lng, {alias}.latitude::float8 AS lat
+            FROM {table_sql}
+            WHERE {visibility_sql} AND ({" OR ".join(box_clauses)})
+            """
+        )
+
+    return " UNION ALL ".join(selects), tuple(params)
+
+
+def _query_cells(
+    *,
+    zoom: int,
+    visibility_sql: str,
+    visibility_params: tuple[Any, ...],
+    boxes: list[BBox],
+) -> list[dict[str, Any]]:
+    cell_size = _tile_size(zoom) / CLUSTER_GRID
+    columns, rows = _tile_counts(zoom)
+    points_sql, points_params = _points_sql(visibility_sql, visibility_params, boxes)
+
+    params: tuple[Any, ...] = (
+        cell_size,
+        columns * CLUSTER_GRID - 1,
+        cell_size,
+        rows * CLUSTER_GRID - 1,
+        CLUSTER_SAMPLE_TRIP_IDS,
+    )
+    params += points_params
+
+    with get_cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT
+                LEAST(floor((p.lng + 180) / %s)::int, %s) AS cell_x,
+                LEAST(floor((p.lat + 90) / %s)::int, %s) AS cell_y,
+                count(*) AS point_count,
+                count(DISTINCT p.trip_id) AS trip_count,
+                avg(p.lng) AS longitude,
+                avg(p.lat) AS latitude,
+                (array_agg(DISTINCT p.trip_id ORDER BY p.trip_id DESC))[1:%s] AS trip_ids
+            FROM ({points_sql}) p
+            GROUP BY 1, 2
+            """,
+            params,
+        )
+        rows_out = cur.fetchall()
+
+    return [
+        {
+            "cell_x": int(row["cell_x"]),
+            "cell_y": int(row["cell_y"]),
+            "count": int(row["point_count"]),
+            "trip_count": int(row["trip_count"]),
+            "longitude": float(row["longitude"]),
+            "latitude": float(row["latitude"]),
+            "trip_ids": [int(trip_id) for trip_id in row["trip_ids"] or []],
+        }
+        for row in rows_out
+    ]
+
+
+def _cell_tile(zoom: int, cell: dict[str, Any]) -> Tile:
+    return (zoom, cell["cell_x"] // CLUSTER_GRID, cell["cell_y"] // CLUSTER_GRID)
+
+
+def _public_cells_for_tiles(zoom: int, tiles: list[Tile]) -> list[dict[str, Any]]:
+    cells: list[dict[str, Any]] = []
+    missing: list[Tile] = []
+
+    for tile in tiles:
+        cached = _tile_cache.get(tile)
+        if cached is None:
+            missing.append(tile)
+        else:
+            cells.extend(cached)
+
+    if missing:
+        fresh_by_tile: dict[Tile, list[dict[str, Any]]] = {tile: [] for tile in missing}
+        for cell in _query_cells(
+            zoom=zoom,
+            visibility_sql="t.visibility = 'public'",
+            visibility_params=tuple(),
+            boxes=[_tile_bbox(tile) for tile in missing],
+        ):
+            # Points on a shared tile edge match both boxes; the cell index decides the owner.
+            tile_cells = fresh_by_tile.get(_cell_tile(zoom, cell))
+            if tile_cells is not None:
+                tile_cells.append(cell)
+
+        for tile, tile_cells in fresh_by_tile.items():
+            _tile_cache.set(tile, tile_cells)
+            cells.extend(tile_cells)
+
+    return cells
+
+
+def _merge_cells(cells: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    merged: dict[tuple[int, int], dict[str, Any]] = {}
+
+    for cell in cells:
+        key = (cell["cell_x"], cell["cell_y"])
+        current = merged.get(key)
+        if current is None:
+            merged[key] = dict(cell)
+            continue
+
+        total = current["count"] + cell["count"]
+        current["longitude"] = (current["longitude"] * current["count"] + cell["longitude"] * cell["count"]) / total
+        current["latitude"] = (current["latitude"] * current["count"] + cell["latitude"] * cell["count"]) / total
+        current["count"] = total
+        current["trip_count"] += cell["trip_count"]
+        current["trip_ids"] = sorted(set(current["trip_ids"]) | set(cell["trip_ids"]), reverse=True)[
+            :CLUSTER_SAMPLE_TRIP_IDS
+        ]
+
+    return list(merged.values())
+
+
+def list_trip_clusters(*, viewer_user_id: int | None, bbox: BBox, zoom: int) -> list[dict[str, Any]]:
+    tiles = _tiles_for_bbox(bbox, zoom)
+    cells = _public_cells_for_tiles(zoom, tiles)
+
+    if viewer_user_id is not None:
+        # Only the shared public layer is cached; a viewer's own non-public trips are layered on top.
+        cells.extend(
+            _query_cells(
+                zoom=zoom,
+                visibility_sql="t.owner_user_id = %s AND t.visibility <> 'public'",
+                visibility_params=(viewer_user_id,),
+                boxes=[_tile_bbox(tile) for tile in tiles],
+            )
+        )
+
+    cell_size = _tile_size(zoom) / CLUSTER_GRID
+    clusters = []
+    for cell in _merge_cells(cells):
+        min_lng = -180.0 + cell["cell_x"] * cell_size
+        min_lat = -90.0 + cell["cell_y"] * cell_size
+        clusters.append(
+            {
+                "count": cell["count"],
+                "trip_count": cell["trip_count"],
+                "latitude": cell["latitude"],
+                "longitude": cell["longitude"],
+                "trip_ids": cell["trip_ids"],
+                "bounds": [min_lng, min_lat, min_lng + cell_size, min_lat + cell_size],
+            }
+        )
+
+    clusters.sort(key=lambda cluster: cluster["count"], reverse=True)
+    return clusters
+
+
+def invalidate_cluster_points(points: Iterable[tuple[Any, Any]]):
+    for longitude, latitude in points:
+        if longitude is None or latitude is None:
+            continue
+
+        lng = float(longitude)
+        lat = float(latitude)
+        for zoom in range(MAX_ZOOM + 1):
+            size = _tile_size(zoom)
+            columns, rows = _tile_counts(zoom)
+            _tile_cache.delete((zoom, _tile_index(lng, -180.0, size, columns), _tile_index(lat, -90.0, size, rows)))
+
+
+def clear_cluster_cache():
+    _tile_cache.clear()
+
+
+def get_cluster_cache_stats() -> dict[str, Any]:
+    return _tile_cache.stats()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from db import get_cursor
+from services.trip_service import (
+    TripNotFoundError,
+    TripValidationError,
+    decode_cursor,
+    encode_cursor,
+    visible_trips_where,
+)
+
+COMMENT_PAGE_LIMIT = 20
+MAX_COMMENT_PAGE_LIMIT = 100
+
+
+def _parse_comment_cursor(value: Any) -> tuple[datetime | None, int] | None:
+    payload = decode_cursor(value)
+    if payload is None:
+        return None
+
+    comment_id = payload.get("comment_id")
+    created_at = payload.get("created_at")
+    if not isinstance(comment_id, int) or isinstance(comment_id, bool) or "created_at" not in payload:
+        raise TripValidationError("cursor is invalid")
+    if created_at is None:
+        return None, comment_id
+    if not isinstance(created_at, str):
+        raise TripValidationError("cursor is invalid")
+    try:
+        return datetime.fromisoformat(created_at), comment_id
+    except ValueError:
+        raise TripValidationError("cursor is invalid")
+
+
+def list_trip_comments(
+    *,
+    trip_id: int,
+    viewer_user_id: int | None,
+    limit: int = COMMENT_PAGE_LIMIT,
+    cursor: Any = None,
+) -> dict[str, Any]:
+    after = _parse_comment_cursor(cursor)
+    visibility_sql, visibility_params = visible_trips_where(viewer_user_id)
+
+    with get_cursor() as cur:
+        cur.execute(
+            f"SELECT t.comment_count FROM trips t WHERE t.trip_id = %s AND {visibility_sql}",
+            (trip_id,) + visibility_params,
+        )
+        trip_row = cur.fetchone()
+        if not trip_row:
+            raise TripNotFoundError("trip not found")
+
+        keyset_sql = ""
+        params: tuple[Any, ...] = (trip_id,)
+        if after is not None:
+            after_created_at, after_comment_id = after
+            # created_at DESC puts NULLs first, so a cursor on one continues
+            # through the remaining NULLs and then every dated comment.
+            if after_created_at is None:
+                keyset_sql = "AND (c.created_at IS NOT NULL OR c.comment_id < %s)"
+                params += (after_comment_id,)
+            else:
+                keyset_sql = "AND (c.created_at, c.comment_id) < (%s, %s)"
+                params += after
+
+        cur.execute(
+            f"""
+            SELECT c.comment_id, c.user_id, c.trip_id, c.body, c.created_at, u.name AS user_name
+            FROM comments c
+            JOIN travelers u ON u.user_id = c.user_id
+            WHERE c.trip_id = %s {keyset_sql}
+            ORDER BY c.created_at DESC, c.comment_id DESC
+            LIMIT %s
+            """,
+            params + (limit + 1,),
+        )
+        rows = cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        last_created_at = last["created_at"].isoformat() if last.get("created_at") else None
+        next_cursor = encode_cursor({"created_at": last_created_at, "comment_id": int(last["comment_id"])})
+
+    return {
+        "comments": [
+            {
+                "comment_id": int(row["comment_id"]),
+                "user_id": int(row["user_id"]),
+                "trip_id": int(row["trip_id"]),
+                "body": row.get("body") or "",
+                "created_at": row["created_at"].isoformat() if row.get("created_at") else None,
+                "user_name": row.get("user_name"),
+            }
+            for row in rows
+        ],
+        "comment_count": int(trip_row["comment_count"]),
+        "next_cursor": next_cursor,
+    }
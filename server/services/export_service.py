@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import Any, BinaryIO
+
+from config import EXPORT_FETCH_SIZE
+from db import get_cursor
+from services.auth_service import to_nullable_string
+from services.trip_service import trip_documents_sql
+from streaming import NDJSON_MIMETYPE, iter_ndjson
+
+EXPORT_FORMATS = ("ndjson", "geojson", "csv")
+EXPORT_MIMETYPES = {
+    "ndjson": NDJSON_MIMETYPE,
+    "geojson": "application/geo+json",
+    "csv": "text/csv",
+}
+
+# Comments are other travelers' content and stay out of exports; comment_count is kept.
+EXPORT_INCLUDE = ("tags", "lodgings", "activities")
+
+# Child collections are nested in CSV as JSON arrays.
+CSV_COLUMNS = (
+    "trip_id",
+    "title",
+    "description",
+    "latitude",
+    "longitude",
+    "cost",
+    "duration",
+    "date",
+    "visibility",
+    "thumbnail_url",
+    "owner_user_id",
+    "comment_count",
+    "tags",
+    "lodgings",
+    "activities",
+)
+
+_FEATURE_COLLECTION_START = '{"type":"FeatureCollection","features":[\n'
+_FEATURE_COLLECTION_END = "]}\n"
+
+
+class ExportValidationError(ValueError):
+    pass
+
+
+def parse_export_format(value: Any) -> str:
+    candidate = (to_nullable_string(value) or "ndjson").lower()
+    if candidate not in EXPORT_FORMATS:
+        raise ExportValidationError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return candidate
+
+
+def _line_sql(fmt: str, where_sql: str) -> str:
+    # Every format is one text line per trip rendered by Postgres, so streaming
+    # it is string concatenation rather than building and encoding dicts.
+    documents_sql = trip_documents_sql(where_sql, include=EXPORT_INCLUDE)
+
+    if fmt == "ndjson":
+        line_sql = "docs.doc::text"
+    elif fmt == "geojson":
+        line_sql = """json_build_object(
+                'type', 'Feature',
+                'geometry', CASE
+                    WHEN docs.doc->>'latitude' IS NULL OR docs.doc->>'longitude' IS NULL THEN NULL
+                    ELSE json_build_object(
+                        'type', 'Point',
+                        'coordinates', json_build_array((docs.doc->>'longitude')::float8, (docs.doc->>'latitude')::float8)
+                    )
+                END,
+                'properties', docs.doc
+            )::text"""
+    else:
+        fields = ", ".join(
+            f"""COALESCE('"' || replace(docs.doc->>'{column}', '"', '""') || '"', '')""" for column in CSV_COLUMNS
+        )
+        line_sql = f"concat_ws(',', {fields})"
+
+    return f"""
+        SELECT {line_sql} AS line
+        FROM ({documents_sql}) docs
+        ORDER BY docs.trip_id DESC
+    """
+
+
+def _iter_line_chunks(fmt: str, where_sql: str, params: tuple[Any, ...], *, fetch_size: int) -> Iterator[list[str]]:
+    with get_cursor(name="trip_export") as cur:
+        cur.itersize = fetch_size
+        cur.execute(_line_sql(fmt, where_sql), params)
+        while True:
+            rows = cur.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield [row["line"] for row in rows]
+
+
+def _iter_export(
+    fmt: str,
+    where_sql: str,
+    params: tuple[Any, ...],
+    *,
+    fetch_size: int = EXPORT_FETCH_SIZE,
+) -> Iterator[str]:
+    chunks = _iter_line_chunks(fmt, where_sql, params, fetch_size=fetch_size)
+
+    if fmt == "geojson":
+        yield _FEATURE_COLLECTION_START
+        first = True
+        for lines in chunks:
+            body = ",\n".join(lines)
+            yield body if first else ",\n" + body
+            first = False
+        yield "\n" + _FEATURE_COLLECTION_END
+        return
+
+    if fmt == "csv":
+        yield ",".join(CSV_COLUMNS) + "\n"
+    yield from iter_ndjson(chunks, str)
+
+
+def iter_user_trip_export(user_id: int, fmt: str) -> Iterator[str]:
+    return _iter_export(fmt, "t.owner_user_id = %s", (user_id,))
+
+
+class _CopyWriter:
+    # COPY TO STDOUT hands write() one row at a time.
+    def __init__(self, file: BinaryIO, *, separator: bytes = b""):
+        self.file = file
+        self.separator = separator
+        self.rows = 0
+
+    def write(self, data: bytes):
+        if self.rows and self.separator:
+            self.file.write(self.separator)
+        self.file.write(data)
+        self.rows += 1
+
+
+def export_trips_to_file(file: BinaryIO, *, fmt: str, include_private: bool = False) -> int:
+    where_sql = "TRUE" if include_private else "t.visibility = 'public'"
+
+    if fmt == "csv":
+        columns = ", ".join(f"docs.doc->>'{column}' AS {column}" for column in CSV_COLUMNS)
+        query = f"""
+            COPY (
+                SELECT {columns}
+                FROM ({trip_documents_sql(where_sql, include=EXPORT_INCLUDE)}) docs
+                ORDER BY docs.trip_id DESC
+            ) TO STDOUT WITH (FORMAT csv, HEADER)
+        """
+        writer = _CopyWriter(file)
+        with get_cursor() as cur:
+            cur.copy_expert(query, writer)
+        return max(writer.rows - 1, 0)
+
+    # CSV mode with delimiter and quote bytes that JSON always escapes writes
+    # each line unaltered; text mode would double every backslash.
+    query = f"COPY ({_line_sql(fmt, where_sql)}) TO STDOUT WITH (FORMAT csv, DELIMITER E'\\x1f', QUOTE E'\\x1e')"
+    writer = _CopyWriter(file, separator=b"," if fmt == "geojson" else b"")
+
+    if fmt == "geojson":
+        file.write(_FEATURE_COLLECTION_START.encode("utf-8"))
+    with get_cursor() as cur:
+        cur.copy_expert(query, writer)
+    if fmt == "geojson":
+        file.write(_FEATURE_COLLECTION_END.encode("utf-8"))
+    return writer.rows
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+MAX_ZOOM = 22
+EARTH_RADIUS_KM = 6371.0088
+
+BBox = tuple[float, float, float, float]
+
+
+class GeoQueryError(ValueError):
+    pass
+
+
+def location_point_sql(alias: str) -> str:
+    # Must match the expression used by the *_location_gist indexes.
+    return f"point({alias}.longitude::float8, {alias}.latitude::float8)"
+
+
+def _wrap_longitude(value: float) -> float:
+    if -180.0 <= value <= 180.0:
+        return value
+    return ((value + 180.0) % 360.0) - 180.0
+
+
+def _parse_float(value: Any, *, field_name: str) -> float:
+    try:
+        parsed = float(str(value).strip())
+    except (TypeError, ValueError):
+        raise GeoQueryError(f"{field_name} must be a valid number")
+    if not math.isfinite(parsed):
+        raise GeoQueryError(f"{field_name} must be a valid number")
+    return parsed
+
+
+def parse_bbox(value: Any) -> BBox | None:
+    if value is None or not str(value).strip():
+        return None
+
+    parts = [part.strip() for part in str(value).split(",")]
+    if len(parts) != 4:
+        raise GeoQueryError("bbox must be minLng,minLat,maxLng,maxLat")
+
+    min_lng, min_lat, max_lng, max_lat = (_parse_float(part, field_name="bbox") for part in parts)
+
+    if min_lat > max_lat:
+        raise GeoQueryError("bbox minLat must not exceed maxLat")
+    min_lat = max(-90.0, min_lat)
+    max_lat = min(90.0, max_lat)
+
+    if max_lng - min_lng >= 360.0:
+        return (-180.0, min_lat, 180.0, max_lat)
+
+    # A wrapped viewport ends up with min_lng > max_lng, which marks an antimeridian crossing.
+    return (_wrap_longitude(min_lng), min_lat, _wrap_longitude(max_lng), max_lat)
+
+
+def parse_zoom(value: Any) -> int | None:
+    if value is None or not str(value).strip():
+        return None
+
+    try:
+        zoom = int(float(str(value).strip()))
+    except (ValueError, OverflowError):
+        raise GeoQueryError("zoom must be a number")
+
+    if zoom < 0 or zoom > MAX_ZOOM:
+        raise GeoQueryError(f"zoom must be between 0 and {MAX_ZOOM}")
+    return zoom
+
+
+def split_bbox(bbox: BBox) -> list[BBox]:
+    min_lng, min_lat, max_lng, max_lat = bbox
+    if min_lng <= max_lng:
+        return [bbox]
+    return [(min_lng, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lng, max_lat)]
+
+
+def bbox_where_sql(alias: str, bbox: BBox) -> tuple[str, tuple[Any, ...]]:
+    point_sql = location_point_sql(alias)
+    clauses: list[str] = []
+    params: list[Any] = []
+
+    for min_lng, min_lat, max_lng, max_lat in split_bbox(bbox):
+        clauses.append(f"{point_sql} <@ box(point(%s, %s), point(%s, %s))")
+        params.extend([min_lng, min_lat, max_lng, max_lat])
+
+    if len(clauses) == 1:
+        return clauses[0], tuple(params)
+    return "(" + " OR ".join(clauses) + ")", tuple(params)
+
+
+def parse_coordinate(value: Any, *, field_name: str, limit: float) -> float:
+    if value is None or not str(value).strip():
+        raise GeoQueryError(f"{field_name} is required")
+    coordinate = _parse_float(value, field_name=field_name)
+    if coordinate < -limit or coordinate > limit:
+        raise GeoQueryError(f"{field_name} must be between {-limit:g} and {limit:g}")
+    return coordinate
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> BBox:
+    # Smallest lat/lng box containing the spherical cap, so the GiST index can
+    # prefilter before exact distances are computed.
+    angular = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular)
+    min_lat = latitude - delta_lat
+    max_lat = latitude + delta_lat
+    if min_lat <= -90.0 or max_lat >= 90.0 or angular >= math.pi / 2:
+        return (-180.0, max(-90.0, min_lat), 180.0, min(90.0, max_lat))
+
+    delta_lng = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(math.radians(latitude)))))
+    if delta_lng >= 180.0:
+        return (-180.0, min_lat, 180.0, max_lat)
+    return (_wrap_longitude(longitude - delta_lng), min_lat, _wrap_longitude(longitude + delta_lng), max_lat)
+
+
+def haversine_km_sql(alias: str) -> str:
+    # Expects (latitude, latitude, longitude) params for the origin, in that order.
+    lat = f"radians({alias}.latitude::float8)"
+    lng = f"radians({alias}.longitude::float8)"
+    return (
+        f"2 * {EARTH_RADIUS_KM} * asin(sqrt(least(1.0,"
+        f" power(sin(({lat} - radians(%s)) / 2), 2)"
+        f" + cos(radians(%s)) * cos({lat}) * power(sin(({lng} - radians(%s)) / 2), 2))))"
+    )
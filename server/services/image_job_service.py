@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import threading
+import time
+from typing import Any
+
+import boto3
+from werkzeug.datastructures import FileStorage
+
+from config import (
+    AWS_REGION,
+    IMAGE_JOB_MAX_ATTEMPTS,
+    IMAGE_JOB_QUEUE,
+    IMAGE_JOB_QUEUE_URL,
+    IMAGE_JOB_STALE_SECONDS,
+    IMAGE_JOB_WORKERS,
+)
+from db import get_cursor
+from services.storage_service import (
+    StorageValidationError,
+    delete_original_image,
+    generate_image_variants,
+    read_original_image,
+    store_image_variants,
+    upload_original_image,
+)
+from services.trip_service import invalidate_all_trip_content
+
+IMAGE_JOB_QUEUES = ("local", "sqs")
+
+_IMAGE_JOB_COLUMNS_SQL = """
+    image_id, owner_user_id, content_type, original_key, original_url, final_key,
+    final_url, variants, manifest_url, status, attempts, last_error, created_at, updated_at
+"""
+
+# Moves the owner's rows from job.original_url to job.final_url; "job" is a CTE
+# defined by the statement this is spliced into.
+_SWAP_IMAGE_URLS_SQL = """
+    swapped_trips AS (
+        UPDATE trips t
+        SET thumbnail_url = job.final_url
+        FROM job
+        WHERE t.owner_user_id = job.owner_user_id AND t.thumbnail_url = job.original_url
+        RETURNING t.trip_id
+    ),
+    swapped_lodgings AS (
+        UPDATE lodgings l
+        SET thumbnail_url = job.final_url
+        FROM job, trips t
+        WHERE t.owner_user_id = job.owner_user_id
+          AND l.trip_id = t.trip_id
+          AND l.thumbnail_url = job.original_url
+        RETURNING l.lodge_id
+    ),
+    swapped_activities AS (
+        UPDATE activities a
+        SET thumbnail_url = job.final_url
+        FROM job, trips t
+        WHERE t.owner_user_id = job.owner_user_id
+          AND a.trip_id = t.trip_id
+          AND a.thumbnail_url = job.original_url
+        RETURNING a.activity_id
+    ),
+    swapped_profiles AS (
+        UPDATE travelers u
+        SET profile_image_url = job.final_url
+        FROM job
+        WHERE u.user_id = job.owner_user_id AND u.profile_image_url = job.original_url
+        RETURNING u.user_id
+    )
+"""
+
+_SWAPPED_ROWS_SQL = """
+    (SELECT count(*) FROM swapped_trips)
+        + (SELECT count(*) FROM swapped_lodgings)
+        + (SELECT count(*) FROM swapped_activities)
+        + (SELECT count(*) FROM swapped_profiles)
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class ImageJobNotFoundError(LookupError):
+    pass
+
+
+_stats_lock = threading.Lock()
+_stats = {"enqueued": 0, "completed": 0, "retried": 0, "failed": 0, "ms_total": 0.0}
+
+
+def _record(key: str, started: float | None = None):
+    with _stats_lock:
+        _stats[key] += 1
+        if started is not None:
+            _stats["ms_total"] += (time.perf_counter() - started) * 1000
+
+
+def _serialize_image_job(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "image_id": int(row["image_id"]),
+        "status": row["status"],
+        # The presigned original stands in until the optimized copy exists.
+        "url": row.get("final_url") or row["original_url"],
+        "original_url": row["original_url"],
+        "final_url": row.get("final_url"),
+        # Smallest first; null until processing completes (and for GIFs).
+        "variants": row.get("variants"),
+        "manifest_url": row.get("manifest_url"),
+        "attempts": int(row["attempts"]),
+        "last_error": row.get("last_error"),
+        "created_at": row["created_at"].isoformat() if row.get("created_at") else None,
+        "updated_at": row["updated_at"].isoformat() if row.get("updated_at") else None,
+    }
+
+
+def submit_image_upload(*, file: FileStorage, folder: str, owner_user_id: int) -> dict[str, Any]:
+    original = upload_original_image(file=file, folder=folder, owner_user_id=owner_user_id)
+    # GIFs were never re-encoded, so they are final as uploaded.
+    done = original["content_type"] == "image/gif"
+
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            f"""
+            INSERT INTO image_jobs (
+                owner_user_id, content_type, original_key, original_url, final_key, final_url, status
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            RETURNING {_IMAGE_JOB_COLUMNS_SQL}
+            """,
+            (
+                owner_user_id,
+                original["content_type"],
+                original["key"],
+                original["url"],
+                original["key"] if done else None,
+                original["url"] if done else None,
+                "completed" if done else "pending",
+            ),
+        )
+        row = cur.fetchone()
+
+    job = _serialize_image_job(row)
+    if not done:
+        enqueue_image_job(job["image_id"])
+    return job
+
+
+def get_image_job(image_id: int, *, owner_user_id: int) -> dict[str, Any]:
+    with get_cursor() as cur:
+        cur.execute(
+            f"SELECT {_IMAGE_JOB_COLUMNS_SQL} FROM image_jobs WHERE image_id = %s AND owner_user_id = %s",
+            (image_id, owner_user_id),
+        )
+        row = cur.fetchone()
+
+    if not row:
+        raise ImageJobNotFoundError("image not found")
+    return _serialize_image_job(row)
+
+
+def _claim_image_job(image_id: int) -> dict[str, Any] | None:
+    # A job another worker is still processing is left alone unless it went stale,
+    # so duplicate queue deliveries do the work once.
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            f"""
+            UPDATE image_jobs
+            SET status = 'processing', attempts = attempts + 1, updated_at = now()
+            WHERE image_id = %s
+              AND (
+                  status = 'pending'
+                  OR (status = 'processing' AND updated_at < now() - make_interval(secs => %s))
+              )
+            RETURNING {_IMAGE_JOB_COLUMNS_SQL}
+            """,
+            (image_id, IMAGE_JOB_STALE_SECONDS),
+        )
+        return cur.fetchone()
+
+
+def _complete_image_job(image_id: int, stored: dict[str, Any]) -> dict[str, Any] | None:
+    # The job and every row of the owner's that still shows the original move
+    # to the final URL in one transaction. The triggers from migration 010 cover
+    # rows saved after it commits; a row saved while it runs can still keep the
+    # original (see reswap_completed_image_jobs).
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            f"""
+            WITH job AS (
+                UPDATE image_jobs
+                SET status = 'completed',
+                    final_key = %s,
+                    final_url = %s,
+                    variants = %s::jsonb,
+                    manifest_url = %s,
+                    last_error = NULL,
+                    updated_at = now()
+                WHERE image_id = %s AND status = 'processing'
+                RETURNING {_IMAGE_JOB_COLUMNS_SQL}
+            ),
+            {_SWAP_IMAGE_URLS_SQL}
+            SELECT job.*, {_SWAPPED_ROWS_SQL} AS swapped_rows
+            FROM job
+            """,
+            (
+                stored["final_key"],
+                stored["final_url"],
+                json.dumps(stored["variants"], separators=(",", ":")),
+                stored["manifest_url"],
+                image_id,
+            ),
+        )
+        row = cur.fetchone()
+
+    if row and row["swapped_rows"]:
+        invalidate_all_trip_content()
+    return row
+
+
+def _set_image_job_status(image_id: int, status: str, *, last_error: str | None) -> dict[str, Any] | None:
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            f"""
+            UPDATE image_jobs
+            SET status = %s, last_error = %s, updated_at = now()
+            WHERE image_id = %s AND status = 'processing'
+            RETURNING {_IMAGE_JOB_COLUMNS_SQL}
+            """,
+            (status, last_error, image_id),
+        )
+        return cur.fetchone()
+
+
+def _delete_original(job: dict[str, Any]):
+    # Best effort; an originals/ lifecycle expiry rule catches anything left behind.
+    try:
+        delete_original_image(job["original_key"])
+    except Exception:
+        logger.exception("Deleting the original of image %s failed", job["image_id"])
+
+
+def process_image_job(image_id: int) -> dict[str, Any] | None:
+    # Returns the job as left by this attempt ("pending" means retry later), or
+    # None when there was nothing to claim.
+    job = _claim_image_job(image_id)
+    if job is None:
+        return None
+    if int(job["attempts"]) > IMAGE_JOB_MAX_ATTEMPTS:
+        # Only reachable by reclaiming a job whose worker died on its last attempt.
+        _record("failed")
+        row = _set_image_job_status(image_id, "failed", last_error=job.get("last_error") or "worker did not finish")
+        return _serialize_image_job(row) if row else None
+
+    started = time.perf_counter()
+    try:
+        variants = generate_image_variants(read_original_image(job["original_key"]), job["content_type"])
+        stored = store_image_variants(job["original_key"], variants)
+    except StorageValidationError as error:
+        _record("failed")
+        row = _set_image_job_status(image_id, "failed", last_error=str(error))
+        _delete_original(job)
+    except Exception as error:
+        retry = int(job["attempts"]) < IMAGE_JOB_MAX_ATTEMPTS
+        _record("retried" if retry else "failed")
+        row = _set_image_job_status(image_id, "pending" if retry else "failed", last_error=str(error))
+    else:
+        row = _complete_image_job(image_id, stored)
+        _record("completed", started)
+        if row:
+            _delete_original(job)
+
+    return _serialize_image_job(row) if row else None
+
+
+def list_abandoned_image_jobs(*, stale_seconds: int = IMAGE_JOB_STALE_SECONDS, limit: int = 1000) -> list[int]:
+    with get_cursor() as cur:
+        cur.execute(
+            """
+            SELECT image_id
+            FROM image_jobs
+            WHERE status IN ('pending', 'processing')
+              AND updated_at < now() - make_interval(secs => %s)
+            ORDER BY updated_at
+            LIMIT %s
+            """,
+            (stale_seconds, limit),
+        )
+        return [int(row["image_id"]) for row in cur.fetchall()]
+
+
+def reswap_completed_image_jobs(*, within_seconds: int) -> int:
+    # Under READ COMMITTED a row whose trigger ran before the job committed, but
+    # which committed after the swap took its snapshot, keeps the original URL.
+    # Running the swap again once those writes have landed catches it.
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            f"""
+            WITH job AS (
+                SELECT owner_user_id, original_url, final_url
+                FROM image_jobs
+                WHERE status = 'completed'
+                  AND final_url <> original_url
+                  AND updated_at > now() - make_interval(secs => %s)
+            ),
+            {_SWAP_IMAGE_URLS_SQL}
+            SELECT {_SWAPPED_ROWS_SQL} AS swapped_rows
+            """,
+            (within_seconds,),
+        )
+        swapped_rows = int(cur.fetchone()["swapped_rows"])
+
+    if swapped_rows:
+        invalidate_all_trip_content()
+    return swapped_rows
+
+
+class LocalImageJobQueue:
+    # In-process stand-in for SQS: jobs run on a small thread pool (Pillow
+    # releases the GIL while decoding, resizing and encoding).
+    name = "local"
+
+    def __init__(self, *, workers: int):
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image-jobs")
+
+    def _run(self, image_id: int):
+        try:
+            for attempt in range(1, IMAGE_JOB_MAX_ATTEMPTS + 1):
+                job = process_image_job(image_id)
+                if job is None or job["status"] != "pending":
+                    return
+                time.sleep(attempt)
+        except Exception:
+            logger.exception("Image job %s failed", image_id)
+
+    def enqueue(self, image_id: int):
+        self._executor.submit(self._run, image_id)
+
+
+class SqsImageJobQueue:
+    # Consumed by lambda_handler.handler; a retried job goes back to SQS and is
+    # redelivered after the visibility timeout.
+    name = "sqs"
+
+    def __init__(self, queue_url: str):
+        self.queue_url = queue_url
+        self._client = boto3.client("sqs", region_name=AWS_REGION)
+
+    def enqueue(self, image_id: int):
+        self._client.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps({"image_id": image_id}))
+
+
+def create_image_job_queue(name: str):
+    if name == "local":
+        return LocalImageJobQueue(workers=IMAGE_JOB_WORKERS)
+    if name == "sqs":
+        if not IMAGE_JOB_QUEUE_URL:
+            raise RuntimeError("IMAGE_JOB_QUEUE_URL is required for the sqs image job queue")
+        return SqsImageJobQueue(IMAGE_JOB_QUEUE_URL)
+    raise RuntimeError(f"unknown image job queue: {name}")
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def _get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = create_image_job_queue(IMAGE_JOB_QUEUE)
+        return _queue
+
+
+def enqueue_image_job(image_id: int):
+    # The job row is durable; a lost message only delays the job until
+    # process_image_jobs.py finds it abandoned.
+    _get_queue().enqueue(image_id)
+    _record("enqueued")
+
+
+def handle_image_job_messages(records: list[dict[str, Any]]) -> dict[str, Any]:
+    failures = []
+    for record in records:
+        try:
+            job = process_image_job(int(json.loads(record["body"])["image_id"]))
+        except Exception:
+            logger.exception("Image job message %s failed", record.get("messageId"))
+            job = {"status": "pending"}
+        if job is not None and job["status"] == "pending":
+            failures.append({"itemIdentifier": record["messageId"]})
+    # Partial batch response: only the failed messages are redelivered.
+    return {"batchItemFailures": failures}
+
+
+def get_image_job_stats() -> dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["queue"] = IMAGE_JOB_QUEUE
+    ms_total = stats.pop("ms_total")
+    stats["avg_ms"] = round(ms_total / stats["completed"], 3) if stats["completed"] else None
+    return stats
@@ -0,0 +1,542 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+import io
+import json
+from typing import Any, TextIO
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from config import IMPORT_BATCH_SIZE
+from db import get_cursor
+from services.auth_service import to_nullable_string
+from services.tag_service import add_public_tag_counts
+from services.trip_service import (
+    ACTIVITY_INSERT_COLUMNS,
+    LODGING_INSERT_COLUMNS,
+    TRIP_INSERT_COLUMNS,
+    TripValidationError,
+    invalidate_all_trip_content,
+    parse_trip_payload,
+)
+
+# "ndjson" is one trip object (or GeoJSON Feature) per line; "geojson" is a
+# FeatureCollection whose features carry the trip fields as properties.
+IMPORT_FORMATS = ("ndjson", "geojson")
+IMPORT_ERROR_LIMIT = 100
+
+_READ_CHUNK_CHARS = 64 * 1024
+_MAX_RECORD_CHARS = 16 * 1024 * 1024
+
+# Staging tables live for one batch transaction. COPY fills them without
+# per-row statements; the INSERT ... SELECTs below apply the real column types
+# and constraints.
+_STAGING_SQL = """
+    CREATE TEMP TABLE import_trips_stage (
+        record_number INT PRIMARY KEY,
+        trip_id INT,
+        thumbnail_url TEXT,
+        title TEXT,
+        description TEXT,
+        latitude NUMERIC,
+        longitude NUMERIC,
+        cost NUMERIC,
+        duration TEXT,
+        date TEXT,
+        visibility TEXT
+    ) ON COMMIT DROP;
+
+    CREATE TEMP TABLE import_tags_stage (
+        record_number INT NOT NULL,
+        tag TEXT NOT NULL
+    ) ON COMMIT DROP;
+
+    CREATE TEMP TABLE import_lodgings_stage (
+        record_number INT NOT NULL,
+        position INT NOT NULL,
+        address TEXT,
+        thumbnail_url TEXT,
+        title TEXT,
+        description TEXT,
+        latitude NUMERIC,
+        longitude NUMERIC,
+        cost NUMERIC
+    ) ON COMMIT DROP;
+
+    CREATE TEMP TABLE import_activities_stage (
+        record_number INT NOT NULL,
+        position INT NOT NULL,
+        address TEXT,
+        thumbnail_url TEXT,
+        title TEXT,
+        location TEXT,
+        description TEXT,
+        latitude NUMERIC,
+        longitude NUMERIC,
+        cost NUMERIC
+    ) ON COMMIT DROP;
+"""
+
+_IMPORT_COLUMNS_SQL = """
+    import_id, owner_user_id, format, source, status, records_processed,
+    trips_imported, error_count, last_error, created_at, updated_at
+"""
+
+Record = tuple[int, Any, str | None]
+
+
+class ImportValidationError(ValueError):
+    pass
+
+
+class ImportNotFoundError(LookupError):
+    pass
+
+
+class ImportConflictError(RuntimeError):
+    pass
+
+
+def parse_import_format(value: Any) -> str:
+    candidate = (to_nullable_string(value) or "").lower()
+    if candidate not in IMPORT_FORMATS:
+        raise ImportValidationError(f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+    return candidate
+
+
+def _serialize_import(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "import_id": int(row["import_id"]),
+        "owner_user_id": int(row["owner_user_id"]),
+        "format": row["format"],
+        "source": row.get("source"),
+        "status": row["status"],
+        "records_processed": int(row["records_processed"]),
+        "trips_imported": int(row["trips_imported"]),
+        "error_count": int(row["error_count"]),
+        "last_error": row.get("last_error"),
+        "created_at": row["created_at"].isoformat() if row.get("created_at") else None,
+        "updated_at": row["updated_at"].isoformat() if row.get("updated_at") else None,
+    }
+
+
+def create_import(*, owner_user_id: int, fmt: str, source: str | None = None) -> dict[str, Any]:
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            f"""
+            INSERT INTO trip_imports (owner_user_id, format, source)
+            SELECT u.user_id, %s, %s
+            FROM travelers u
+            WHERE u.user_id = %s
+            RETURNING {_IMPORT_COLUMNS_SQL}
+            """,
+            (parse_import_format(fmt), to_nullable_string(source), owner_user_id),
+        )
+        row = cur.fetchone()
+
+    if not row:
+        raise ImportValidationError("owner_user_id does not match a traveler")
+    return _serialize_import(row)
+
+
+def get_import(import_id: int, *, error_limit: int = IMPORT_ERROR_LIMIT) -> dict[str, Any] | None:
+    with get_cursor() as cur:
+        cur.execute(f"SELECT {_IMPORT_COLUMNS_SQL} FROM trip_imports WHERE import_id = %s", (import_id,))
+        row = cur.fetchone()
+        if not row:
+            return None
+
+        cur.execute(
+            """
+            SELECT record_number, message
+            FROM trip_import_errors
+            WHERE import_id = %s
+            ORDER BY record_number
+            LIMIT %s
+            """,
+            (import_id, error_limit),
+        )
+        errors = [{"record_number": int(item["record_number"]), "message": item["message"]} for item in cur.fetchall()]
+
+    job = _serialize_import(row)
+    job["errors"] = errors
+    return job
+
+
+class _TextReader:
+    # Just enough of a JSON tokenizer to walk a FeatureCollection one feature
+    # at a time; each value is still decoded by the stdlib decoder.
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.stream.read(_READ_CHUNK_CHARS)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def consume(self, char: str) -> bool:
+        self._skip_whitespace()
+        if self.pos < len(self.buffer) and self.buffer[self.pos] == char:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, char: str):
+        if not self.consume(char):
+            raise ImportValidationError(f"malformed GeoJSON: expected '{char}' near character {self.pos}")
+
+    def decode(self) -> Any:
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+
+            # A failed or buffer-ending decode may just be a value cut off mid-chunk.
+            if end is not None and (end < len(self.buffer) or self.eof):
+                self.pos = end
+                return value
+            if len(self.buffer) - self.pos > _MAX_RECORD_CHARS:
+                raise ImportValidationError("malformed GeoJSON: a feature exceeds the record size limit")
+            if not self._fill():
+                if end is not None:
+                    self.pos = end
+                    return value
+                raise ImportValidationError("malformed GeoJSON: invalid JSON value")
+
+
+def _iter_feature_collection(stream: TextIO) -> Iterator[Record]:
+    reader = _TextReader(stream)
+    reader.expect("{")
+    if reader.consume("}"):
+        return
+
+    while True:
+        key = reader.decode()
+        reader.expect(":")
+        if key == "features":
+            reader.expect("[")
+            if not reader.consume("]"):
+                record_number = 0
+                while True:
+                    record_number += 1
+                    yield record_number, reader.decode(), None
+                    if reader.consume("]"):
+                        break
+                    reader.expect(",")
+        else:
+            # Other members ("type", "crs", ...) are small and skipped whole.
+            reader.decode()
+
+        if not reader.consume(","):
+            reader.expect("}")
+            return
+
+
+def _iter_ndjson_records(stream: TextIO) -> Iterator[Record]:
+    # Line numbers double as record numbers so errors point back into the file.
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError:
+            yield line_number, None, "record is not valid JSON"
+
+
+def _to_trip_payload(value: Any) -> dict[str, Any]:
+    if not isinstance(value, dict):
+        raise TripValidationError("record must be a JSON object")
+    if value.get("type") != "Feature":
+        return value
+
+    properties = value.get("properties") or {}
+    if not isinstance(properties, dict):
+        raise TripValidationError("properties must be an object")
+
+    payload = dict(properties)
+    geometry = value.get("geometry")
+    if geometry is not None:
+        if not isinstance(geometry, dict) or geometry.get("type") != "Point":
+            raise TripValidationError("geometry must be a Point")
+        coordinates = geometry.get("coordinates")
+        if not isinstance(coordinates, list) or len(coordinates) < 2:
+            raise TripValidationError("geometry.coordinates must be [longitude, latitude]")
+        payload["longitude"], payload["latitude"] = coordinates[0], coordinates[1]
+    return payload
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _copy_rows(cur, table: str, columns: tuple[str, ...], rows: Iterable[tuple[Any, ...]]):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+    if buffer.tell() == 0:
+        return
+
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def _load_records(cur, *, owner_user_id: int, records: list[tuple[int, dict[str, Any]]]):
+    # Every child below belongs to a trip inserted in this transaction, so the
+    # per-statement parent revision bumps are skipped (see
+    # migrations/014_import_skip_trip_revisions.sql); the feed revision is still
+    # bumped once at commit.
+    cur.execute("SET LOCAL travel_map.importing_trips = 'on'")
+    cur.execute(_STAGING_SQL)
+    _copy_rows(
+        cur,
+        "import_trips_stage",
+        ("record_number",) + TRIP_INSERT_COLUMNS,
+        ((number, *parsed["values"]) for number, parsed in records),
+    )
+    _copy_rows(
+        cur,
+        "import_tags_stage",
+        ("record_number", "tag"),
+        ((number, tag) for number, parsed in records for tag in parsed["tags"]),
+    )
+    _copy_rows(
+        cur,
+        "import_lodgings_stage",
+        ("record_number", "position") + LODGING_INSERT_COLUMNS,
+        ((number, position, *row) for number, parsed in records for position, row in enumerate(parsed["lodgings"])),
+    )
+    _copy_rows(
+        cur,
+        "import_activities_stage",
+        ("record_number", "position") + ACTIVITY_INSERT_COLUMNS,
+        ((number, position, *row) for number, parsed in records for position, row in enumerate(parsed["activities"])),
+    )
+
+    # Ids are drawn up front, in file order, so children can be joined to their
+    # trip by record number instead of round-tripping RETURNING rows.
+    cur.execute(
+        """
+        UPDATE import_trips_stage s
+        SET trip_id = n.trip_id
+        FROM (
+            SELECT ordered.record_number, nextval(pg_get_serial_sequence('trips', 'trip_id')) AS trip_id
+            FROM (SELECT record_number FROM import_trips_stage ORDER BY record_number) ordered
+        ) n
+        WHERE n.record_number = s.record_number
+        """
+    )
+
+    trip_columns = ", ".join(TRIP_INSERT_COLUMNS)
+    cur.execute(
+        f"""
+        INSERT INTO trips (trip_id, {trip_columns}, owner_user_id)
+        SELECT trip_id, {trip_columns}, %s
+        FROM import_trips_stage
+        ORDER BY record_number
+        """,
+        (owner_user_id,),
+    )
+
+    cur.execute(
+        """
+        INSERT INTO trip_tags (trip_id, tag)
+        SELECT s.trip_id, g.tag
+        FROM import_tags_stage g
+        JOIN import_trips_stage s ON s.record_number = g.record_number
+        """
+    )
+    add_public_tag_counts(
+        cur,
+        """
+        SELECT g.tag, count(*) AS trip_count
+        FROM import_tags_stage g
+        JOIN import_trips_stage s ON s.record_number = g.record_number
+        WHERE s.visibility = 'public'
+        GROUP BY g.tag
+        """,
+    )
+
+    for table, stage, columns in (
+        ("lodgings", "import_lodgings_stage", LODGING_INSERT_COLUMNS),
+        ("activities", "import_activities_stage", ACTIVITY_INSERT_COLUMNS),
+    ):
+        cur.execute(
+            f"""
+            INSERT INTO {table} (trip_id, {", ".join(columns)})
+            SELECT s.trip_id, {", ".join(f"c.{column}" for column in columns)}
+            FROM {stage} c
+            JOIN import_trips_stage s ON s.record_number = c.record_number
+            ORDER BY c.record_number, c.position
+            """
+        )
+
+
+def _advance_checkpoint(
+    cur,
+    *,
+    import_id: int,
+    checkpoint: int,
+    records_processed: int,
+    trips_imported: int,
+    errors: list[tuple[int, str]],
+) -> dict[str, Any]:
+    if errors:
+        execute_values(
+            cur,
+            "INSERT INTO trip_import_errors (import_id, record_number, message) VALUES %s",
+            [(import_id, number, message) for number, message in errors],
+        )
+
+    # Compare-and-set: a second run over the same import cannot load a batch twice.
+    cur.execute(
+        f"""
+        UPDATE trip_imports
+        SET records_processed = %s,
+            trips_imported = trips_imported + %s,
+            error_count = error_count + %s,
+            updated_at = now()
+        WHERE import_id = %s AND records_processed = %s
+        RETURNING {_IMPORT_COLUMNS_SQL}
+        """,
+        (records_processed, trips_imported, len(errors), import_id, checkpoint),
+    )
+    row = cur.fetchone()
+    if not row:
+        raise ImportConflictError("import was advanced by another run; retry the resume")
+    return _serialize_import(row)
+
+
+def _database_error_message(error: psycopg2.Error) -> str:
+    diag = getattr(error, "diag", None)
+    message = getattr(diag, "message_primary", None) or str(error)
+    return message.strip()
+
+
+def _flush(job: dict[str, Any], batch: list[tuple[int, dict[str, Any] | None, str | None]]) -> dict[str, Any]:
+    records = [(number, parsed) for number, parsed, error in batch if parsed is not None]
+    errors = [(number, error) for number, parsed, error in batch if error is not None]
+
+    try:
+        with get_cursor(commit=True) as cur:
+            if records:
+                _load_records(cur, owner_user_id=job["owner_user_id"], records=records)
+            return _advance_checkpoint(
+                cur,
+                import_id=job["import_id"],
+                checkpoint=job["records_processed"],
+                records_processed=batch[-1][0],
+                trips_imported=len(records),
+                errors=errors,
+            )
+    except (psycopg2.DataError, psycopg2.IntegrityError) as error:
+        if len(batch) > 1:
+            # One bad row fails the whole COPY batch; load record by record to find it.
+            for item in batch:
+                job = _flush(job, [item])
+            return job
+        number, parsed, _ = batch[0]
+        if parsed is None:
+            raise
+        return _flush(job, [(number, None, _database_error_message(error))])
+
+
+def _set_status(import_id: int, status: str, *, last_error: str | None = None) -> dict[str, Any]:
+    with get_cursor(commit=True) as cur:
+        cur.execute(
+            f"""
+            UPDATE trip_imports
+            SET status = %s, last_error = %s, updated_at = now()
+            WHERE import_id = %s
+            RETURNING {_IMPORT_COLUMNS_SQL}
+            """,
+            (status, last_error, import_id),
+        )
+        row = cur.fetchone()
+
+    if not row:
+        raise ImportNotFoundError("import not found")
+    return _serialize_import(row)
+
+
+def run_import(
+    import_id: int,
+    stream: TextIO,
+    *,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_batch: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    job = get_import(import_id, error_limit=0)
+    if job is None:
+        raise ImportNotFoundError("import not found")
+    if job["status"] == "completed":
+        raise ImportValidationError("import is already completed")
+
+    # Resuming re-reads the same input and skips what the checkpoint covers.
+    job = _set_status(import_id, "running")
+    records = _iter_ndjson_records(stream) if job["format"] == "ndjson" else _iter_feature_collection(stream)
+    batch: list[tuple[int, dict[str, Any] | None, str | None]] = []
+    failure: ImportValidationError | None = None
+    started_with = job["trips_imported"]
+
+    try:
+        try:
+            for record_number, value, error in records:
+                if record_number <= job["records_processed"]:
+                    continue
+
+                parsed = None
+                if error is None:
+                    try:
+                        parsed = parse_trip_payload(_to_trip_payload(value))
+                    except TripValidationError as validation_error:
+                        error = str(validation_error)
+                batch.append((record_number, parsed, error))
+
+                if len(batch) >= batch_size:
+                    job = _flush(job, batch)
+                    batch = []
+                    if on_batch is not None:
+                        on_batch(job)
+        except ImportValidationError as error:
+            # Records read before the damage are still loaded.
+            failure = error
+
+        if batch:
+            job = _flush(job, batch)
+            if on_batch is not None:
+                on_batch(job)
+        if failure is not None:
+            raise failure
+    except ImportConflictError:
+        raise
+    except Exception as error:
+        _set_status(import_id, "failed", last_error=str(error))
+        raise
+    finally:
+        if job["trips_imported"] != started_with:
+            invalidate_all_trip_content()
+
+    return _set_status(import_id, "completed")
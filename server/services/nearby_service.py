@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from db import get_cursor
+from services.geo import (
+    EARTH_RADIUS_KM,
+    BBox,
+    GeoQueryError,
+    haversine_km_sql,
+    location_point_sql,
+    radius_bbox,
+    split_bbox,
+)
+from services.trip_service import visible_trips_where
+
+NEARBY_DEFAULT_K = 10
+NEARBY_MAX_K = 100
+NEARBY_DEFAULT_RADIUS_KM = 25.0
+NEARBY_MAX_RADIUS_KM = 500.0
+# Candidates fetched per source (in <-> order) for each result, before re-ranking.
+NEARBY_KNN_OVERFETCH = 4
+
+_NEARBY_SOURCES = (
+    ("trip", "t", "t.trip_id", "trips t"),
+    ("activity", "a", "a.activity_id", "activities a JOIN trips t ON t.trip_id = a.trip_id"),
+    ("lodging", "l", "l.lodge_id", "lodgings l JOIN trips t ON t.trip_id = l.trip_id"),
+)
+
+
+def parse_k(value: Any) -> int:
+    if value is None or not str(value).strip():
+        return NEARBY_DEFAULT_K
+    try:
+        k = int(str(value).strip())
+    except ValueError:
+        raise GeoQueryError("k must be a whole number")
+    if k < 1:
+        raise GeoQueryError("k must be at least 1")
+    return min(k, NEARBY_MAX_K)
+
+
+def parse_radius_km(value: Any) -> float:
+    if value is None or not str(value).strip():
+        return NEARBY_DEFAULT_RADIUS_KM
+    try:
+        radius_km = float(str(value).strip())
+    except ValueError:
+        raise GeoQueryError("radius_km must be a valid number")
+    if not radius_km > 0:
+        raise GeoQueryError("radius_km must be greater than 0")
+    return min(radius_km, NEARBY_MAX_RADIUS_KM)
+
+
+def _knn_origin_lng(longitude: float, min_lng: float, max_lng: float) -> float:
+    # <-> measures plain lng/lat distance, so for the far half of a box split at
+    # the antimeridian the origin is shifted by 360 degrees to sit next to it.
+    return min(
+        (longitude, longitude + 360.0, longitude - 360.0),
+        key=lambda value: max(min_lng - value, value - max_lng, 0.0),
+    )
+
+
+def _knn_lower_bound_km(knn_distance: float, bbox: BBox, radius_km: float) -> float:
+    # Any point further than knn_distance (in degrees) is at least this far on
+    # the sphere, as long as the path to it stays below the box's highest
+    # latitude plus the radius, where a degree of longitude is shortest.
+    max_lat = max(abs(bbox[1]), abs(bbox[3])) + math.degrees(radius_km / EARTH_RADIUS_KM)
+    if max_lat >= 90.0:
+        return 0.0
+    return EARTH_RADIUS_KM * math.radians(knn_distance) * math.cos(math.radians(max_lat))
+
+
+def _fetch_knn_candidates(
+    *,
+    visibility_sql: str,
+    visibility_params: tuple[Any, ...],
+    latitude: float,
+    longitude: float,
+    bbox: BBox,
+    fetch: int,
+) -> list[dict[str, Any]]:
+    # Each source (and each half of an antimeridian box) walks its location GiST
+    # index in <-> order and stops after `fetch` rows, instead of scoring every
+    # point inside the radius.
+    selects: list[str] = []
+    params: list[Any] = []
+    for kind, alias, id_sql, table_sql in _NEARBY_SOURCES:
+        point_sql = location_point_sql(alias)
+        for part, (min_lng, min_lat, max_lng, max_lat) in enumerate(split_bbox(bbox)):
+            origin_lng = _knn_origin_lng(longitude, min_lng, max_lng)
+            selects.append(
+                f"""
+                (
+                    SELECT
+                        '{kind}' AS kind,
+                        {part} AS part,
+                        {id_sql} AS item_id,
+                        t.trip_id,
+                        {alias}.title,
+                        {alias}.latitude::float8 AS latitude,
+                        {alias}.longitude::float8 AS longitude,
+                        {haversine_km_sql(alias)} AS distance_km,
+                        {point_sql} <-> point(%s, %s) AS knn_distance
+                    FROM {table_sql}
+                    WHERE {visibility_sql} AND {point_sql} <@ box(point(%s, %s), point(%s, %s))
+                    ORDER BY {point_sql} <-> point(%s, %s)
+                    LIMIT %s
+                )
+                """
+            )
+            params.extend((latitude, latitude, longitude, origin_lng, latitude))
+            params.extend(visibility_params)
+            params.extend((min_lng, min_lat, max_lng, max_lat, origin_lng, latitude, fetch))
+
+    with get_cursor() as cur:
+        cur.execute(" UNION ALL ".join(selects), tuple(params))
+        return cur.fetchall()
+
+
+def list_nearby(
+    *,
+    viewer_user_id: int | None,
+    latitude: float,
+    longitude: float,
+    k: int = NEARBY_DEFAULT_K,
+    radius_km: float = NEARBY_DEFAULT_RADIUS_KM,
+) -> list[dict[str, Any]]:
+    visibility_sql, visibility_params = visible_trips_where(viewer_user_id)
+    bbox = radius_bbox(latitude, longitude, radius_km)
+
+    # <-> ranks by flat lng/lat distance, which only approximates great-circle
+    # order, so each source overfetches and the candidates are re-ranked by
+    # haversine. A source that filled its fetch is only trusted if nothing it
+    # left behind can beat the k-th result; otherwise the fetch grows.
+    fetch = k * NEARBY_KNN_OVERFETCH
+    while True:
+        rows = _fetch_knn_candidates(
+            visibility_sql=visibility_sql,
+            visibility_params=visibility_params,
+            latitude=latitude,
+            longitude=longitude,
+            bbox=bbox,
+            fetch=fetch,
+        )
+        nearest = sorted(
+            (row for row in rows if row["distance_km"] <= radius_km),
+            key=lambda row: (row["distance_km"], row["kind"], row["item_id"]),
+        )[:k]
+        threshold_km = nearest[-1]["distance_km"] if len(nearest) == k else radius_km
+
+        fetched: dict[tuple[str, int], list[float]] = {}
+        for row in rows:
+            fetched.setdefault((row["kind"], row["part"]), []).append(row["knn_distance"])
+        exhausted = all(
+            len(distances) < fetch or _knn_lower_bound_km(max(distances), bbox, radius_km) > threshold_km
+            for distances in fetched.values()
+        )
+        if exhausted:
+            break
+        fetch *= 4
+
+    return [
+        {
+            "kind": row["kind"],
+            "item_id": int(row["item_id"]),
+            "trip_id": int(row["trip_id"]),
+            "title": row.get("title"),
+            "latitude": float(row["latitude"]),
+            "longitude": float(row["longitude"]),
+            "distance_km": round(float(row["distance_km"]), 3),
+        }
+        for row in nearest
+    ]
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import multiprocessing
+import re
+import threading
+import time
+from typing import Any, Callable
+
+import bcrypt
+
+from config import (
+    BCRYPT_COST,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_TIMEOUT_SECONDS,
+    PASSWORD_HASH_WORKERS,
+)
+
+# "process" spreads bcrypt over several cores away from the request workers;
+# "thread" is for hosts without multiprocessing support (e.g. Lambda) and still
+# runs in parallel because bcrypt releases the GIL; "inline" hashes in the
+# calling thread.
+PASSWORD_HASH_EXECUTORS = ("process", "thread", "inline")
+
+_COST_PATTERN = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class PasswordHashBusyError(RuntimeError):
+    pass
+
+
+def _hash(password: str, cost: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=cost)).decode("utf-8")
+
+
+def hash_cost(password_hash: str) -> int | None:
+    match = _COST_PATTERN.match(password_hash)
+    return int(match.group(1)) if match else None
+
+
+def _verify(password: str, password_hash: str, cost: int) -> tuple[bool, str | None]:
+    # Runs in the worker, so the rehash costs no second round trip.
+    try:
+        valid = bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    except ValueError:
+        return False, None
+
+    stored_cost = hash_cost(password_hash)
+    if valid and stored_cost is not None and stored_cost < cost:
+        return True, _hash(password, cost)
+    return valid, None
+
+
+class PasswordHasher:
+    def __init__(self, *, executor: str, workers: int, max_pending: int, cost: int, timeout: float):
+        if executor not in PASSWORD_HASH_EXECUTORS:
+            raise ValueError(f"password hash executor must be one of: {', '.join(PASSWORD_HASH_EXECUTORS)}")
+
+        self.executor_name = executor
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.cost = cost
+        self.timeout = timeout
+
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "rehashed": 0,
+            "pool_restarts": 0,
+            "ms_total": 0.0,
+        }
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.executor_name == "process":
+                    # spawn: forking a threaded web worker can copy held locks into the child.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def _reset_executor(self, broken: Executor):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self._stats["pool_restarts"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, key: str, started: float | None = None):
+        with self._lock:
+            self._stats[key] += 1
+            if started is not None:
+                self._stats["ms_total"] += (time.perf_counter() - started) * 1000
+
+    def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        if self.executor_name == "inline":
+            result = fn(*args)
+            self._record("completed", started)
+            return result
+
+        # Callers beyond max_pending are turned away at once instead of queueing
+        # behind work that would outlive their request anyway.
+        if not self._slots.acquire(blocking=False):
+            self._record("rejected")
+            raise PasswordHashBusyError("password hashing is at capacity")
+
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenExecutor:
+                self._reset_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        # The slot is held until the job really finishes, even past a timeout.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._record("timeouts")
+            raise PasswordHashBusyError("password hashing timed out")
+        except BrokenExecutor:
+            self._reset_executor(executor)
+            raise
+
+        self._record("completed", started)
+        return result
+
+    def hash_password(self, password: str) -> str:
+        return self._run(_hash, password, self.cost)
+
+    def verify_password(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        valid, new_hash = self._run(_verify, password, password_hash, self.cost)
+        if new_hash is not None:
+            self._record("rehashed")
+        return valid, new_hash
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["executor"] = self.executor_name
+        stats["workers"] = self.workers
+        stats["max_pending"] = self.max_pending
+        stats["cost"] = self.cost
+        ms_total = stats.pop("ms_total")
+        stats["avg_ms"] = round(ms_total / stats["completed"], 3) if stats["completed"] else None
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_hasher = PasswordHasher(
+    executor=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    cost=BCRYPT_COST,
+    timeout=PASSWORD_HASH_TIMEOUT_SECONDS,
+)
+
+
+def hash_password(password: str) -> str:
+    return _hasher.hash_password(password)
+
+
+def verify_password(password: str, password_hash: str) -> tuple[bool, str | None]:
+    # Returns (valid, new_hash); new_hash is set when the stored cost is below BCRYPT_COST.
+    return _hasher.verify_password(password, password_hash)
+
+
+def get_password_hash_stats() -> dict[str, Any]:
+    return _hasher.stats()
@@ -3,9 +3,46 @@ from __future__ import annotations
 from typing import Any
 
 from db import get_cursor
-
-
-def _row_to_plans(row: dict) -> dict[str, Any]:
+from services.trip_service import MAX_TRIP_BATCH_SIZE, get_trips_by_ids, get_visible_items
+
+
+MAX_PLAN_OPERATIONS = 200
+MAX_PLAN_COUNT_IDS = 200
+# Item ids are Postgres int columns; anything outside would fail the ::int[] cast.
+MAX_PLAN_ITEM_ID = 2**31 - 1
+
+# kind -> (plan table, item id column, item table)
+_PLAN_KINDS = {
+    "activity": ("saved_activities", "activity_id", "activities"),
+    "lodging": ("saved_lodgings", "lodge_id", "lodgings"),
+}
+_PLAN_ACTIONS = {"save", "unsave"}
+
+
+class PlanValidationError(ValueError):
+    pass
+
+
+def _validate_item_id(item_id: int, *, field_name: str = "id") -> int:
+    if not 1 <= item_id <= MAX_PLAN_ITEM_ID:
+        raise PlanValidationError(f"{field_name} must be between 1 and {MAX_PLAN_ITEM_ID}")
+    return item_id
+
+
+def _select_plans(cur, user_id: int) -> dict[str, Any]:
+    cur.execute(
+        """
+        SELECT
+            ARRAY(
+                SELECT activity_id FROM saved_activities WHERE user_id = %s ORDER BY created_at, activity_id
+            ) AS saved_activity_ids,
+            ARRAY(
+                SELECT lodge_id FROM saved_lodgings WHERE user_id = %s ORDER BY created_at, lodge_id
+            ) AS saved_lodging_ids
+        """,
+        (user_id, user_id),
+    )
+    row = cur.fetchone()
     return {
         "saved_activity_ids": list(row["saved_activity_ids"] or []),
         "saved_lodging_ids": list(row["saved_lodging_ids"] or []),
@@ -14,59 +51,150 @@ def _row_to_plans(row: dict) -> dict[str, Any]:
 
 def get_user_plans(user_id: int) -> dict[str, Any]:
     with get_cursor() as cur:
-        cur.execute(
-            "SELECT saved_activity_ids, saved_lodging_ids FROM travelers WHERE user_id = %s",
-            (user_id,),
-        )
-        row = cur.fetchone()
+        return _select_plans(cur, user_id)
 
-    if row is None:
-        return {"saved_activity_ids": [], "saved_lodging_ids": []}
 
-    return _row_to_plans(row)
-
-
-def toggle_saved_activity(user_id: int, activity_id: int) -> dict[str, Any]:
+def _toggle(user_id: int, kind: str, item_id: int) -> dict[str, Any]:
+    table, id_column, item_table = _PLAN_KINDS[kind]
+    _validate_item_id(item_id)
     with get_cursor(commit=True) as cur:
+        # Unsave if present, otherwise save (only if the item still exists).
         cur.execute(
-            """
-            UPDATE travelers
-            SET saved_activity_ids =
-                CASE WHEN %s = ANY(saved_activity_ids)
-                     THEN array_remove(saved_activity_ids, %s)
-                     ELSE array_append(saved_activity_ids, %s)
-                END
-            WHERE user_id = %s
-            RETURNING saved_activity_ids, saved_lodging_ids
+            f"""
+            WITH removed AS (
+                DELETE FROM {table}
+                WHERE user_id = %s AND {id_column} = %s
+                RETURNING 1
+            )
+            INSERT INTO {table} (user_id, {id_column})
+            SELECT %s, i.{id_column}
+            FROM {item_table} i
+            WHERE i.{id_column} = %s AND NOT EXISTS (SELECT 1 FROM removed)
+            ON CONFLICT DO NOTHING
             """,
-            (activity_id, activity_id, activity_id, user_id),
+            (user_id, item_id, user_id, item_id),
         )
-        row = cur.fetchone()
+        return _select_plans(cur, user_id)
 
-    if row is None:
-        return get_user_plans(user_id)
 
-    return _row_to_plans(row)
+def toggle_saved_activity(user_id: int, activity_id: int) -> dict[str, Any]:
+    return _toggle(user_id, "activity", activity_id)
 
 
 def toggle_saved_lodging(user_id: int, lodge_id: int) -> dict[str, Any]:
-    with get_cursor(commit=True) as cur:
-        cur.execute(
-            """
-            UPDATE travelers
-            SET saved_lodging_ids =
-                CASE WHEN %s = ANY(saved_lodging_ids)
-                     THEN array_remove(saved_lodging_ids, %s)
-                     ELSE array_append(saved_lodging_ids, %s)
-                END
-            WHERE user_id = %s
-            RETURNING saved_activity_ids, saved_lodging_ids
-            """,
-            (lodge_id, lodge_id, lodge_id, user_id),
-        )
-        row = cur.fetchone()
+    return _toggle(user_id, "lodging", lodge_id)
+
+
+def _parse_operations(operations: Any) -> dict[tuple[str, str], list[int]]:
+    if not isinstance(operations, list) or not operations:
+        raise PlanValidationError("operations must be a non-empty list")
+    if len(operations) > MAX_PLAN_OPERATIONS:
+        raise PlanValidationError(f"at most {MAX_PLAN_OPERATIONS} operations can be applied at once")
+
+    # The last operation on an item wins, so a batch replays like sequential calls.
+    final_actions: dict[tuple[str, int], str] = {}
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise PlanValidationError("each operation must be an object")
+        kind = operation.get("type")
+        action = operation.get("action")
+        item_id = operation.get("id")
+        if kind not in _PLAN_KINDS:
+            raise PlanValidationError(f"type must be one of: {', '.join(sorted(_PLAN_KINDS))}")
+        if action not in _PLAN_ACTIONS:
+            raise PlanValidationError(f"action must be one of: {', '.join(sorted(_PLAN_ACTIONS))}")
+        if not isinstance(item_id, int) or isinstance(item_id, bool):
+            raise PlanValidationError("id must be an integer")
+        _validate_item_id(item_id)
+        final_actions.pop((kind, item_id), None)
+        final_actions[(kind, item_id)] = action
+
+    grouped: dict[tuple[str, str], list[int]] = {}
+    for (kind, item_id), action in final_actions.items():
+        grouped.setdefault((kind, action), []).append(item_id)
+    return grouped
+
+
+def apply_plan_operations(user_id: int, operations: Any) -> dict[str, Any]:
+    grouped = _parse_operations(operations)
 
-    if row is None:
-        return get_user_plans(user_id)
+    with get_cursor(commit=True) as cur:
+        for (kind, action), item_ids in grouped.items():
+            table, id_column, item_table = _PLAN_KINDS[kind]
+            if action == "unsave":
+                cur.execute(
+                    f"DELETE FROM {table} WHERE user_id = %s AND {id_column} = ANY(%s)",
+                    (user_id, item_ids),
+                )
+                continue
+
+            # Sorted so concurrent batches for one user lock rows in the same order.
+            cur.execute(
+                f"""
+                INSERT INTO {table} (user_id, {id_column})
+                SELECT %s, i.{id_column}
+                FROM {item_table} i
+                WHERE i.{id_column} = ANY(%s)
+                ORDER BY i.{id_column}
+                ON CONFLICT DO NOTHING
+                """,
+                (user_id, sorted(item_ids)),
+            )
+        return _select_plans(cur, user_id)
+
+
+def parse_plan_ids(value: Any, *, field_name: str) -> list[int]:
+    item_ids: list[int] = []
+    for part in str(value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            item_id = int(part)
+        except ValueError:
+            raise PlanValidationError(f"{field_name} must be a comma-separated list of ids")
+        item_ids.append(_validate_item_id(item_id, field_name=field_name))
+    item_ids = list(dict.fromkeys(item_ids))
+    if len(item_ids) > MAX_PLAN_COUNT_IDS:
+        raise PlanValidationError(f"at most {MAX_PLAN_COUNT_IDS} {field_name} can be requested at once")
+    return item_ids
+
+
+def get_plan_counts(*, activity_ids: list[int], lodge_ids: list[int]) -> dict[str, dict[str, int]]:
+    counts: dict[str, dict[str, int]] = {"activities": {}, "lodgings": {}}
 
-    return _row_to_plans(row)
+    with get_cursor() as cur:
+        for key, kind, item_ids in (("activities", "activity", activity_ids), ("lodgings", "lodging", lodge_ids)):
+            if not item_ids:
+                continue
+            table, id_column, _ = _PLAN_KINDS[kind]
+            cur.execute(
+                f"""
+                SELECT ids.item_id, count(s.user_id) AS saves
+                FROM unnest(%s::int[]) AS ids(item_id)
+                LEFT JOIN {table} s ON s.{id_column} = ids.item_id
+                GROUP BY ids.item_id
+                """,
+                (item_ids,),
+            )
+            counts[key] = {str(row["item_id"]): int(row["saves"]) for row in cur.fetchall()}
+
+    return counts
+
+
+def expand_user_plans(user_id: int, plans: dict[str, Any]) -> dict[str, Any]:
+    # Expands at most MAX_TRIP_BATCH_SIZE saved items (activities first, in saved
+    # order), so the parent trips also fit in one batch; "truncated" flags the rest.
+    activity_ids = plans["saved_activity_ids"][:MAX_TRIP_BATCH_SIZE]
+    lodge_ids = plans["saved_lodging_ids"][: MAX_TRIP_BATCH_SIZE - len(activity_ids)]
+    items = get_visible_items(activity_ids=activity_ids, lodge_ids=lodge_ids, viewer_user_id=user_id)
+
+    trip_ids = [item["trip_id"] for item in items["activities"] + items["lodgings"]]
+    return {
+        **plans,
+        "activities": items["activities"],
+        "lodgings": items["lodgings"],
+        "trips": get_trips_by_ids(trip_ids, user_id, include=("tags",)),
+        "truncated": len(activity_ids) + len(lodge_ids)
+        < len(plans["saved_activity_ids"]) + len(plans["saved_lodging_ids"]),
+    }
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from datetime import datetime
+import hashlib
+from typing import Any
+
+from db import get_cursor
+
+# Validators for conditional GETs: {"etag", "last_modified", "revision"}. They
+# are read from the version columns kept by migrations/005_content_revisions.sql,
+# so answering a 304 never touches the trip children.
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def _validators(etag: str, last_modified: datetime | None, revision: Any) -> dict[str, Any]:
+    return {"etag": etag, "last_modified": last_modified, "revision": revision}
+
+
+def get_feed_validators(*, viewer_user_id: int | None, variant: Any) -> dict[str, Any]:
+    with get_cursor() as cur:
+        cur.execute("SELECT revision, updated_at FROM content_revisions WHERE scope = 'trips'")
+        row = cur.fetchone()
+
+    revision = int(row["revision"]) if row else 0
+    updated_at = row["updated_at"] if row else None
+    return _validators(
+        f"feed-{revision}-{_digest(viewer_user_id, variant)}",
+        updated_at,
+        revision,
+    )
+
+
+def get_trip_validators(*, trip_id: int, viewer_user_id: int | None) -> dict[str, Any] | None:
+    with get_cursor() as cur:
+        cur.execute(
+            """
+            SELECT t.revision, t.updated_at, t.visibility, t.owner_user_id,
+                   o.profile_version, o.profile_updated_at
+            FROM trips t
+            JOIN travelers o ON o.user_id = t.owner_user_id
+            WHERE t.trip_id = %s
+            """,
+            (trip_id,),
+        )
+        row = cur.fetchone()
+
+    # Hidden trips get no validators so they cannot be probed with If-None-Match.
+    if not row:
+        return None
+    if row["visibility"] != "public" and viewer_user_id != int(row["owner_user_id"]):
+        return None
+
+    revision = (int(row["revision"]), int(row["profile_version"]))
+    return _validators(
+        f"trip-{trip_id}-{revision[0]}-{revision[1]}",
+        max(row["updated_at"], row["profile_updated_at"]),
+        revision,
+    )
+
+
+def get_profile_validators(*, user_id: int, viewer_user_id: int | None, variant: Any) -> dict[str, Any] | None:
+    is_owner = viewer_user_id == user_id
+    with get_cursor() as cur:
+        cur.execute(
+            """
+            SELECT
+                u.profile_version,
+                u.profile_updated_at,
+                count(t.trip_id) AS trip_count,
+                coalesce(sum(t.revision), 0) AS trip_revisions,
+                max(t.trip_id) AS max_trip_id,
+                max(t.updated_at) AS trips_updated_at
+            FROM travelers u
+            LEFT JOIN trips t
+              ON t.owner_user_id = u.user_id
+             AND (%s OR t.visibility = 'public')
+            WHERE u.user_id = %s
+            GROUP BY u.user_id
+            """,
+            (is_owner, user_id),
+        )
+        row = cur.fetchone()
+
+    if not row:
+        return None
+
+    # Trip revisions only grow, so their sum moves on any edit; the count and
+    # highest id catch deletions.
+    revision = (
+        int(row["profile_version"]),
+        int(row["trip_count"]),
+        int(row["trip_revisions"]),
+        row["max_trip_id"],
+    )
+    last_modified = row["profile_updated_at"]
+    if row["trips_updated_at"] is not None:
+        last_modified = max(last_modified, row["trips_updated_at"])
+
+    return _validators(
+        f"profile-{user_id}-{_digest(revision, is_owner, variant)}",
+        last_modified,
+        revision,
+    )
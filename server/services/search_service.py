@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+from collections import defaultdict
+import html
+from typing import Any
+
+from db import get_cursor
+from services.auth_service import to_nullable_string
+from services.tag_service import TAGS_FILTER_SQL, parse_tags
+from services.trip_service import (
+    VALID_DURATION,
+    TripValidationError,
+    decode_cursor,
+    encode_cursor,
+    get_trips_by_ids,
+    visible_trips_where,
+)
+
+SEARCH_PAGE_LIMIT = 20
+MAX_SEARCH_PAGE_LIMIT = 50
+SEARCH_CONFIG = "english"
+# Child matches count for less than a match on the trip itself.
+CHILD_RANK_WEIGHT = 0.5
+
+# Private-use markers survive ts_headline untouched, so the snippet can be
+# HTML-escaped before they are swapped for <mark> tags.
+_HIGHLIGHT_START = "\ue000"
+_HIGHLIGHT_STOP = "\ue001"
+_HEADLINE_OPTIONS = f"StartSel={_HIGHLIGHT_START}, StopSel={_HIGHLIGHT_STOP}, MaxWords=24, MinWords=8, MaxFragments=2"
+
+
+def _parse_duration_filter(value: Any) -> str | None:
+    duration = to_nullable_string(value)
+    if duration is None:
+        return None
+    if duration not in VALID_DURATION:
+        raise TripValidationError(f"duration must be one of: {', '.join(sorted(VALID_DURATION))}")
+    return duration
+
+
+def _parse_max_cost(value: Any) -> float | None:
+    candidate = to_nullable_string(value)
+    if candidate is None:
+        return None
+    try:
+        max_cost = float(candidate.replace("$", "").replace(",", ""))
+    except ValueError:
+        raise TripValidationError("max_cost must be a valid number")
+    if max_cost < 0:
+        raise TripValidationError("max_cost must be at least 0")
+    return max_cost
+
+
+def _highlight(snippet: str | None) -> str | None:
+    if not snippet:
+        return None
+    escaped = html.escape(snippet, quote=False)
+    return escaped.replace(_HIGHLIGHT_START, "<mark>").replace(_HIGHLIGHT_STOP, "</mark>")
+
+
+def _filters_sql(
+    *,
+    viewer_user_id: int | None,
+    tags: list[str],
+    max_cost: float | None,
+    duration: str | None,
+) -> tuple[str, tuple[Any, ...]]:
+    where_sql, params = visible_trips_where(viewer_user_id)
+    clauses = [where_sql]
+
+    if tags:
+        clauses.append(TAGS_FILTER_SQL)
+        params = params + (tags, len(tags))
+
+    if max_cost is not None:
+        # Trips without a cost are not excluded by a budget, matching the map sidebar.
+        clauses.append("(t.cost IS NULL OR t.cost <= %s)")
+        params = params + (max_cost,)
+
+    if duration is not None:
+        clauses.append("t.duration = %s")
+        params = params + (duration,)
+
+    return " AND ".join(clauses), params
+
+
+def _ranked_trip_ids(
+    cur,
+    *,
+    query: str | None,
+    filters_sql: str,
+    filters_params: tuple[Any, ...],
+    cursor: dict[str, Any] | None,
+    limit: int,
+) -> list[tuple[int, float | None]]:
+    if query is None:
+        keyset_sql = ""
+        params = filters_params
+        if cursor is not None:
+            keyset_sql = "AND t.trip_id < %s"
+            params = params + (cursor["trip_id"],)
+
+        cur.execute(
+            f"""
+            SELECT t.trip_id
+            FROM trips t
+            WHERE {filters_sql} {keyset_sql}
+            ORDER BY t.trip_id DESC
+            LIMIT %s
+            """,
+            params + (limit,),
+        )
+        return [(int(row["trip_id"]), None) for row in cur.fetchall()]
+
+    keyset_sql = ""
+    keyset_params: tuple[Any, ...] = tuple()
+    if cursor is not None:
+        keyset_sql = "WHERE (r.score, r.trip_id) < (%s::float8, %s)"
+        keyset_params = (cursor["score"], cursor["trip_id"])
+
+    # Visibility and filters apply inside each branch, so only rows that can be
+    # returned are ranked and aggregated. Ranks are summed as numeric, which is
+    # exact, so a trip's score (and the keyset on it) does not depend on the
+    # order the matches arrive in.
+    cur.execute(
+        f"""
+        WITH q AS (
+            SELECT websearch_to_tsquery(%s, %s) AS query
+        ),
+        matches AS (
+            SELECT t.trip_id, ts_rank(t.search_vector, q.query)::numeric AS rank
+            FROM trips t, q
+            WHERE t.search_vector @@ q.query AND {filters_sql}
+            UNION ALL
+            SELECT a.trip_id, ts_rank(a.search_vector, q.query)::numeric * %s
+            FROM activities a
+            JOIN trips t ON t.trip_id = a.trip_id, q
+            WHERE a.search_vector @@ q.query AND {filters_sql}
+            UNION ALL
+            SELECT l.trip_id, ts_rank(l.search_vector, q.query)::numeric * %s
+            FROM lodgings l
+            JOIN trips t ON t.trip_id = l.trip_id, q
+            WHERE l.search_vector @@ q.query AND {filters_sql}
+        ),
+        ranked AS (
+            SELECT m.trip_id, sum(m.rank)::float8 AS score
+            FROM matches m
+            GROUP BY m.trip_id
+        )
+        SELECT r.trip_id, r.score
+        FROM ranked r
+        {keyset_sql}
+        ORDER BY r.score DESC, r.trip_id DESC
+        LIMIT %s
+        """,
+        (SEARCH_CONFIG, query)
+        + filters_params
+        + (CHILD_RANK_WEIGHT,)
+        + filters_params
+        + (CHILD_RANK_WEIGHT,)
+        + filters_params
+        + keyset_params
+        + (limit,),
+    )
+    return [(int(row["trip_id"]), float(row["score"])) for row in cur.fetchall()]
+
+
+def _match_details(cur, *, query: str, trip_ids: list[int]) -> dict[str, dict[int, Any]]:
+    snippets: dict[int, str | None] = {}
+    activities: dict[int, list[dict[str, Any]]] = defaultdict(list)
+    lodgings: dict[int, list[dict[str, Any]]] = defaultdict(list)
+
+    # Headlines are the expensive part, so they are only built for the returned page.
+    cur.execute(
+        """
+        WITH q AS (
+            SELECT websearch_to_tsquery(%s, %s) AS query
+        )
+        SELECT
+            'trip' AS kind,
+            t.trip_id,
+            NULL::int AS item_id,
+            t.title,
+            ts_headline(%s, concat_ws(' ', t.title, t.description), q.query, %s) AS snippet,
+            ts_rank(t.search_vector, q.query) AS rank
+        FROM trips t, q
+        WHERE t.trip_id = ANY(%s) AND t.search_vector @@ q.query
+        UNION ALL
+        SELECT
+            'activity',
+            a.trip_id,
+            a.activity_id,
+            a.title,
+            ts_headline(%s, concat_ws(' ', a.title, a.location, a.address, a.description), q.query, %s),
+            ts_rank(a.search_vector, q.query)
+        FROM activities a, q
+        WHERE a.trip_id = ANY(%s) AND a.search_vector @@ q.query
+        UNION ALL
+        SELECT
+            'lodging',
+            l.trip_id,
+            l.lodge_id,
+            l.title,
+            ts_headline(%s, concat_ws(' ', l.title, l.address, l.description), q.query, %s),
+            ts_rank(l.search_vector, q.query)
+        FROM lodgings l, q
+        WHERE l.trip_id = ANY(%s) AND l.search_vector @@ q.query
+        ORDER BY rank DESC, item_id ASC
+        """,
+        (
+            SEARCH_CONFIG,
+            query,
+            SEARCH_CONFIG,
+            _HEADLINE_OPTIONS,
+            trip_ids,
+            SEARCH_CONFIG,
+            _HEADLINE_OPTIONS,
+            trip_ids,
+            SEARCH_CONFIG,
+            _HEADLINE_OPTIONS,
+            trip_ids,
+        ),
+    )
+
+    for row in cur.fetchall():
+        trip_id = int(row["trip_id"])
+        snippet = _highlight(row.get("snippet"))
+        if row["kind"] == "trip":
+            snippets[trip_id] = snippet
+        elif row["kind"] == "activity":
+            activities[trip_id].append({"activity_id": int(row["item_id"]), "title": row.get("title"), "snippet": snippet})
+        else:
+            lodgings[trip_id].append({"lodge_id": int(row["item_id"]), "title": row.get("title"), "snippet": snippet})
+
+    return {"snippets": snippets, "activities": activities, "lodgings": lodgings}
+
+
+def _is_cursor_number(value: Any, types: type | tuple[type, ...]) -> bool:
+    # bool is an int subclass; a forged cursor must not slip one past the check.
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def search_trips(
+    *,
+    viewer_user_id: int | None,
+    query: Any = None,
+    tags: Any = None,
+    max_cost: Any = None,
+    duration: Any = None,
+    cursor: Any = None,
+    limit: int = SEARCH_PAGE_LIMIT,
+) -> dict[str, Any]:
+    text_query = to_nullable_string(query)
+    filters_sql, filters_params = _filters_sql(
+        viewer_user_id=viewer_user_id,
+        tags=parse_tags(tags),
+        max_cost=_parse_max_cost(max_cost),
+        duration=_parse_duration_filter(duration),
+    )
+
+    page_cursor = decode_cursor(cursor)
+    if page_cursor is not None:
+        expected = {"trip_id", "score"} if text_query else {"trip_id"}
+        if (
+            set(page_cursor) != expected
+            or not _is_cursor_number(page_cursor["trip_id"], int)
+            or (text_query and not _is_cursor_number(page_cursor["score"], (int, float)))
+        ):
+            raise TripValidationError("cursor is invalid")
+
+    with get_cursor() as cur:
+        ranked = _ranked_trip_ids(
+            cur,
+            query=text_query,
+            filters_sql=filters_sql,
+            filters_params=filters_params,
+            cursor=page_cursor,
+            limit=limit + 1,
+        )
+
+        next_cursor = None
+        if len(ranked) > limit:
+            ranked = ranked[:limit]
+            last_trip_id, last_score = ranked[-1]
+            next_cursor = encode_cursor(
+                {"trip_id": last_trip_id, "score": last_score} if text_query else {"trip_id": last_trip_id}
+            )
+
+        trip_ids = [trip_id for trip_id, _ in ranked]
+        details = _match_details(cur, query=text_query, trip_ids=trip_ids) if text_query and trip_ids else None
+
+    trips = {trip["trip_id"]: trip for trip in get_trips_by_ids(trip_ids, viewer_user_id, include=("tags",))}
+
+    results = []
+    for trip_id, score in ranked:
+        trip = trips.get(trip_id)
+        if trip is None:
+            continue
+        results.append(
+            {
+                "trip": trip,
+                "score": score,
+                "snippet": details["snippets"].get(trip_id) if details else None,
+                "matched_activities": details["activities"].get(trip_id, []) if details else [],
+                "matched_lodgings": details["lodgings"].get(trip_id, []) if details else [],
+            }
+        )
+
+    return {"results": results, "next_cursor": next_cursor}
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from functools import lru_cache
 from io import BytesIO
+import json
+import os
+from typing import Any, BinaryIO
 import uuid
 
 import boto3
 from PIL import Image, ImageOps, UnidentifiedImageError
 from werkzeug.datastructures import FileStorage
 
-from config import AWS_REGION, S3_BUCKET_NAME
+from config import AWS_REGION, IMAGE_ORIGINAL_URL_TTL_SECONDS, S3_BUCKET_NAME, S3_ORIGINALS_BUCKET_NAME
 
 ALLOWED_IMAGE_CONTENT_TYPES = {
     "image/jpeg",
@@ -18,9 +22,23 @@ ALLOWED_IMAGE_CONTENT_TYPES = {
     "image/gif",
 }
 
-MAX_IMAGE_LONG_EDGE_PX = 2560
+# Long edges of the stored variants; clients pick the smallest that fits.
+IMAGE_VARIANT_LONG_EDGES = (320, 640, 1280, 2560)
+MAX_IMAGE_LONG_EDGE_PX = IMAGE_VARIANT_LONG_EDGES[-1]
+IMAGE_REDUCING_GAP = 3.0
 WEBP_QUALITY = 88
 
+IMAGE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+# Originals are private (S3_ORIGINALS_BUCKET_NAME) and deleted once the job is done.
+ORIGINALS_PREFIX = "originals"
+
 
 class StorageConfigError(RuntimeError):
     pass
@@ -34,73 +52,192 @@ def _build_object_url(key: str) -> str:
     return f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
 
 
-def _optimize_image_for_web(*, file: FileStorage, content_type: str) -> tuple[BytesIO, str, str]:
-    if content_type == "image/gif":
-        file.stream.seek(0)
-        raw_bytes = BytesIO(file.stream.read())
-        raw_bytes.seek(0)
-        return raw_bytes, "image/gif", ".gif"
+@lru_cache(maxsize=1)
+def _shared_s3_client():
+    # boto3 clients are thread-safe; building one per object costs more than small uploads.
+    return boto3.client("s3", region_name=AWS_REGION)
+
+
+def _s3_client():
+    if not S3_BUCKET_NAME:
+        raise StorageConfigError("S3_BUCKET_NAME is not configured")
+    return _shared_s3_client()
 
-    file.stream.seek(0)
+
+def _originals_bucket() -> str:
+    return S3_ORIGINALS_BUCKET_NAME or S3_BUCKET_NAME
+
+
+def parse_image_content_type(value: str | None) -> str:
+    content_type = (value or "").lower().strip()
+    if content_type not in ALLOWED_IMAGE_CONTENT_TYPES:
+        raise StorageValidationError("file must be an image (jpeg, png, webp, or gif)")
+    return content_type
+
+
+def _encode_for_web(image: Image.Image) -> tuple[BytesIO, str, str]:
+    output = BytesIO()
 
     try:
-        with Image.open(file.stream) as source:
+        image.save(output, format="WEBP", quality=WEBP_QUALITY, method=6)
+        output.seek(0)
+        return output, "image/webp", ".webp"
+    except OSError:
+        output = BytesIO()
+        if image.mode == "RGBA":
+            image.save(output, format="PNG", optimize=True)
+            output.seek(0)
+            return output, "image/png", ".png"
+
+        image.save(output, format="JPEG", quality=90, optimize=True, progressive=True)
+        output.seek(0)
+        return output, "image/jpeg", ".jpg"
+
+
+def _fit_long_edge(size: tuple[int, int], long_edge: int) -> tuple[int, int]:
+    width, height = size
+    scale = long_edge / float(max(width, height))
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+def generate_image_variants(data: bytes, content_type: str) -> list[dict[str, Any]]:
+    # Returns one entry per rung of IMAGE_VARIANT_LONG_EDGES that the source can
+    # fill, smallest first, each with width, height, stream, content_type and extension.
+    try:
+        with Image.open(BytesIO(data)) as source:
+            if content_type == "image/gif":
+                # Kept as uploaded so animation survives.
+                width, height = source.size
+                return [
+                    {
+                        "width": width,
+                        "height": height,
+                        "stream": BytesIO(data),
+                        "content_type": "image/gif",
+                        "extension": ".gif",
+                    }
+                ]
+
+            # JPEGs decode straight at 1/2, 1/4 or 1/8 scale when that still
+            # covers the largest rung. Only sources of 5120px and up qualify; a
+            # typical 4032px phone photo (half is 2016) still decodes at full size.
+            source.draft(None, _fit_long_edge(source.size, min(MAX_IMAGE_LONG_EDGE_PX, max(source.size))))
             image = ImageOps.exif_transpose(source)
 
             if image.mode not in ("RGB", "RGBA"):
                 image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
 
-            width, height = image.size
-            longest_edge = max(width, height)
-            if longest_edge > MAX_IMAGE_LONG_EDGE_PX:
-                scale = MAX_IMAGE_LONG_EDGE_PX / float(longest_edge)
-                resized = (
-                    max(1, int(round(width * scale))),
-                    max(1, int(round(height * scale))),
+            longest_edge = max(image.size)
+            long_edges = sorted({min(edge, longest_edge) for edge in IMAGE_VARIANT_LONG_EDGES}, reverse=True)
+
+            variants = []
+            for long_edge in long_edges:
+                # Each rung is cut from the one above it; reducing_gap lets Pillow
+                # box-reduce() large steps before the final LANCZOS pass.
+                if max(image.size) > long_edge:
+                    image = image.resize(
+                        _fit_long_edge(image.size, long_edge),
+                        Image.Resampling.LANCZOS,
+                        reducing_gap=IMAGE_REDUCING_GAP,
+                    )
+                stream, variant_content_type, extension = _encode_for_web(image)
+                variants.append(
+                    {
+                        "width": image.width,
+                        "height": image.height,
+                        "stream": stream,
+                        "content_type": variant_content_type,
+                        "extension": extension,
+                    }
                 )
-                image = image.resize(resized, Image.Resampling.LANCZOS)
-
-            output = BytesIO()
-
-            try:
-                image.save(output, format="WEBP", quality=WEBP_QUALITY, method=6)
-                output.seek(0)
-                return output, "image/webp", ".webp"
-            except OSError:
-                output = BytesIO()
-                if image.mode == "RGBA":
-                    image.save(output, format="PNG", optimize=True)
-                    output.seek(0)
-                    return output, "image/png", ".png"
-
-                image.save(output, format="JPEG", quality=90, optimize=True, progressive=True)
-                output.seek(0)
-                return output, "image/jpeg", ".jpg"
     except UnidentifiedImageError as error:
         raise StorageValidationError("file is not a valid image") from error
 
+    variants.reverse()
+    return variants
 
-def upload_image_file(*, file: FileStorage, folder: str, owner_user_id: int) -> str:
-    if not S3_BUCKET_NAME:
-        raise StorageConfigError("S3_BUCKET_NAME is not configured")
-
-    content_type = (file.mimetype or "").lower().strip()
-    if content_type not in ALLOWED_IMAGE_CONTENT_TYPES:
-        raise StorageValidationError("file must be an image (jpeg, png, webp, or gif)")
-
-    optimized_stream, optimized_content_type, optimized_extension = _optimize_image_for_web(
-        file=file,
-        content_type=content_type,
-    )
 
+def build_image_key(*, folder: str, owner_user_id: int, extension: str) -> str:
     safe_folder = folder.strip("/") or "trips"
     timestamp = datetime.now(tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    key = f"{safe_folder}/{owner_user_id}/{timestamp}-{uuid.uuid4().hex}{optimized_extension}"
+    return f"{safe_folder}/{owner_user_id}/{timestamp}-{uuid.uuid4().hex}{extension}"
+
 
-    extra_args = {"ContentType": optimized_content_type}
+def optimized_image_key(original_key: str, suffix: str) -> str:
+    key = original_key.removeprefix(f"{ORIGINALS_PREFIX}/")
+    return f"{os.path.splitext(key)[0]}{suffix}"
 
-    s3_client = boto3.client("s3", region_name=AWS_REGION)
-    optimized_stream.seek(0)
-    s3_client.upload_fileobj(optimized_stream, S3_BUCKET_NAME, key, ExtraArgs=extra_args)
 
+def upload_image_object(stream: BinaryIO, *, key: str, content_type: str) -> str:
+    _s3_client().upload_fileobj(stream, S3_BUCKET_NAME, key, ExtraArgs={"ContentType": content_type})
     return _build_object_url(key)
+
+
+def upload_original_image(*, file: FileStorage, folder: str, owner_user_id: int) -> dict[str, str]:
+    # Stored as received: only the header is read here, the pixels are decoded by the job.
+    content_type = parse_image_content_type(file.mimetype)
+    file.stream.seek(0)
+    try:
+        with Image.open(file.stream):
+            pass
+    except UnidentifiedImageError as error:
+        raise StorageValidationError("file is not a valid image") from error
+
+    key = build_image_key(folder=folder, owner_user_id=owner_user_id, extension=IMAGE_EXTENSIONS[content_type])
+    file.stream.seek(0)
+    if content_type == "image/gif":
+        # GIFs are final as uploaded, so they go straight to the public bucket.
+        url = upload_image_object(file.stream, key=key, content_type=content_type)
+        return {"key": key, "url": url, "content_type": content_type}
+
+    # Never public: the returned placeholder is a presigned URL that expires.
+    key = f"{ORIGINALS_PREFIX}/{key}"
+    client = _s3_client()
+    client.upload_fileobj(file.stream, _originals_bucket(), key, ExtraArgs={"ContentType": content_type})
+    url = client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": _originals_bucket(), "Key": key},
+        ExpiresIn=IMAGE_ORIGINAL_URL_TTL_SECONDS,
+    )
+    return {"key": key, "url": url, "content_type": content_type}
+
+
+def read_original_image(key: str) -> bytes:
+    return _s3_client().get_object(Bucket=_originals_bucket(), Key=key)["Body"].read()
+
+
+def delete_original_image(key: str):
+    _s3_client().delete_object(Bucket=_originals_bucket(), Key=key)
+
+
+def store_image_variants(original_key: str, variants: list[dict[str, Any]]) -> dict[str, Any]:
+    # Variants sit next to each other as <name>-<width>w.<ext>, with the manifest as <name>.json.
+    manifest_variants = []
+    final_key = None
+    for variant in variants:
+        final_key = optimized_image_key(original_key, f"-{variant['width']}w{variant['extension']}")
+        with variant["stream"].getbuffer() as view:
+            size = view.nbytes
+        manifest_variants.append(
+            {
+                "width": variant["width"],
+                "height": variant["height"],
+                "url": upload_image_object(variant["stream"], key=final_key, content_type=variant["content_type"]),
+                "content_type": variant["content_type"],
+                "bytes": size,
+            }
+        )
+
+    manifest = json.dumps({"variants": manifest_variants}, separators=(",", ":")).encode("utf-8")
+    manifest_url = upload_image_object(
+        BytesIO(manifest),
+        key=optimized_image_key(original_key, ".json"),
+        content_type="application/json",
+    )
+    # The largest variant is the one stored on trips and profiles.
+    return {
+        "variants": manifest_variants,
+        "manifest_url": manifest_url,
+        "final_key": final_key,
+        "final_url": manifest_variants[-1]["url"],
+    }
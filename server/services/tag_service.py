@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Any
+
+from db import get_cursor
+from services.auth_service import to_nullable_string
+from services.geo import BBox, bbox_where_sql
+
+TAGS_FILTER_SQL = """
+    t.trip_id IN (
+        SELECT tt.trip_id
+        FROM trip_tags tt
+        WHERE tt.tag = ANY(%s)
+        GROUP BY tt.trip_id
+        HAVING count(*) = %s
+    )
+"""
+
+
+def parse_tags(value: Any) -> list[str]:
+    # Lowercased like the tags the client saves, so ?tags=Beach still matches "beach".
+    tags = [tag.strip().lower() for tag in (to_nullable_string(value) or "").split(",")]
+    return list(dict.fromkeys(tag for tag in tags if tag))
+
+
+def increment_public_tag_counts(cur, tags: list[str]):
+    if not tags:
+        return
+
+    # Sorted so concurrent writers lock counter rows in the same order.
+    cur.execute(
+        """
+        INSERT INTO tag_facet_counts (tag, public_trip_count)
+        SELECT tag, 1
+        FROM unnest(%s::varchar[]) AS tag
+        ORDER BY tag
+        ON CONFLICT (tag) DO UPDATE
+        SET public_trip_count = tag_facet_counts.public_trip_count + 1
+        """,
+        (sorted(set(tags)),),
+    )
+
+
+def add_public_tag_counts(cur, tag_counts_sql: str):
+    # tag_counts_sql selects (tag, trip_count) for newly inserted public trips.
+    cur.execute(
+        f"""
+        INSERT INTO tag_facet_counts (tag, public_trip_count)
+        SELECT added.tag, added.trip_count
+        FROM ({tag_counts_sql}) added
+        ORDER BY added.tag
+        ON CONFLICT (tag) DO UPDATE
+        SET public_trip_count = tag_facet_counts.public_trip_count + EXCLUDED.public_trip_count
+        """
+    )
+
+
+def public_tag_decrement_sql(deleted_trips: str) -> str:
+    # Body of a data-modifying CTE next to the trips DELETE that produces
+    # `deleted_trips` (trip_id, visibility). trip_tags is read from the
+    # statement's snapshot, before the cascade removes the rows.
+    return f"""
+        UPDATE tag_facet_counts f
+        SET public_trip_count = GREATEST(f.public_trip_count - removed.trip_count, 0)
+        FROM (
+            SELECT tt.tag, count(*) AS trip_count
+            FROM trip_tags tt
+            JOIN {deleted_trips} d ON d.trip_id = tt.trip_id
+            WHERE d.visibility = 'public'
+            GROUP BY tt.tag
+        ) removed
+        WHERE f.tag = removed.tag
+        RETURNING f.tag
+    """
+
+
+def get_tag_facets(*, bbox: BBox | None = None, selected_tags: list[str] | None = None) -> list[dict[str, Any]]:
+    selected_tags = selected_tags or []
+
+    with get_cursor() as cur:
+        if bbox is None and not selected_tags:
+            cur.execute(
+                """
+                SELECT tag, public_trip_count AS trip_count
+                FROM tag_facet_counts
+                WHERE public_trip_count > 0
+                ORDER BY public_trip_count DESC, tag ASC
+                """
+            )
+        else:
+            # Narrowed facets cannot come from the global counters; the GiST and
+            # trip_tags indexes keep this bounded by the matching trips.
+            clauses = ["t.visibility = 'public'"]
+            params: tuple[Any, ...] = tuple()
+            if bbox is not None:
+                bbox_sql, bbox_params = bbox_where_sql("t", bbox)
+                clauses.append(bbox_sql)
+                params += bbox_params
+            if selected_tags:
+                clauses.append(TAGS_FILTER_SQL)
+                params += (selected_tags, len(selected_tags))
+
+            cur.execute(
+                f"""
+                SELECT tt.tag, count(*) AS trip_count
+                FROM trip_tags tt
+                JOIN trips t ON t.trip_id = tt.trip_id
+                WHERE {" AND ".join(clauses)}
+                GROUP BY tt.tag
+                ORDER BY trip_count DESC, tt.tag ASC
+                """,
+                params,
+            )
+        rows = cur.fetchall()
+
+    return [
+        {
+            "tag": row["tag"],
+            "trip_count": int(row["trip_count"]),
+            "selected": row["tag"] in selected_tags,
+        }
+        for row in rows
+    ]
@@ -3,15 +3,94 @@ from __future__ import annotations
 from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
+import base64
+import binascii
+import json
 import re
-from typing import Any
-
+from typing import Any, Iterator
+
+from psycopg2.extras import execute_values
+
+from config import (
+    FEED_CACHE_BACKEND,
+    FEED_CACHE_MAX_BYTES,
+    FEED_CACHE_MAX_ENTRIES,
+    FEED_CACHE_REDIS_URL,
+    FEED_CACHE_TTL_SECONDS,
+    TRIP_HYDRATION_ENGINE,
+    TRIP_STREAM_CHUNK_SIZE,
+)
 from db import get_cursor
 from services.auth_service import to_nullable_string
+from services.cache import VersionedCache, create_cache_backend
+from services.cluster_service import clear_cluster_cache, invalidate_cluster_points
+from services.geo import BBox, bbox_where_sql
+from services.tag_service import increment_public_tag_counts, public_tag_decrement_sql
 
 VALID_VISIBILITY = {"public", "private", "friends"}
 VALID_DURATION = {"multiday trip", "day trip", "overnight trip"}
 
+TRIP_CHILD_COLLECTIONS = ("tags", "lodgings", "activities", "comments")
+TRIP_FIELDSETS = {
+    "summary": (),
+    "full": TRIP_CHILD_COLLECTIONS,
+}
+
+# "python" hydrates children with one query per collection and builds dicts
+# row by row; "sql" builds whole trip documents in Postgres (json_agg/LATERAL).
+TRIP_HYDRATION_ENGINES = ("python", "sql")
+
+# Listings embed only the newest comments; comment_count carries the total.
+# GET /trips/<id> (get_trip) still embeds every comment.
+TRIP_LISTING_COMMENT_LIMIT = 3
+
+MAX_TRIP_BATCH_SIZE = 100
+CHILD_INSERT_PAGE_SIZE = 500
+
+# Column order of the tuples built by parse_trip_payload (bulk import copies them as-is).
+TRIP_INSERT_COLUMNS = (
+    "thumbnail_url",
+    "title",
+    "description",
+    "latitude",
+    "longitude",
+    "cost",
+    "duration",
+    "date",
+    "visibility",
+)
+LODGING_INSERT_COLUMNS = ("address", "thumbnail_url", "title", "description", "latitude", "longitude", "cost")
+ACTIVITY_INSERT_COLUMNS = (
+    "address",
+    "thumbnail_url",
+    "title",
+    "location",
+    "description",
+    "latitude",
+    "longitude",
+    "cost",
+)
+
+TRIP_PAGE_LIMIT = 100
+MAX_TRIP_PAGE_LIMIT = 500
+VIEWPORT_TRIP_LIMIT = 500
+MAX_VIEWPORT_TRIP_LIMIT = 2000
+
+# Feed listings are keyed by query shape under a global content version that
+# every trip write bumps. Callers holding the database feed revision (see
+# revision_service) pass it too, which keeps workers with their own memory
+# cache from serving a page older than the ETag it is sent with.
+_feed_cache = VersionedCache(
+    create_cache_backend(
+        FEED_CACHE_BACKEND,
+        maxsize=FEED_CACHE_MAX_ENTRIES,
+        ttl_seconds=FEED_CACHE_TTL_SECONDS,
+        redis_url=FEED_CACHE_REDIS_URL,
+        prefix="travel-map:feed",
+        max_bytes=FEED_CACHE_MAX_BYTES,
+    )
+)
+
 
 class TripValidationError(ValueError):
     pass
@@ -42,8 +121,9 @@ def _as_float(value: Any) -> float | None:
 
 
 def _as_datetime_iso(value: Any) -> str | None:
+    # Always six fractional digits, matching to_char(..., 'US') in the sql engine.
     if isinstance(value, datetime):
-        return value.isoformat()
+        return value.isoformat(timespec="microseconds")
     return None
 
 
@@ -60,6 +140,7 @@ def _serialize_trip_base(row: dict[str, Any]) -> dict[str, Any]:
         "date": row.get("date"),
         "visibility": row.get("visibility") or "public",
         "owner_user_id": int(row["owner_user_id"]),
+        "comment_count": int(row.get("comment_count") or 0),
         "owner": {
             "user_id": int(row["owner_user_id"]),
             "name": row.get("owner_name"),
@@ -68,15 +149,62 @@ def _serialize_trip_base(row: dict[str, Any]) -> dict[str, Any]:
             "college": row.get("owner_college"),
             "profile_image_url": row.get("owner_profile_image_url"),
         },
-        "tags": [],
-        "lodgings": [],
-        "activities": [],
-        "comments": [],
     }
 
 
-def _hydrate_trip_children(trips: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    if not trips:
+def _serialize_lodging(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "lodge_id": int(row["lodge_id"]),
+        "trip_id": int(row["trip_id"]),
+        "address": row.get("address"),
+        "thumbnail_url": row.get("thumbnail_url"),
+        "title": row.get("title"),
+        "description": row.get("description"),
+        "latitude": _as_float(row.get("latitude")),
+        "longitude": _as_float(row.get("longitude")),
+        "cost": _as_float(row.get("cost")),
+    }
+
+
+def _serialize_activity(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "activity_id": int(row["activity_id"]),
+        "trip_id": int(row["trip_id"]),
+        "address": row.get("address"),
+        "thumbnail_url": row.get("thumbnail_url"),
+        "title": row.get("title"),
+        "location": row.get("location"),
+        "description": row.get("description"),
+        "latitude": _as_float(row.get("latitude")),
+        "longitude": _as_float(row.get("longitude")),
+        "cost": _as_float(row.get("cost")),
+    }
+
+
+def parse_trip_include(fields: Any, include: Any, *, default: str = "full") -> tuple[str, ...]:
+    fieldset = (to_nullable_string(fields) or default).lower()
+    if fieldset not in TRIP_FIELDSETS:
+        raise TripValidationError(f"fields must be one of: {', '.join(TRIP_FIELDSETS)}")
+
+    selected = set(TRIP_FIELDSETS[fieldset])
+    for name in (to_nullable_string(include) or "").split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in TRIP_CHILD_COLLECTIONS:
+            raise TripValidationError(f"include must be a comma-separated list of: {', '.join(TRIP_CHILD_COLLECTIONS)}")
+        selected.add(name)
+
+    return tuple(name for name in TRIP_CHILD_COLLECTIONS if name in selected)
+
+
+def _hydrate_trip_children(
+    trips: list[dict[str, Any]],
+    include: tuple[str, ...] = TRIP_CHILD_COLLECTIONS,
+    *,
+    comment_limit: int | None = TRIP_LISTING_COMMENT_LIMIT,
+) -> list[dict[str, Any]]:
+    if not trips or not include:
         return trips
 
     trip_ids = [trip["trip_id"] for trip in trips]
@@ -87,150 +215,691 @@ def _hydrate_trip_children(trips: list[dict[str, Any]]) -> list[dict[str, Any]]:
     comments_by_trip: dict[int, list[dict[str, Any]]] = defaultdict(list)
 
     with get_cursor() as cur:
-        cur.execute(
-            """
-            SELECT trip_id, tag
-            FROM trip_tags
-            WHERE trip_id = ANY(%s)
-            ORDER BY tag ASC
-            """,
-            (trip_ids,),
-        )
-        for row in cur.fetchall():
-            tags_by_trip[int(row["trip_id"])].append(row["tag"])
-
-        cur.execute(
-            """
-            SELECT lodge_id, trip_id, address, thumbnail_url, title, description, latitude, longitude, cost
-            FROM lodgings
-            WHERE trip_id = ANY(%s)
-            ORDER BY lodge_id ASC
-            """,
-            (trip_ids,),
-        )
-        for row in cur.fetchall():
-            lodgings_by_trip[int(row["trip_id"])].append(
-                {
-                    "lodge_id": int(row["lodge_id"]),
-                    "trip_id": int(row["trip_id"]),
-                    "address": row.get("address"),
-                    "thumbnail_url": row.get("thumbnail_url"),
-                    "title": row.get("title"),
-                    "description": row.get("description"),
-                    "latitude": _as_float(row.get("latitude")),
-                    "longitude": _as_float(row.get("longitude")),
-                    "cost": _as_float(row.get("cost")),
-                }
+        if "tags" in include:
+            cur.execute(
+                """
+                SELECT trip_id, tag
+                FROM trip_tags
+                WHERE trip_id = ANY(%s)
+                ORDER BY tag ASC
+                """,
+                (trip_ids,),
             )
-
-        cur.execute(
-            """
-            SELECT activity_id, trip_id, address, thumbnail_url, title, location, description, latitude, longitude, cost
-            FROM activities
-            WHERE trip_id = ANY(%s)
-            ORDER BY activity_id ASC
-            """,
-            (trip_ids,),
-        )
-        for row in cur.fetchall():
-            activities_by_trip[int(row["trip_id"])].append(
-                {
-                    "activity_id": int(row["activity_id"]),
-                    "trip_id": int(row["trip_id"]),
-                    "address": row.get("address"),
-                    "thumbnail_url": row.get("thumbnail_url"),
-                    "title": row.get("title"),
-                    "location": row.get("location"),
-                    "description": row.get("description"),
-                    "latitude": _as_float(row.get("latitude")),
-                    "longitude": _as_float(row.get("longitude")),
-                    "cost": _as_float(row.get("cost")),
-                }
+            for row in cur.fetchall():
+                tags_by_trip[int(row["trip_id"])].append(row["tag"])
+
+        if "lodgings" in include:
+            cur.execute(
+                """
+                SELECT lodge_id, trip_id, address, thumbnail_url, title, description, latitude, longitude, cost
+                FROM lodgings
+                WHERE trip_id = ANY(%s)
+                ORDER BY lodge_id ASC
+                """,
+                (trip_ids,),
             )
-
-        cur.execute(
-            """
-            SELECT c.comment_id, c.user_id, c.trip_id, c.body, c.created_at, u.name AS user_name
-            FROM comments c
-            JOIN travelers u ON u.user_id = c.user_id
-            WHERE c.trip_id = ANY(%s)
-            ORDER BY c.created_at DESC
-            """,
-            (trip_ids,),
-        )
-        for row in cur.fetchall():
-            comments_by_trip[int(row["trip_id"])].append(
-                {
-                    "comment_id": int(row["comment_id"]),
-                    "user_id": int(row["user_id"]),
-                    "trip_id": int(row["trip_id"]),
-                    "body": row.get("body") or "",
-                    "created_at": _as_datetime_iso(row.get("created_at")),
-                    "user_name": row.get("user_name"),
-                }
+            for row in cur.fetchall():
+                lodgings_by_trip[int(row["trip_id"])].append(_serialize_lodging(row))
+
+        if "activities" in include:
+            cur.execute(
+                """
+                SELECT activity_id, trip_id, address, thumbnail_url, title, location, description, latitude, longitude, cost
+                FROM activities
+                WHERE trip_id = ANY(%s)
+                ORDER BY activity_id ASC
+                """,
+                (trip_ids,),
             )
-
+            for row in cur.fetchall():
+                activities_by_trip[int(row["trip_id"])].append(_serialize_activity(row))
+
+        if "comments" in include:
+            # Listings take the latest few per trip; the rest are paged via GET /trips/<id>/comments.
+            # LIMIT NULL is no limit.
+            cur.execute(
+                """
+                SELECT c.comment_id, c.user_id, c.trip_id, c.body, c.created_at, u.name AS user_name
+                FROM unnest(%s::int[]) AS ids(trip_id)
+                CROSS JOIN LATERAL (
+                    SELECT *
+                    FROM comments c
+                    WHERE c.trip_id = ids.trip_id
+                    ORDER BY c.created_at DESC, c.comment_id DESC
+                    LIMIT %s
+                ) c
+                JOIN travelers u ON u.user_id = c.user_id
+                ORDER BY c.created_at DESC, c.comment_id DESC
+                """,
+                (trip_ids, comment_limit),
+            )
+            for row in cur.fetchall():
+                comments_by_trip[int(row["trip_id"])].append(
+                    {
+                        "comment_id": int(row["comment_id"]),
+                        "user_id": int(row["user_id"]),
+                        "trip_id": int(row["trip_id"]),
+                        "body": row.get("body") or "",
+                        "created_at": _as_datetime_iso(row.get("created_at")),
+                        "user_name": row.get("user_name"),
+                    }
+                )
+
+    children_by_trip = {
+        "tags": tags_by_trip,
+        "lodgings": lodgings_by_trip,
+        "activities": activities_by_trip,
+        "comments": comments_by_trip,
+    }
     for trip in trips:
         trip_id = trip["trip_id"]
-        trip["tags"] = tags_by_trip[trip_id]
-        trip["lodgings"] = lodgings_by_trip[trip_id]
-        trip["activities"] = activities_by_trip[trip_id]
-        trip["comments"] = comments_by_trip[trip_id]
+        for name in include:
+            trip[name] = children_by_trip[name][trip_id]
 
     return trips
 
 
-def _fetch_trip_rows(where_sql: str, params: tuple[Any, ...]) -> list[dict[str, Any]]:
+_TRIP_ROW_COLUMNS_SQL = """
+            t.trip_id,
+            t.thumbnail_url,
+            t.title,
+            t.description,
+            t.latitude,
+            t.longitude,
+            t.cost,
+            t.duration,
+            t.date,
+            t.visibility,
+            t.owner_user_id,
+            t.comment_count,
+            o.name AS owner_name,
+            o.bio AS owner_bio,
+            o.verified AS owner_verified,
+            o.college AS owner_college,
+            o.profile_image_url AS owner_profile_image_url"""
+
+
+def _trip_rows_sql(where_sql: str, limit_sql: str) -> str:
+    return f"""
+        SELECT{_TRIP_ROW_COLUMNS_SQL}
+        FROM trips t
+        JOIN travelers o ON o.user_id = t.owner_user_id
+        WHERE {where_sql}
+        ORDER BY t.trip_id DESC
+        {limit_sql}
+    """
+
+
+def _fetch_trip_rows(where_sql: str, params: tuple[Any, ...], *, limit: int | None = None) -> list[dict[str, Any]]:
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT %s"
+        params = params + (limit,)
+
     with get_cursor() as cur:
-        cur.execute(
-            f"""
+        cur.execute(_trip_rows_sql(where_sql, limit_sql), params)
+        rows = cur.fetchall()
+
+    return [_serialize_trip_base(row) for row in rows]
+
+
+def _iter_trip_chunks(
+    where_sql: str,
+    params: tuple[Any, ...],
+    *,
+    include: tuple[str, ...],
+    limit: int | None,
+    chunk_size: int,
+) -> Iterator[list[dict[str, Any]]]:
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT %s"
+        params = params + (limit,)
+
+    # A named (server-side) cursor keeps only one chunk of rows in memory; the
+    # children for each chunk are hydrated on the same connection as it goes.
+    with get_cursor(name="trip_stream") as cur:
+        cur.itersize = chunk_size
+        cur.execute(_trip_rows_sql(where_sql, limit_sql), params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield _hydrate_trip_children([_serialize_trip_base(row) for row in rows], include)
+
+
+_TRIP_DOCUMENT_FIELDS_SQL = """
+                    'trip_id', t.trip_id,
+                    'thumbnail_url', t.thumbnail_url,
+                    'title', COALESCE(t.title, ''),
+                    'description', t.description,
+                    'latitude', t.latitude::float8,
+                    'longitude', t.longitude::float8,
+                    'cost', t.cost::float8,
+                    'duration', t.duration,
+                    'date', t.date,
+                    'visibility', COALESCE(NULLIF(t.visibility, ''), 'public'),
+                    'owner_user_id', t.owner_user_id,
+                    'comment_count', t.comment_count,
+                    'owner', json_build_object(
+                        'user_id', o.user_id,
+                        'name', o.name,
+                        'bio', o.bio,
+                        'verified', COALESCE(o.verified, FALSE),
+                        'college', o.college,
+                        'profile_image_url', o.profile_image_url
+                    )"""
+
+_TRIP_CHILD_LATERAL_SQL = {
+    "tags": """
+            LEFT JOIN LATERAL (
+                SELECT COALESCE(json_agg(tt.tag ORDER BY tt.tag ASC), '[]'::json) AS items
+                FROM trip_tags tt
+                WHERE tt.trip_id = t.trip_id
+            ) tag_items ON TRUE""",
+    "lodgings": """
+            LEFT JOIN LATERAL (
+                SELECT COALESCE(
+                    json_agg(
+                        json_build_object(
+                            'lodge_id', l.lodge_id,
+                            'trip_id', l.trip_id,
+                            'address', l.address,
+                            'thumbnail_url', l.thumbnail_url,
+                            'title', l.title,
+                            'description', l.description,
+                            'latitude', l.latitude::float8,
+                            'longitude', l.longitude::float8,
+                            'cost', l.cost::float8
+                        )
+                        ORDER BY l.lodge_id ASC
+                    ),
+                    '[]'::json
+                ) AS items
+                FROM lodgings l
+                WHERE l.trip_id = t.trip_id
+            ) lodging_items ON TRUE""",
+    "activities": """
+            LEFT JOIN LATERAL (
+                SELECT COALESCE(
+                    json_agg(
+                        json_build_object(
+                            'activity_id', a.activity_id,
+                            'trip_id', a.trip_id,
+                            'address', a.address,
+                            'thumbnail_url', a.thumbnail_url,
+                            'title', a.title,
+                            'location', a.location,
+                            'description', a.description,
+                            'latitude', a.latitude::float8,
+                            'longitude', a.longitude::float8,
+                            'cost', a.cost::float8
+                        )
+                        ORDER BY a.activity_id ASC
+                    ),
+                    '[]'::json
+                ) AS items
+                FROM activities a
+                WHERE a.trip_id = t.trip_id
+            ) activity_items ON TRUE""",
+    "comments": """
+            LEFT JOIN LATERAL (
+                SELECT COALESCE(
+                    json_agg(
+                        json_build_object(
+                            'comment_id', c.comment_id,
+                            'user_id', c.user_id,
+                            'trip_id', c.trip_id,
+                            'body', COALESCE(c.body, ''),
+                            'created_at', to_char(c.created_at, 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                            'user_name', u.name
+                        )
+                        ORDER BY c.created_at DESC, c.comment_id DESC
+                    ),
+                    '[]'::json
+                ) AS items
+                FROM (
+                    SELECT *
+                    FROM comments c
+                    WHERE c.trip_id = t.trip_id
+                    ORDER BY c.created_at DESC, c.comment_id DESC
+                    {comment_limit_sql}
+                ) c
+                JOIN travelers u ON u.user_id = c.user_id
+            ) comment_items ON TRUE""",
+}
+
+_TRIP_CHILD_ITEMS_ALIAS = {
+    "tags": "tag_items",
+    "lodgings": "lodging_items",
+    "activities": "activity_items",
+    "comments": "comment_items",
+}
+
+
+def _trip_documents_sql(
+    where_sql: str,
+    *,
+    include: tuple[str, ...],
+    limit_sql: str,
+    comment_limit: int | None = TRIP_LISTING_COMMENT_LIMIT,
+) -> str:
+    child_fields = "".join(f",\n                    '{name}', {_TRIP_CHILD_ITEMS_ALIAS[name]}.items" for name in include)
+    comment_limit_sql = f"LIMIT {int(comment_limit)}" if comment_limit is not None else ""
+    child_joins = "".join(
+        _TRIP_CHILD_LATERAL_SQL[name].replace("{comment_limit_sql}", comment_limit_sql) for name in include
+    )
+
+    # The page is selected first so the LATERAL aggregates only run for rows that are returned.
+    return f"""
             SELECT
                 t.trip_id,
-                t.thumbnail_url,
-                t.title,
-                t.description,
-                t.latitude,
-                t.longitude,
-                t.cost,
-                t.duration,
-                t.date,
-                t.visibility,
-                t.owner_user_id,
-                o.name AS owner_name,
-                o.bio AS owner_bio,
-                o.verified AS owner_verified,
-                o.college AS owner_college,
-                o.profile_image_url AS owner_profile_image_url
-            FROM trips t
-            JOIN travelers o ON o.user_id = t.owner_user_id
-            WHERE {where_sql}
+                json_build_object({_TRIP_DOCUMENT_FIELDS_SQL}{child_fields}
+                ) AS doc
+            FROM (
+                SELECT t.*
+                FROM trips t
+                WHERE {where_sql}
+                ORDER BY t.trip_id DESC
+                {limit_sql}
+            ) t
+            JOIN travelers o ON o.user_id = t.owner_user_id{child_joins}
             ORDER BY t.trip_id DESC
-            """,
+            """
+
+
+def trip_documents_sql(where_sql: str, *, include: tuple[str, ...]) -> str:
+    # Unbounded (trip_id, doc) rows for exports, which stream them from a cursor or COPY.
+    return _trip_documents_sql(where_sql, include=include, limit_sql="")
+
+
+def _fetch_trip_documents(
+    where_sql: str,
+    params: tuple[Any, ...],
+    *,
+    include: tuple[str, ...],
+    limit: int | None = None,
+    comment_limit: int | None = TRIP_LISTING_COMMENT_LIMIT,
+) -> list[dict[str, Any]]:
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT %s"
+        params = params + (limit,)
+
+    with get_cursor() as cur:
+        # psycopg2 decodes json columns itself, so no per-field conversion happens in Python.
+        cur.execute(
+            _trip_documents_sql(where_sql, include=include, limit_sql=limit_sql, comment_limit=comment_limit),
             params,
         )
-        rows = cur.fetchall()
+        return [row["doc"] for row in cur.fetchall()]
+
+
+def _fetch_trip_documents_json(
+    where_sql: str,
+    params: tuple[Any, ...],
+    *,
+    include: tuple[str, ...],
+    page_size: int | None = None,
+) -> tuple[str, int | None]:
+    limit_sql = ""
+    page_filter_sql = ""
+    page_params: tuple[Any, ...] = tuple()
+    if page_size is not None:
+        # One extra row is fetched to tell whether another page exists.
+        limit_sql = "LIMIT %s"
+        params = params + (page_size + 1,)
+        page_filter_sql = "FILTER (WHERE page.position <= %s)"
+        page_params = (page_size, page_size)
+
+    with get_cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT
+                COALESCE(json_agg(page.doc ORDER BY page.trip_id DESC) {page_filter_sql}, '[]'::json)::text AS documents,
+                min(page.trip_id) {page_filter_sql} AS last_trip_id,
+                count(*) AS fetched
+            FROM (
+                SELECT docs.*, row_number() OVER (ORDER BY docs.trip_id DESC) AS position
+                FROM ({_trip_documents_sql(where_sql, include=include, limit_sql=limit_sql)}) docs
+            ) page
+            """,
+            page_params + params,
+        )
+        row = cur.fetchone()
+
+    if not row:
+        return "[]", None
+
+    has_more = page_size is not None and int(row["fetched"]) > page_size
+    return row["documents"], int(row["last_trip_id"]) if has_more else None
+
+
+def parse_trip_engine(value: Any) -> str:
+    engine = (to_nullable_string(value) or TRIP_HYDRATION_ENGINE).lower()
+    if engine not in TRIP_HYDRATION_ENGINES:
+        raise TripValidationError(f"engine must be one of: {', '.join(TRIP_HYDRATION_ENGINES)}")
+    return engine
+
+
+def _load_trips(
+    where_sql: str,
+    params: tuple[Any, ...],
+    *,
+    include: tuple[str, ...],
+    limit: int | None = None,
+    engine: str | None = None,
+) -> list[dict[str, Any]]:
+    if parse_trip_engine(engine) == "sql":
+        return _fetch_trip_documents(where_sql, params, include=include, limit=limit)
+
+    trips = _fetch_trip_rows(where_sql, params, limit=limit)
+    return _hydrate_trip_children(trips, include)
+
+
+def parse_limit(value: Any, *, default: int, maximum: int) -> int:
+    candidate = to_nullable_string(value)
+    if not candidate:
+        return default
+
+    try:
+        limit = int(candidate)
+    except ValueError:
+        raise TripValidationError("limit must be a whole number")
+
+    if limit < 1:
+        raise TripValidationError("limit must be at least 1")
+    return min(limit, maximum)
 
-    return [_serialize_trip_base(row) for row in rows]
 
+def encode_cursor(payload: dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
-def list_trips(viewer_user_id: int | None) -> list[dict[str, Any]]:
+
+def decode_cursor(value: Any) -> dict[str, Any] | None:
+    candidate = to_nullable_string(value)
+    if not candidate:
+        return None
+
+    try:
+        padded = candidate + "=" * (-len(candidate) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise TripValidationError("cursor is invalid")
+
+    if not isinstance(payload, dict):
+        raise TripValidationError("cursor is invalid")
+    return payload
+
+
+def parse_trip_cursor(value: Any) -> int | None:
+    payload = decode_cursor(value)
+    if payload is None:
+        return None
+
+    after_trip_id = payload.get("trip_id")
+    if not isinstance(after_trip_id, int):
+        raise TripValidationError("cursor is invalid")
+    return after_trip_id
+
+
+def _keyset_where(where_sql: str, params: tuple[Any, ...], after_trip_id: int | None) -> tuple[str, tuple[Any, ...]]:
+    if after_trip_id is None:
+        return where_sql, params
+    return f"{where_sql} AND t.trip_id < %s", params + (after_trip_id,)
+
+
+def _load_trip_page(
+    where_sql: str,
+    params: tuple[Any, ...],
+    *,
+    include: tuple[str, ...],
+    page_size: int | None,
+    after_trip_id: int | None,
+    engine: str | None,
+) -> dict[str, Any]:
+    where_sql, params = _keyset_where(where_sql, params, after_trip_id)
+
+    if page_size is None:
+        return {"trips": _load_trips(where_sql, params, include=include, engine=engine), "next_cursor": None}
+
+    # Children are only hydrated for this page (plus one look-ahead row).
+    trips = _load_trips(where_sql, params, include=include, limit=page_size + 1, engine=engine)
+    next_cursor = None
+    if len(trips) > page_size:
+        trips = trips[:page_size]
+        next_cursor = encode_cursor({"trip_id": trips[-1]["trip_id"]})
+
+    return {"trips": trips, "next_cursor": next_cursor}
+
+
+def visible_trips_where(viewer_user_id: int | None) -> tuple[str, tuple[Any, ...]]:
     if viewer_user_id is None:
-        trips = _fetch_trip_rows("t.visibility = 'public'", tuple())
-    else:
-        trips = _fetch_trip_rows("(t.visibility = 'public' OR t.owner_user_id = %s)", (viewer_user_id,))
-    return _hydrate_trip_children(trips)
+        return "t.visibility = 'public'", tuple()
+    return "(t.visibility = 'public' OR t.owner_user_id = %s)", (viewer_user_id,)
+
 
+def _list_trips_where(viewer_user_id: int | None, bbox: BBox | None) -> tuple[str, tuple[Any, ...]]:
+    where_sql, params = visible_trips_where(viewer_user_id)
 
-def list_user_trips(target_user_id: int, viewer_user_id: int | None) -> list[dict[str, Any]]:
+    if bbox is not None:
+        bbox_sql, bbox_params = bbox_where_sql("t", bbox)
+        where_sql = f"{where_sql} AND {bbox_sql}"
+        params = params + bbox_params
+
+    return where_sql, params
+
+
+def _user_trips_where(target_user_id: int, viewer_user_id: int | None) -> tuple[str, tuple[Any, ...]]:
     if viewer_user_id == target_user_id:
-        trips = _fetch_trip_rows("t.owner_user_id = %s", (target_user_id,))
-    else:
-        trips = _fetch_trip_rows("(t.owner_user_id = %s AND t.visibility = 'public')", (target_user_id,))
-    return _hydrate_trip_children(trips)
+        return "t.owner_user_id = %s", (target_user_id,)
+    return "(t.owner_user_id = %s AND t.visibility = 'public')", (target_user_id,)
 
 
-def get_trip(trip_id: int, viewer_user_id: int | None) -> dict[str, Any] | None:
-    trips = _fetch_trip_rows("t.trip_id = %s", (trip_id,))
+def _feed_cacheable(viewer_user_id: int | None, limit: int | None) -> bool:
+    # A signed-in viewer's unlimited feed would be one whole-feed entry per user,
+    # so only anonymous or bounded pages are cached.
+    return viewer_user_id is None or limit is not None
+
+
+def list_trips_page(
+    viewer_user_id: int | None,
+    *,
+    bbox: BBox | None = None,
+    limit: int | None = None,
+    after_trip_id: int | None = None,
+    include: tuple[str, ...] = TRIP_CHILD_COLLECTIONS,
+    engine: str | None = None,
+    revision: Any = None,
+) -> dict[str, Any]:
+    engine = parse_trip_engine(engine)
+    where_sql, params = _list_trips_where(viewer_user_id, bbox)
+
+    def load() -> dict[str, Any]:
+        return _load_trip_page(
+            where_sql,
+            params,
+            include=include,
+            page_size=limit,
+            after_trip_id=after_trip_id,
+            engine=engine,
+        )
+
+    if not _feed_cacheable(viewer_user_id, limit):
+        return load()
+    return _feed_cache.get_or_load(
+        ("page", revision, viewer_user_id, bbox, limit, after_trip_id, include, engine),
+        load,
+    )
+
+
+def list_trips_page_json(
+    viewer_user_id: int | None,
+    *,
+    bbox: BBox | None = None,
+    limit: int | None = None,
+    after_trip_id: int | None = None,
+    include: tuple[str, ...] = TRIP_CHILD_COLLECTIONS,
+    revision: Any = None,
+) -> tuple[str, str | None]:
+    where_sql, params = _list_trips_where(viewer_user_id, bbox)
+    where_sql, params = _keyset_where(where_sql, params, after_trip_id)
+
+    def load() -> list[Any]:
+        trips_json, last_trip_id = _fetch_trip_documents_json(where_sql, params, include=include, page_size=limit)
+        next_cursor = encode_cursor({"trip_id": last_trip_id}) if last_trip_id is not None else None
+        return [trips_json, next_cursor]
+
+    if not _feed_cacheable(viewer_user_id, limit):
+        trips_json, next_cursor = load()
+        return trips_json, next_cursor
+    trips_json, next_cursor = _feed_cache.get_or_load(
+        ("page_json", revision, viewer_user_id, bbox, limit, after_trip_id, include),
+        load,
+    )
+    return trips_json, next_cursor
+
+
+def iter_trips(
+    viewer_user_id: int | None,
+    *,
+    bbox: BBox | None = None,
+    limit: int | None = None,
+    after_trip_id: int | None = None,
+    include: tuple[str, ...] = TRIP_CHILD_COLLECTIONS,
+    chunk_size: int = TRIP_STREAM_CHUNK_SIZE,
+) -> Iterator[list[dict[str, Any]]]:
+    where_sql, params = _list_trips_where(viewer_user_id, bbox)
+    where_sql, params = _keyset_where(where_sql, params, after_trip_id)
+    return _iter_trip_chunks(where_sql, params, include=include, limit=limit, chunk_size=chunk_size)
+
+
+def list_user_trips(
+    target_user_id: int,
+    viewer_user_id: int | None,
+    *,
+    include: tuple[str, ...] = TRIP_CHILD_COLLECTIONS,
+    engine: str | None = None,
+) -> list[dict[str, Any]]:
+    where_sql, params = _user_trips_where(target_user_id, viewer_user_id)
+    return _load_trips(where_sql, params, include=include, engine=engine)
+
+
+def list_user_trips_page(
+    target_user_id: int,
+    viewer_user_id: int | None,
+    *,
+    limit: int | None = None,
+    after_trip_id: int | None = None,
+    include: tuple[str, ...] = TRIP_CHILD_COLLECTIONS,
+    engine: str | None = None,
+) -> dict[str, Any]:
+    where_sql, params = _user_trips_where(target_user_id, viewer_user_id)
+    return _load_trip_page(
+        where_sql,
+        params,
+        include=include,
+        page_size=limit,
+        after_trip_id=after_trip_id,
+        engine=engine,
+    )
+
+
+def get_trips_by_ids(
+    trip_ids: list[int],
+    viewer_user_id: int | None,
+    *,
+    include: tuple[str, ...] = TRIP_CHILD_COLLECTIONS,
+    engine: str | None = None,
+) -> list[dict[str, Any]]:
+    if not trip_ids:
+        return []
+
+    where_sql, params = visible_trips_where(viewer_user_id)
+    trips = _load_trips(
+        f"t.trip_id = ANY(%s) AND {where_sql}",
+        (list(trip_ids),) + params,
+        include=include,
+        engine=engine,
+    )
+
+    # Keep the caller's order (e.g. search rank) rather than trip_id order.
+    by_id = {trip["trip_id"]: trip for trip in trips}
+    return [by_id[trip_id] for trip_id in dict.fromkeys(trip_ids) if trip_id in by_id]
+
+
+def parse_trip_ids(value: Any, *, maximum: int = MAX_TRIP_BATCH_SIZE) -> list[int]:
+    trip_ids: list[int] = []
+    for part in (to_nullable_string(value) or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            trip_ids.append(int(part))
+        except ValueError:
+            raise TripValidationError("ids must be a comma-separated list of trip ids")
+
+    trip_ids = list(dict.fromkeys(trip_ids))
+    if not trip_ids:
+        raise TripValidationError("ids is required")
+    if len(trip_ids) > maximum:
+        raise TripValidationError(f"at most {maximum} ids can be requested at once")
+    return trip_ids
+
+
+def get_visible_items(
+    *,
+    activity_ids: list[int],
+    lodge_ids: list[int],
+    viewer_user_id: int | None,
+) -> dict[str, list[dict[str, Any]]]:
+    # Selected by id through their (visible) trips; sibling children are never loaded.
+    where_sql, params = visible_trips_where(viewer_user_id)
+    items: dict[str, list[dict[str, Any]]] = {"activities": [], "lodgings": []}
+
+    with get_cursor() as cur:
+        if activity_ids:
+            cur.execute(
+                f"""
+                SELECT a.activity_id, a.trip_id, a.address, a.thumbnail_url, a.title, a.location,
+                    a.description, a.latitude, a.longitude, a.cost
+                FROM activities a
+                JOIN trips t ON t.trip_id = a.trip_id
+                WHERE a.activity_id = ANY(%s) AND {where_sql}
+                """,
+                (list(activity_ids),) + params,
+            )
+            by_id = {int(row["activity_id"]): _serialize_activity(row) for row in cur.fetchall()}
+            items["activities"] = [by_id[item_id] for item_id in activity_ids if item_id in by_id]
+
+        if lodge_ids:
+            cur.execute(
+                f"""
+                SELECT l.lodge_id, l.trip_id, l.address, l.thumbnail_url, l.title, l.description,
+                    l.latitude, l.longitude, l.cost
+                FROM lodgings l
+                JOIN trips t ON t.trip_id = l.trip_id
+                WHERE l.lodge_id = ANY(%s) AND {where_sql}
+                """,
+                (list(lodge_ids),) + params,
+            )
+            by_id = {int(row["lodge_id"]): _serialize_lodging(row) for row in cur.fetchall()}
+            items["lodgings"] = [by_id[item_id] for item_id in lodge_ids if item_id in by_id]
+
+    return items
+
+
+def get_trip(trip_id: int, viewer_user_id: int | None, *, engine: str | None = None) -> dict[str, Any] | None:
+    if parse_trip_engine(engine) == "sql":
+        trips = _fetch_trip_documents(
+            "t.trip_id = %s",
+            (trip_id,),
+            include=TRIP_CHILD_COLLECTIONS,
+            comment_limit=None,
+        )
+    else:
+        trips = _fetch_trip_rows("t.trip_id = %s", (trip_id,))
     if not trips:
         return None
 
@@ -239,7 +908,9 @@ def get_trip(trip_id: int, viewer_user_id: int | None) -> dict[str, Any] | None:
     if trip["visibility"] != "public" and not is_owner:
         return None
 
-    return _hydrate_trip_children([trip])[0]
+    if "tags" in trip:
+        return trip
+    return _hydrate_trip_children([trip], comment_limit=None)[0]
 
 
 def _parse_visibility(value: Any) -> str:
@@ -337,99 +1008,132 @@ def _parse_cost(value: Any, *, field_name: str = "cost") -> Decimal | None:
     )
 
 
-def _insert_tags(cur, *, trip_id: int, tags: list[Any]):
-    for tag in tags:
-        clean_tag = to_nullable_string(tag)
-        if not clean_tag:
-            continue
+def _parse_tags(tags: list[Any]) -> list[str]:
+    clean_tags = (to_nullable_string(tag) for tag in tags)
+    return list(dict.fromkeys(tag for tag in clean_tags if tag))
 
-        cur.execute(
-            """
-            INSERT INTO trip_tags (trip_id, tag)
-            VALUES (%s, %s)
-            ON CONFLICT (trip_id, tag) DO NOTHING
-            """,
-            (trip_id, clean_tag),
-        )
 
-
-def _insert_lodgings(cur, *, trip_id: int, lodgings: list[Any]):
+def _parse_lodging_rows(lodgings: list[Any]) -> list[tuple[Any, ...]]:
+    rows: list[tuple[Any, ...]] = []
     for index, lodging in enumerate(lodgings):
         if not isinstance(lodging, dict):
             continue
 
         field_prefix = f"lodgings[{index + 1}]"
-        latitude = _parse_latitude(lodging.get("latitude"), field_name=f"{field_prefix}.latitude")
-        longitude = _parse_longitude(lodging.get("longitude"), field_name=f"{field_prefix}.longitude")
-        cost = _parse_cost(lodging.get("cost"), field_name=f"{field_prefix}.cost")
-
-        cur.execute(
-            """
-            INSERT INTO lodgings (
-                trip_id,
-                address,
-                thumbnail_url,
-                title,
-                description,
-                latitude,
-                longitude,
-                cost
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """,
+        rows.append(
             (
-                trip_id,
                 to_nullable_string(lodging.get("address")),
                 _parse_thumbnail_url(lodging.get("thumbnail_url")),
                 to_nullable_string(lodging.get("title")),
                 to_nullable_string(lodging.get("description")),
-                latitude,
-                longitude,
-                cost,
-            ),
+                _parse_latitude(lodging.get("latitude"), field_name=f"{field_prefix}.latitude"),
+                _parse_longitude(lodging.get("longitude"), field_name=f"{field_prefix}.longitude"),
+                _parse_cost(lodging.get("cost"), field_name=f"{field_prefix}.cost"),
+            )
         )
+    return rows
 
 
-def _insert_activities(cur, *, trip_id: int, activities: list[Any]):
+def _parse_activity_rows(activities: list[Any]) -> list[tuple[Any, ...]]:
+    rows: list[tuple[Any, ...]] = []
     for index, activity in enumerate(activities):
         if not isinstance(activity, dict):
             continue
 
         field_prefix = f"activities[{index + 1}]"
-        latitude = _parse_latitude(activity.get("latitude"), field_name=f"{field_prefix}.latitude")
-        longitude = _parse_longitude(activity.get("longitude"), field_name=f"{field_prefix}.longitude")
-        cost = _parse_cost(activity.get("cost"), field_name=f"{field_prefix}.cost")
-
-        cur.execute(
-            """
-            INSERT INTO activities (
-                trip_id,
-                address,
-                thumbnail_url,
-                title,
-                location,
-                description,
-                latitude,
-                longitude,
-                cost
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """,
+        rows.append(
             (
-                trip_id,
                 to_nullable_string(activity.get("address")),
                 _parse_thumbnail_url(activity.get("thumbnail_url")),
                 to_nullable_string(activity.get("title")),
                 to_nullable_string(activity.get("location")),
                 to_nullable_string(activity.get("description")),
-                latitude,
-                longitude,
-                cost,
-            ),
+                _parse_latitude(activity.get("latitude"), field_name=f"{field_prefix}.latitude"),
+                _parse_longitude(activity.get("longitude"), field_name=f"{field_prefix}.longitude"),
+                _parse_cost(activity.get("cost"), field_name=f"{field_prefix}.cost"),
+            )
+        )
+    return rows
+
+
+# Children are validated up front and written with one multi-row INSERT per table.
+def _insert_tags(cur, *, trip_id: int, tags: list[str], visibility: str) -> list[str]:
+    if not tags:
+        return []
+
+    inserted = execute_values(
+        cur,
+        """
+        INSERT INTO trip_tags (trip_id, tag)
+        VALUES %s
+        ON CONFLICT (trip_id, tag) DO NOTHING
+        RETURNING tag
+        """,
+        [(trip_id, tag) for tag in tags],
+        page_size=CHILD_INSERT_PAGE_SIZE,
+        fetch=True,
+    )
+
+    inserted_tags = [row["tag"] for row in inserted]
+    if visibility == "public":
+        increment_public_tag_counts(cur, inserted_tags)
+    return inserted_tags
+
+
+def _insert_lodgings(cur, *, trip_id: int, rows: list[tuple[Any, ...]]) -> list[dict[str, Any]]:
+    if not rows:
+        return []
+
+    return execute_values(
+        cur,
+        """
+        INSERT INTO lodgings (
+            trip_id,
+            address,
+            thumbnail_url,
+            title,
+            description,
+            latitude,
+            longitude,
+            cost
         )
+        VALUES %s
+        RETURNING lodge_id, trip_id, address, thumbnail_url, title, description, latitude, longitude, cost
+        """,
+        [(trip_id,) + row for row in rows],
+        page_size=CHILD_INSERT_PAGE_SIZE,
+        fetch=True,
+    )
 
 
-def create_trip(*, owner_user_id: int, payload: dict[str, Any]) -> dict[str, Any]:
+def _insert_activities(cur, *, trip_id: int, rows: list[tuple[Any, ...]]) -> list[dict[str, Any]]:
+    if not rows:
+        return []
+
+    return execute_values(
+        cur,
+        """
+        INSERT INTO activities (
+            trip_id,
+            address,
+            thumbnail_url,
+            title,
+            location,
+            description,
+            latitude,
+            longitude,
+            cost
+        )
+        VALUES %s
+        RETURNING activity_id, trip_id, address, thumbnail_url, title, location, description, latitude, longitude, cost
+        """,
+        [(trip_id,) + row for row in rows],
+        page_size=CHILD_INSERT_PAGE_SIZE,
+        fetch=True,
+    )
+
+
+def parse_trip_payload(payload: dict[str, Any]) -> dict[str, Any]:
     title = to_nullable_string(payload.get("title"))
     if not title:
         raise TripValidationError("title is required")
@@ -445,75 +1149,128 @@ def create_trip(*, owner_user_id: int, payload: dict[str, Any]) -> dict[str, Any
     if not isinstance(tags, list):
         raise TripValidationError("tags must be a list")
 
+    visibility = _parse_visibility(payload.get("visibility"))
+    clean_tags = _parse_tags(tags)
+    lodging_rows = _parse_lodging_rows(lodgings)
+    activity_rows = _parse_activity_rows(activities)
+
+    return {
+        "values": (
+            _parse_thumbnail_url(payload.get("thumbnail_url")),
+            title,
+            to_nullable_string(payload.get("description")),
+            _parse_latitude(payload.get("latitude")),
+            _parse_longitude(payload.get("longitude")),
+            _parse_cost(payload.get("cost")),
+            _parse_duration(payload.get("duration")),
+            _parse_trip_date(payload.get("date")),
+            visibility,
+        ),
+        "visibility": visibility,
+        "tags": clean_tags,
+        "lodgings": lodging_rows,
+        "activities": activity_rows,
+    }
+
+
+def create_trip(*, owner_user_id: int, payload: dict[str, Any]) -> dict[str, Any]:
+    parsed = parse_trip_payload(payload)
+    visibility = parsed["visibility"]
+
     with get_cursor(commit=True) as cur:
+        # The owner is joined in the same statement, so the response is built from
+        # RETURNING values instead of being read back after commit.
         cur.execute(
-            """
-            INSERT INTO trips (
-                thumbnail_url,
-                title,
-                description,
-                latitude,
-                longitude,
-                cost,
-                duration,
-                date,
-                visibility,
-                owner_user_id
+            f"""
+            WITH t AS (
+                INSERT INTO trips (
+                    thumbnail_url,
+                    title,
+                    description,
+                    latitude,
+                    longitude,
+                    cost,
+                    duration,
+                    date,
+                    visibility,
+                    owner_user_id
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING *
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING trip_id
+            SELECT{_TRIP_ROW_COLUMNS_SQL}
+            FROM t
+            JOIN travelers o ON o.user_id = t.owner_user_id
             """,
-            (
-                _parse_thumbnail_url(payload.get("thumbnail_url")),
-                title,
-                to_nullable_string(payload.get("description")),
-                _parse_latitude(payload.get("latitude")),
-                _parse_longitude(payload.get("longitude")),
-                _parse_cost(payload.get("cost")),
-                _parse_duration(payload.get("duration")),
-                _parse_trip_date(payload.get("date")),
-                _parse_visibility(payload.get("visibility")),
-                owner_user_id,
-            ),
+            parsed["values"] + (owner_user_id,),
         )
 
         created = cur.fetchone()
         if not created:
             raise TripValidationError("failed to create trip")
 
-        trip_id = int(created["trip_id"])
+        created_trip = _serialize_trip_base(created)
+        trip_id = created_trip["trip_id"]
+
+        created_trip["tags"] = sorted(_insert_tags(cur, trip_id=trip_id, tags=parsed["tags"], visibility=visibility))
+        created_trip["lodgings"] = [
+            _serialize_lodging(row) for row in _insert_lodgings(cur, trip_id=trip_id, rows=parsed["lodgings"])
+        ]
+        created_trip["activities"] = [
+            _serialize_activity(row) for row in _insert_activities(cur, trip_id=trip_id, rows=parsed["activities"])
+        ]
+        created_trip["comments"] = []
+
+    _invalidate_trip_content(
+        [(created_trip["longitude"], created_trip["latitude"])]
+        + [(item["longitude"], item["latitude"]) for item in created_trip["lodgings"]]
+        + [(item["longitude"], item["latitude"]) for item in created_trip["activities"]]
+    )
 
-        _insert_tags(cur, trip_id=trip_id, tags=tags)
-        _insert_lodgings(cur, trip_id=trip_id, lodgings=lodgings)
-        _insert_activities(cur, trip_id=trip_id, activities=activities)
+    return created_trip
 
-    created_trip = get_trip(trip_id, owner_user_id)
-    if not created_trip:
-        raise TripValidationError("failed to load created trip")
 
-    return created_trip
+def _invalidate_trip_content(points: list[tuple[Any, Any]]):
+    invalidate_cluster_points(points)
+    _feed_cache.bump_version()
 
 
-def _require_trip_owner(*, trip_id: int, user_id: int):
-    with get_cursor() as cur:
-        cur.execute("SELECT owner_user_id FROM trips WHERE trip_id = %s", (trip_id,))
-        row = cur.fetchone()
+def invalidate_all_trip_content():
+    clear_cluster_cache()
+    _feed_cache.bump_version()
+
+
+def get_feed_cache_stats() -> dict[str, Any]:
+    return _feed_cache.stats()
+
+
+def _raise_for_unowned_trip(cur, *, trip_id: int, user_id: int):
+    # Only reached when an owner-scoped write matched nothing.
+    cur.execute("SELECT owner_user_id FROM trips WHERE trip_id = %s", (trip_id,))
+    row = cur.fetchone()
 
     if not row:
         raise TripNotFoundError("trip not found")
-
-    owner_user_id = int(row["owner_user_id"])
-    if owner_user_id != user_id:
+    if int(row["owner_user_id"]) != user_id:
         raise TripForbiddenError("only the trip owner can edit this trip")
+    raise TripNotFoundError("trip not found")
 
 
 def add_lodging(*, trip_id: int, owner_user_id: int, payload: dict[str, Any]) -> dict[str, Any]:
-    _require_trip_owner(trip_id=trip_id, user_id=owner_user_id)
-
     title = to_nullable_string(payload.get("title"))
     if not title:
         raise TripValidationError("title is required")
 
+    values = (
+        to_nullable_string(payload.get("address")),
+        _parse_thumbnail_url(payload.get("thumbnail_url")),
+        title,
+        to_nullable_string(payload.get("description")),
+        _parse_latitude(payload.get("latitude")),
+        _parse_longitude(payload.get("longitude")),
+        _parse_cost(payload.get("cost")),
+    )
+
     with get_cursor(commit=True) as cur:
         cur.execute(
             """
@@ -527,24 +1284,18 @@ def add_lodging(*, trip_id: int, owner_user_id: int, payload: dict[str, Any]) ->
                 longitude,
                 cost
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING lodge_id
+            SELECT t.trip_id, %s, %s, %s, %s, %s::numeric, %s::numeric, %s::numeric
+            FROM trips t
+            WHERE t.trip_id = %s AND t.owner_user_id = %s
+            RETURNING lodge_id, latitude, longitude
             """,
-            (
-                trip_id,
-                to_nullable_string(payload.get("address")),
-                _parse_thumbnail_url(payload.get("thumbnail_url")),
-                title,
-                to_nullable_string(payload.get("description")),
-                _parse_latitude(payload.get("latitude")),
-                _parse_longitude(payload.get("longitude")),
-                _parse_cost(payload.get("cost")),
-            ),
+            values + (trip_id, owner_user_id),
         )
         row = cur.fetchone()
+        if not row:
+            _raise_for_unowned_trip(cur, trip_id=trip_id, user_id=owner_user_id)
 
-    if not row:
-        raise TripValidationError("failed to create lodging")
+    _invalidate_trip_content([(row["longitude"], row["latitude"])])
 
     return {
         "lodge_id": int(row["lodge_id"]),
@@ -553,12 +1304,21 @@ def add_lodging(*, trip_id: int, owner_user_id: int, payload: dict[str, Any]) ->
 
 
 def add_activity(*, trip_id: int, owner_user_id: int, payload: dict[str, Any]) -> dict[str, Any]:
-    _require_trip_owner(trip_id=trip_id, user_id=owner_user_id)
-
     title = to_nullable_string(payload.get("title"))
     if not title:
         raise TripValidationError("title is required")
 
+    values = (
+        to_nullable_string(payload.get("address")),
+        _parse_thumbnail_url(payload.get("thumbnail_url")),
+        title,
+        to_nullable_string(payload.get("location")),
+        to_nullable_string(payload.get("description")),
+        _parse_latitude(payload.get("latitude")),
+        _parse_longitude(payload.get("longitude")),
+        _parse_cost(payload.get("cost")),
+    )
+
     with get_cursor(commit=True) as cur:
         cur.execute(
             """
@@ -573,25 +1333,18 @@ def add_activity(*, trip_id: int, owner_user_id: int, payload: dict[str, Any]) -
                 longitude,
                 cost
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING activity_id
+            SELECT t.trip_id, %s, %s, %s, %s, %s, %s::numeric, %s::numeric, %s::numeric
+            FROM trips t
+            WHERE t.trip_id = %s AND t.owner_user_id = %s
+            RETURNING activity_id, latitude, longitude
             """,
-            (
-                trip_id,
-                to_nullable_string(payload.get("address")),
-                _parse_thumbnail_url(payload.get("thumbnail_url")),
-                title,
-                to_nullable_string(payload.get("location")),
-                to_nullable_string(payload.get("description")),
-                _parse_latitude(payload.get("latitude")),
-                _parse_longitude(payload.get("longitude")),
-                _parse_cost(payload.get("cost")),
-            ),
+            values + (trip_id, owner_user_id),
         )
         row = cur.fetchone()
+        if not row:
+            _raise_for_unowned_trip(cur, trip_id=trip_id, user_id=owner_user_id)
 
-    if not row:
-        raise TripValidationError("failed to create activity")
+    _invalidate_trip_content([(row["longitude"], row["latitude"])])
 
     return {
         "activity_id": int(row["activity_id"]),
@@ -600,15 +1353,38 @@ def add_activity(*, trip_id: int, owner_user_id: int, payload: dict[str, Any]) -
 
 
 def delete_trip(*, trip_id: int, owner_user_id: int):
-    _require_trip_owner(trip_id=trip_id, user_id=owner_user_id)
-
     with get_cursor(commit=True) as cur:
-        cur.execute("DELETE FROM trips WHERE trip_id = %s", (trip_id,))
-        if cur.rowcount < 1:
-            raise TripNotFoundError("trip not found")
+        # Every CTE reads the pre-delete snapshot, so the child points and tags are
+        # still visible here even though the cascade removes them.
+        cur.execute(
+            f"""
+            WITH deleted AS (
+                DELETE FROM trips
+                WHERE trip_id = %s AND owner_user_id = %s
+                RETURNING trip_id, visibility, longitude, latitude
+            ),
+            tag_counts AS ({public_tag_decrement_sql("deleted")})
+            SELECT d.longitude, d.latitude FROM deleted d
+            UNION ALL
+            SELECT l.longitude, l.latitude FROM lodgings l JOIN deleted d ON d.trip_id = l.trip_id
+            UNION ALL
+            SELECT a.longitude, a.latitude FROM activities a JOIN deleted d ON d.trip_id = a.trip_id
+            """,
+            (trip_id, owner_user_id),
+        )
+        points = [(row["longitude"], row["latitude"]) for row in cur.fetchall()]
+        if not points:
+            _raise_for_unowned_trip(cur, trip_id=trip_id, user_id=owner_user_id)
 
+    _invalidate_trip_content(points)
 
-def get_user_profile(*, user_id: int, viewer_user_id: int | None) -> dict[str, Any] | None:
+
+def get_user_profile(
+    *,
+    user_id: int,
+    viewer_user_id: int | None,
+    include: tuple[str, ...] = (),
+) -> dict[str, Any] | None:
     with get_cursor() as cur:
         cur.execute(
             """
@@ -624,7 +1400,7 @@ def get_user_profile(*, user_id: int, viewer_user_id: int | None) -> dict[str, A
     if not user_row:
         return None
 
-    trips = list_user_trips(target_user_id=user_id, viewer_user_id=viewer_user_id)
+    trips = list_user_trips(target_user_id=user_id, viewer_user_id=viewer_user_id, include=include)
     trip_entries = [
         {
             "trip_id": trip["trip_id"],
@@ -633,6 +1409,7 @@ def get_user_profile(*, user_id: int, viewer_user_id: int | None) -> dict[str, A
             "date": trip["date"],
             "latitude": trip["latitude"],
             "longitude": trip["longitude"],
+            **{name: trip[name] for name in include},
         }
         for trip in trips
     ]
@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from flask import Flask
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from config import (
+    SESSION_BACKEND,
+    SESSION_LIFETIME_SECONDS,
+    SESSION_REDIS_URL,
+    SESSION_REFRESH_SECONDS,
+    SESSION_SQLITE_PATH,
+    SESSION_SWEEP_BATCH_SIZE,
+    SESSION_SWEEP_INTERVAL_SECONDS,
+)
+from db import get_cursor
+
+# "cookie" keeps Flask's signed client-side sessions, which logout cannot revoke.
+SESSION_BACKENDS = ("postgres", "sqlite", "redis", "cookie")
+
+# secrets.token_urlsafe(32); anything else is not looked up.
+_SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{43}$")
+
+
+def _new_session_id() -> str:
+    return secrets.token_urlsafe(32)
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial: dict[str, Any] | None = None, *, sid: str, new: bool, expires_at: float | None = None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.stale_cookie = False
+        self.initial_user_id = super().get("user_id")
+        self.modified = False
+        self.accessed = False
+
+    def __getitem__(self, key: str) -> Any:
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+class PostgresSessionBackend:
+    # migrations/009_sessions.sql; the table is UNLOGGED, so a crash logs everyone out.
+    name = "postgres"
+
+    def load(self, sid: str) -> tuple[str, float] | None:
+        with get_cursor() as cur:
+            cur.execute(
+                """
+                SELECT data, extract(epoch FROM expires_at)::float8 AS expires_at
+                FROM sessions
+                WHERE session_id = %s AND expires_at > now()
+                """,
+                (sid,),
+            )
+            row = cur.fetchone()
+        return (row["data"], row["expires_at"]) if row else None
+
+    def save(self, sid: str, data: str, expires_at: float):
+        with get_cursor(commit=True) as cur:
+            cur.execute(
+                """
+                INSERT INTO sessions (session_id, data, expires_at)
+                VALUES (%s, %s, to_timestamp(%s))
+                ON CONFLICT (session_id) DO UPDATE
+                SET data = EXCLUDED.data, expires_at = EXCLUDED.expires_at
+                """,
+                (sid, data, expires_at),
+            )
+
+    def delete(self, sid: str):
+        with get_cursor(commit=True) as cur:
+            cur.execute("DELETE FROM sessions WHERE session_id = %s", (sid,))
+
+    def sweep(self, batch_size: int) -> int:
+        # SKIP LOCKED lets several workers sweep at once without queueing on each other.
+        with get_cursor(commit=True) as cur:
+            cur.execute(
+                """
+                DELETE FROM sessions
+                WHERE session_id IN (
+                    SELECT session_id
+                    FROM sessions
+                    WHERE expires_at <= now()
+                    ORDER BY expires_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                """,
+                (batch_size,),
+            )
+            return cur.rowcount
+
+
+class SqliteSessionBackend:
+    # Local stand-in for tests and single-host development; ":memory:" keeps it per process.
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at_idx ON sessions (expires_at)")
+
+    def load(self, sid: str) -> tuple[str, float] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE session_id = ? AND expires_at > ?",
+                (sid, time.time()),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def save(self, sid: str, data: str, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at
+                """,
+                (sid, data, expires_at),
+            )
+
+    def delete(self, sid: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (sid,))
+
+    def sweep(self, batch_size: int) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                DELETE FROM sessions
+                WHERE rowid IN (SELECT rowid FROM sessions WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)
+                """,
+                (time.time(), batch_size),
+            )
+            return cursor.rowcount
+
+
+class RedisSessionBackend:
+    # Works with any client exposing get/set(ex=)/delete, e.g. redis.Redis or a local stand-in.
+    # Values are "<expires_at>|<data>" so a lookup is one GET; Redis expires keys itself.
+    name = "redis"
+
+    def __init__(self, client, *, prefix: str = "session"):
+        self._client = client
+        self._prefix = prefix
+
+    def _key(self, sid: str) -> str:
+        return f"{self._prefix}:{sid}"
+
+    def load(self, sid: str) -> tuple[str, float] | None:
+        raw = self._client.get(self._key(sid))
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        expires_at, _, data = raw.partition("|")
+        return data, float(expires_at)
+
+    def save(self, sid: str, data: str, expires_at: float):
+        ttl = max(1, int(expires_at - time.time()))
+        self._client.set(self._key(sid), f"{expires_at:.0f}|{data}", ex=ttl)
+
+    def delete(self, sid: str):
+        self._client.delete(self._key(sid))
+
+    def sweep(self, batch_size: int) -> int:
+        return 0
+
+
+def _sweep_backend(backend, batch_size: int) -> int:
+    # Short batches keep each delete's locks brief; stops at the first partial batch.
+    total = 0
+    while True:
+        deleted = backend.sweep(batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(
+        self,
+        backend,
+        *,
+        lifetime_seconds: float,
+        refresh_seconds: float,
+        sweep_interval_seconds: float,
+        sweep_batch_size: int,
+    ):
+        self.backend = backend
+        self.lifetime_seconds = lifetime_seconds
+        self.refresh_seconds = min(refresh_seconds, lifetime_seconds)
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.sweep_batch_size = max(1, sweep_batch_size)
+
+        self._lock = threading.Lock()
+        self._next_sweep_at = time.monotonic() + sweep_interval_seconds
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "lookup_ms_total": 0.0,
+            "lookup_ms_max": 0.0,
+            "writes": 0,
+            "refreshes": 0,
+            "revoked": 0,
+            "sweeps": 0,
+            "swept": 0,
+        }
+
+    def _record_lookup(self, started: float, *, hit: bool):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats["lookups"] += 1
+            self._stats["hits" if hit else "misses"] += 1
+            self._stats["lookup_ms_total"] += elapsed_ms
+            self._stats["lookup_ms_max"] = max(self._stats["lookup_ms_max"], elapsed_ms)
+
+    def _record(self, key: str, amount: int = 1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def open_session(self, app: Flask, request) -> ServerSideSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return ServerSideSession(sid=_new_session_id(), new=True)
+
+        stored = None
+        if _SESSION_ID_PATTERN.match(sid):
+            started = time.perf_counter()
+            stored = self.backend.load(sid)
+            self._record_lookup(started, hit=stored is not None)
+
+        if stored is not None:
+            data, expires_at = stored
+            try:
+                return ServerSideSession(self.serializer.loads(data), sid=sid, new=False, expires_at=expires_at)
+            except ValueError:
+                pass
+
+        # Unknown ids are never adopted, so a planted cookie cannot choose the id of a later login.
+        session = ServerSideSession(sid=_new_session_id(), new=True)
+        session.stale_cookie = True
+        return session
+
+    def _delete_cookie(self, app: Flask, response):
+        response.delete_cookie(
+            self.get_cookie_name(app),
+            domain=self.get_cookie_domain(app),
+            path=self.get_cookie_path(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            httponly=self.get_cookie_httponly(app),
+        )
+
+    def save_session(self, app: Flask, session: ServerSideSession, response):
+        if session.accessed:
+            response.vary.add("Cookie")
+        self._schedule_sweep(app, response)
+
+        if not session:
+            if not session.new:
+                # Logout (session.clear()) removes the server copy, so the old cookie is dead everywhere.
+                self.backend.delete(session.sid)
+                self._record("revoked")
+                self._delete_cookie(app, response)
+            elif session.stale_cookie:
+                self._delete_cookie(app, response)
+            return
+
+        now = time.time()
+        if session.modified:
+            if not session.new and session.get("user_id") != session.initial_user_id:
+                # Logging in (or switching account) moves the data to a fresh id.
+                self.backend.delete(session.sid)
+                session.sid = _new_session_id()
+            self._record("writes")
+        elif session.expires_at is not None and session.expires_at - now < self.lifetime_seconds - self.refresh_seconds:
+            # Unchanged sessions slide their expiry at most once per refresh interval.
+            self._record("refreshes")
+        else:
+            return
+
+        self.backend.save(session.sid, self.serializer.dumps(dict(session)), now + self.lifetime_seconds)
+        response.set_cookie(
+            self.get_cookie_name(app),
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=self.get_cookie_domain(app),
+            path=self.get_cookie_path(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+    def _schedule_sweep(self, app: Flask, response):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_sweep_at:
+                return
+            self._next_sweep_at = now + self.sweep_interval_seconds
+
+        # Runs once the response has been sent, off the request's latency.
+        def sweep_after_response():
+            try:
+                self.sweep()
+            except Exception:
+                app.logger.exception("Session sweep failed")
+
+        response.call_on_close(sweep_after_response)
+
+    def sweep(self) -> int:
+        total = _sweep_backend(self.backend, self.sweep_batch_size)
+        self._record("sweeps")
+        self._record("swept", total)
+        return total
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = self.backend.name
+        lookup_ms_total = stats.pop("lookup_ms_total")
+        stats["lookup_avg_ms"] = round(lookup_ms_total / stats["lookups"], 3) if stats["lookups"] else None
+        stats["lookup_ms_max"] = round(stats["lookup_ms_max"], 3)
+        return stats
+
+
+def create_session_backend(name: str):
+    if name == "postgres":
+        return PostgresSessionBackend()
+    if name == "sqlite":
+        return SqliteSessionBackend(SESSION_SQLITE_PATH)
+    if name == "redis":
+        if not SESSION_REDIS_URL:
+            raise RuntimeError("a redis URL is required for the redis session backend")
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("the redis package is required for the redis session backend")
+        return RedisSessionBackend(redis.Redis.from_url(SESSION_REDIS_URL))
+    raise RuntimeError(f"unknown session backend: {name}")
+
+
+def sweep_expired_sessions(backend_name: str = SESSION_BACKEND, *, batch_size: int = SESSION_SWEEP_BATCH_SIZE) -> int:
+    # For sweep_sessions.py: the after-response sweep needs a server that outlives its responses.
+    if backend_name == "cookie":
+        return 0
+    return _sweep_backend(create_session_backend(backend_name), max(1, batch_size))
+
+
+def init_session_store(app: Flask, backend_name: str = SESSION_BACKEND):
+    if backend_name == "cookie":
+        return
+    app.session_interface = ServerSideSessionInterface(
+        create_session_backend(backend_name),
+        lifetime_seconds=SESSION_LIFETIME_SECONDS,
+        refresh_seconds=SESSION_REFRESH_SECONDS,
+        sweep_interval_seconds=SESSION_SWEEP_INTERVAL_SECONDS,
+        sweep_batch_size=SESSION_SWEEP_BATCH_SIZE,
+    )
+
+
+def get_session_stats(app: Flask) -> dict[str, Any]:
+    if isinstance(app.session_interface, ServerSideSessionInterface):
+        return app.session_interface.stats()
+    return {"backend": "cookie"}
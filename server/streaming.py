@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_FORMATS = ("json", "ndjson")
+
+
+def iter_json_document(
+    chunks: Iterable[list[Any]],
+    dumps: Callable[[Any], str],
+    *,
+    key: str,
+    extra: dict[str, Any] | None = None,
+) -> Iterator[str]:
+    # Emits {"<key>": [...], **extra} one chunk at a time.
+    yield '{"' + key + '":['
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        body = ",".join(dumps(item) for item in chunk)
+        yield body if first else "," + body
+        first = False
+    yield "]" + ("," + dumps(extra)[1:] if extra else "}")
+
+
+def iter_ndjson(chunks: Iterable[list[Any]], dumps: Callable[[Any], str]) -> Iterator[str]:
+    for chunk in chunks:
+        if chunk:
+            yield "".join(dumps(item) + "\n" for item in chunk)
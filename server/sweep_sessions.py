@@ -0,0 +1,32 @@
+"""Delete expired server-side sessions.
+
+    python sweep_sessions.py
+    python sweep_sessions.py --batch-size 5000
+
+Web processes also sweep after a response every SESSION_SWEEP_INTERVAL_SECONDS,
+but that hook may never run where the process is frozen once the response is
+returned (aws-wsgi on Lambda). Run this from cron there. It does nothing for the
+"cookie" backend, and Redis expires its keys itself.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from config import SESSION_BACKEND, SESSION_SWEEP_BATCH_SIZE
+from session_store import SESSION_BACKENDS, sweep_expired_sessions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=SESSION_BACKENDS, default=SESSION_BACKEND)
+    parser.add_argument("--batch-size", type=int, default=SESSION_SWEEP_BATCH_SIZE)
+    args = parser.parse_args()
+
+    deleted = sweep_expired_sessions(args.backend, batch_size=args.batch_size)
+    print(f"swept {deleted} expired sessions ({args.backend})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())